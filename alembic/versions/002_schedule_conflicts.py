@@ -0,0 +1,78 @@
+"""Planned window and systems columns for schedule-conflict detection
+
+Revision ID: 002_schedule_conflicts
+Revises: 001_initial
+Create Date: 2026-10-19 09:00:00.000000
+
+Adds two stored generated columns to ``changes`` (PostgreSQL only):
+
+- ``planned_window``: tstzrange over planned_start..planned_end
+- ``systems``: text[] parsed from the systems_affected JSON
+
+Both are indexed for active (Planned / In Progress) changes so overlap
+checks are answered from the indexes. The columns are maintained by the
+database and are deliberately not mapped on the Change model.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_schedule_conflicts'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_STATUSES = "status IN ('Planned', 'In Progress')"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Generated columns may only call immutable functions
+    op.execute("""
+        CREATE FUNCTION change_systems(systems_affected text) RETURNS text[]
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT coalesce(array_agg(value), '{}')
+            FROM json_array_elements_text(systems_affected::json)
+        $$
+    """)
+
+    # A missing end is treated as a point in time; an inverted window is ignored
+    op.execute("""
+        ALTER TABLE changes ADD COLUMN planned_window tstzrange
+        GENERATED ALWAYS AS (
+            CASE
+                WHEN planned_start IS NULL THEN NULL
+                WHEN planned_end < planned_start THEN NULL
+                ELSE tstzrange(planned_start, coalesce(planned_end, planned_start), '[]')
+            END
+        ) STORED
+    """)
+    op.execute("""
+        ALTER TABLE changes ADD COLUMN systems text[]
+        GENERATED ALWAYS AS (change_systems(systems_affected)) STORED
+    """)
+
+    # The planner combines these with a BitmapAnd for window && systems lookups
+    op.execute(f"""
+        CREATE INDEX ix_changes_planned_window ON changes
+        USING gist (planned_window) WHERE {ACTIVE_STATUSES}
+    """)
+    op.execute(f"""
+        CREATE INDEX ix_changes_systems ON changes
+        USING gin (systems) WHERE {ACTIVE_STATUSES}
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_changes_systems")
+    op.execute("DROP INDEX IF EXISTS ix_changes_planned_window")
+    op.execute("ALTER TABLE changes DROP COLUMN IF EXISTS systems")
+    op.execute("ALTER TABLE changes DROP COLUMN IF EXISTS planned_window")
+    op.execute("DROP FUNCTION IF EXISTS change_systems(text)")
@@ -0,0 +1,73 @@
+"""Materialized views for change analytics
+
+Revision ID: 003_analytics_views
+Revises: 002_schedule_conflicts
+Create Date: 2026-10-19 10:00:00.000000
+
+PostgreSQL only. Each view has a unique index so it can be refreshed with
+REFRESH MATERIALIZED VIEW CONCURRENTLY (readers are never blocked).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_analytics_views'
+down_revision: Union[str, None] = '002_schedule_conflicts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Weekly counts; volume by category and high-impact share both read this
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_change_weekly AS
+        SELECT date_trunc('week', created_at)::date AS week,
+               category::text AS category,
+               impact_level::text AS impact_level,
+               status::text AS status,
+               count(*) AS changes
+        FROM changes
+        GROUP BY 1, 2, 3, 4
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX ux_mv_change_weekly
+        ON mv_change_weekly (week, category, impact_level, status)
+    """)
+
+    # Outcomes per system, using the generated systems column from 002
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_change_system_outcomes AS
+        SELECT s.system,
+               count(*) AS changes,
+               count(*) FILTER (WHERE c.status = 'Completed') AS completed,
+               count(*) FILTER (WHERE c.status = 'Failed') AS failed,
+               count(*) FILTER (WHERE c.status = 'Rolled Back') AS rolled_back
+        FROM changes c
+        CROSS JOIN LATERAL unnest(c.systems) AS s(system)
+        GROUP BY s.system
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX ux_mv_change_system_outcomes
+        ON mv_change_system_outcomes (system)
+    """)
+
+    # When the views were last refreshed (shared by all workers)
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_analytics_refreshed AS
+        SELECT 1 AS id, now() AS refreshed_at
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_mv_analytics_refreshed ON mv_analytics_refreshed (id)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_analytics_refreshed")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_change_system_outcomes")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_change_weekly")
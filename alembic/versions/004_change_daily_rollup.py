@@ -0,0 +1,58 @@
+"""Daily change count rollup
+
+Revision ID: 004_change_daily_rollup
+Revises: 003_analytics_views
+Create Date: 2026-10-19 11:00:00.000000
+
+Backfilled here on PostgreSQL; on other databases (or to repair drift) run
+scripts/rebuild_rollup.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_change_daily_rollup'
+down_revision: Union[str, None] = '003_analytics_views'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'change_daily_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('impact_level', sa.String(length=50), nullable=False),
+        sa.Column('system', sa.String(length=255), nullable=False),
+        sa.Column('changes', sa.Integer(), nullable=False),
+        # System first: totals read the system='' rows for a day range
+        sa.PrimaryKeyConstraint('system', 'day', 'category', 'status', 'impact_level')
+    )
+    
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    
+    # Same keys as RollupService: UTC day, '' for the every-change rows
+    op.execute("""
+        INSERT INTO change_daily_rollup (day, category, status, impact_level, system, changes)
+        SELECT day, category, status, impact_level, system, count(*)
+        FROM (
+            SELECT DISTINCT c.id,
+                   (c.created_at AT TIME ZONE 'UTC')::date AS day,
+                   c.category::text AS category,
+                   c.status::text AS status,
+                   c.impact_level::text AS impact_level,
+                   left(s.system, 255) AS system
+            FROM changes c
+            CROSS JOIN LATERAL unnest(array_append(c.systems, '')) AS s(system)
+        ) AS keyed
+        GROUP BY day, category, status, impact_level, system
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('change_daily_rollup')
@@ -0,0 +1,42 @@
+"""UNLOGGED cache table for the postgres cache backend
+
+Revision ID: 005_cache_entries
+Revises: 004_change_daily_rollup
+Create Date: 2026-10-19 14:00:00.000000
+
+PostgreSQL only. UNLOGGED tables skip the WAL: writes are cheap, the
+table isn't replicated and is emptied after a crash, which suits a cache.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_cache_entries'
+down_revision: Union[str, None] = '004_change_daily_rollup'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        CREATE UNLOGGED TABLE cache_entries (
+            key text PRIMARY KEY,
+            namespace text NOT NULL,
+            value bytea NOT NULL,
+            expires_at timestamptz NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX ix_cache_entries_namespace ON cache_entries (namespace)")
+    op.execute("CREATE INDEX ix_cache_entries_expires_at ON cache_entries (expires_at)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TABLE IF EXISTS cache_entries")
@@ -0,0 +1,48 @@
+"""UNLOGGED rate limit tables for the postgres backend
+
+Revision ID: 006_rate_limits
+Revises: 005_cache_entries
+Create Date: 2026-10-19 15:00:00.000000
+
+PostgreSQL only. Token buckets and in-flight leases are short-lived
+state; losing them in a crash just resets everyone's limits.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_rate_limits'
+down_revision: Union[str, None] = '005_cache_entries'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        CREATE UNLOGGED TABLE rate_limit_buckets (
+            key text PRIMARY KEY,
+            tokens double precision NOT NULL,
+            updated_at double precision NOT NULL
+        )
+    """)
+    op.execute("""
+        CREATE UNLOGGED TABLE rate_limit_leases (
+            id text PRIMARY KEY,
+            key text NOT NULL,
+            started_at double precision NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX ix_rate_limit_leases_key ON rate_limit_leases (key)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TABLE IF EXISTS rate_limit_leases")
+    op.execute("DROP TABLE IF EXISTS rate_limit_buckets")
@@ -0,0 +1,35 @@
+"""Calendar feed owners
+
+Revision ID: 008_calendar_feed_owners
+Revises: 007_attachments
+Create Date: 2026-10-19 18:00:00.000000
+
+Token version (for resetting feed URLs), role and last sign-in of each
+user who has issued a calendar feed, checked on every poll.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_calendar_feed_owners'
+down_revision: Union[str, None] = '007_attachments'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'calendar_feed_owners',
+        sa.Column('user_email', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=50), nullable=False),
+        sa.Column('token_version', sa.Integer(), nullable=False),
+        sa.Column('signed_in_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_email')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('calendar_feed_owners')
@@ -0,0 +1,212 @@
+"""
+Fingerprinted, precompressed static assets.
+
+Usage (build step, e.g. in the Dockerfile):
+    python -m app.assets --output app/static_build
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Long-lived caching for content-hashed URLs; they change whenever the file does
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Unhashed URLs must be revalidated on every use
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Text formats worth precompressing
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+
+# Preferred first
+ENCODING_SUFFIXES = [('br', '.br'), ('gzip', '.gz')]
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Content codings the client accepts (q=0 entries excluded)."""
+    encodings = set()
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name)
+    return encodings
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file via rename so concurrent workers never see partial files."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.asset-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class AssetManifest:
+    """
+    Map source asset paths to content-hashed file names.
+    
+    ``build`` writes ``style.<hash>.css`` (plus ``.gz`` and, if the brotli
+    package is installed, ``.br`` siblings) into the build directory. It is
+    idempotent, so every worker can run it at startup after a build step has
+    already done the work.
+    """
+    
+    def __init__(self, source_dir: str):
+        self.source_dir = Path(source_dir)
+        self.build_dir: Optional[Path] = None
+        self.urls: dict[str, str] = {}
+        self.files: dict[str, list[str]] = {}
+    
+    @staticmethod
+    def fingerprint(relative_path: str, content: bytes) -> str:
+        """``css/style.css`` -> ``css/style.<hash>.css``"""
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(relative_path)
+        return f'{stem}.{digest}{ext}'
+    
+    def build(self, build_dir: str) -> dict[str, str]:
+        """
+        Hash, copy and precompress every asset under the source directory.
+        
+        Args:
+            build_dir: Output directory (created if missing)
+        
+        Returns:
+            Manifest mapping source path to fingerprinted path
+        """
+        self.build_dir = Path(build_dir)
+        manifest = {}
+        files = {}
+        
+        for source in sorted(self.source_dir.rglob('*')):
+            if not source.is_file() or source.name.startswith('.'):
+                continue
+            
+            relative = source.relative_to(self.source_dir).as_posix()
+            content = source.read_bytes()
+            hashed = self.fingerprint(relative, content)
+            target = self.build_dir / hashed
+            target.parent.mkdir(parents=True, exist_ok=True)
+            
+            variants = [('identity', target, lambda: content)]
+            if source.suffix in COMPRESSIBLE_EXTENSIONS:
+                variants.append(('gzip', target.with_name(target.name + '.gz'),
+                                 lambda: gzip.compress(content, compresslevel=9, mtime=0)))
+                if brotli is not None:
+                    variants.append(('br', target.with_name(target.name + '.br'),
+                                     lambda: brotli.compress(content, quality=11)))
+            
+            encodings = []
+            for encoding, path, produce in variants:
+                # Hashed names are immutable: an existing file is already correct
+                if not path.exists():
+                    data = produce()
+                    if encoding != 'identity' and len(data) >= len(content):
+                        continue
+                    _write_atomic(path, data)
+                if encoding != 'identity':
+                    encodings.append(encoding)
+            
+            manifest[relative] = hashed
+            files[hashed] = encodings
+        
+        _write_atomic(self.build_dir / 'manifest.json', json.dumps(manifest, indent=2).encode('utf-8'))
+        self.urls = manifest
+        self.files = files
+        logger.info("Built %d fingerprinted assets in %s", len(manifest), self.build_dir)
+        return manifest
+    
+    def url(self, path: str) -> str:
+        """
+        URL for a static asset; the fingerprinted one once built.
+        
+        Used in templates as ``{{ asset_url('css/style.css') }}``.
+        """
+        path = path.lstrip('/')
+        return f"/static/{self.urls.get(path, path)}"
+
+
+class AssetStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves fingerprinted names from the build directory.
+    
+    Fingerprinted files get ``Cache-Control: immutable`` and the best
+    precompressed variant the client accepts (brotli, then gzip). Anything
+    else falls back to the source directory with ``Cache-Control: no-cache``.
+    """
+    
+    def __init__(self, *, directory: str, manifest: AssetManifest, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.manifest = manifest
+    
+    async def get_response(self, path: str, scope) -> FileResponse:
+        hashed = path.replace(os.sep, '/')
+        encodings = self.manifest.files.get(hashed)
+        
+        if encodings is not None and self.manifest.build_dir is not None:
+            full_path = self.manifest.build_dir / hashed
+            media_type = mimetypes.guess_type(hashed)[0] or 'application/octet-stream'
+            headers = {'Cache-Control': IMMUTABLE_CACHE_CONTROL}
+            if encodings:
+                headers['Vary'] = 'Accept-Encoding'
+            
+            accepted = accepted_encodings(Headers(scope=scope).get('accept-encoding', ''))
+            for encoding, suffix in ENCODING_SUFFIXES:
+                if encoding in encodings and encoding in accepted:
+                    headers['Content-Encoding'] = encoding
+                    return FileResponse(f'{full_path}{suffix}', media_type=media_type, headers=headers)
+            
+            return FileResponse(full_path, media_type=media_type, headers=headers)
+        
+        response = await super().get_response(path, scope)
+        response.headers.setdefault('cache-control', REVALIDATE_CACHE_CONTROL)
+        return response
+
+
+# Shared manifest for templates (asset_url) and the /static mount
+assets = AssetManifest('app/static')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='app/static_build', help='Build directory')
+    args = parser.parse_args()
+    
+    manifest = assets.build(args.output)
+    for source, hashed in manifest.items():
+        print(f"{source} -> {hashed} {' '.join(assets.files[hashed])}")
+    if brotli is None:
+        print("brotli not installed; only gzip variants were written")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
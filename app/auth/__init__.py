@@ -1,4 +1,12 @@
-from app.auth.oidc import oauth, generate_nonce, generate_state, validate_token, extract_user_info
+from app.auth.oidc import (
+    oauth,
+    metadata_cache,
+    group_resolver,
+    generate_nonce,
+    generate_state,
+    validate_token,
+    extract_user_info
+)
 from app.auth.dependencies import (
     get_current_user,
     get_current_user_optional,
@@ -9,6 +17,8 @@ from app.auth.dependencies import (
 
 __all__ = [
     'oauth',
+    'metadata_cache',
+    'group_resolver',
     'generate_nonce',
     'generate_state',
     'validate_token',
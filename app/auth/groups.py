@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import yaml
+
+logger = logging.getLogger(__name__)
+
+
+class GroupMembershipClient(ABC):
+    """Look up a user's group Object IDs when the token omits them (pluggable)."""
+    
+    @abstractmethod
+    async def get_member_groups(self, user: dict, access_token: Optional[str]) -> list[str]:
+        """
+        Fetch group Object IDs for a user.
+        
+        Args:
+            user: User info from extract_user_info (sub, email, ...)
+            access_token: Access token from the login, if any
+        
+        Returns:
+            List of group Object IDs
+        """
+
+
+class GraphMembershipClient(GroupMembershipClient):
+    """Resolve membership via Microsoft Graph ``/me/getMemberObjects``."""
+    
+    def __init__(self, api_url: str = "https://graph.microsoft.com/v1.0", timeout: float = 10.0):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+    
+    async def get_member_groups(self, user: dict, access_token: Optional[str]) -> list[str]:
+        """Fetch transitive group membership for the signed-in user."""
+        if not access_token:
+            raise ValueError("Access token required for Graph membership lookup")
+        
+        async with httpx.AsyncClient(timeout=self.timeout) as http:
+            resp = await http.post(
+                f'{self.api_url}/me/getMemberObjects',
+                headers={'Authorization': f'Bearer {access_token}'},
+                json={'securityEnabledOnly': False}
+            )
+            resp.raise_for_status()
+            return list(resp.json().get('value', []))
+
+
+class StaticMembershipClient(GroupMembershipClient):
+    """
+    Local stand-in that reads membership from a YAML file.
+    
+    The file is a list of users with ``groups`` and ``sub`` and/or ``email``
+    (the same format as the stub IdP's STUB_IDP_USERS file).
+    """
+    
+    def __init__(self, path: Optional[str]):
+        # An empty setting means no file (Path('') would be the working directory)
+        self.path = Path(path) if path else None
+        self._groups_by_key = self._load()
+    
+    def _load(self) -> dict:
+        """Index groups by sub and by email."""
+        if self.path is None:
+            logger.warning("No group membership file configured; overage users get no groups")
+            return {}
+        if not self.path.is_file():
+            logger.warning("Group membership file %s not found; overage users get no groups", self.path)
+            return {}
+        
+        with open(self.path, 'r') as f:
+            users = yaml.safe_load(f) or []
+        
+        groups_by_key = {}
+        for entry in users:
+            groups = list(entry.get('groups') or [])
+            for key in (entry.get('sub'), entry.get('email')):
+                if key:
+                    groups_by_key[key] = groups
+        return groups_by_key
+    
+    async def get_member_groups(self, user: dict, access_token: Optional[str]) -> list[str]:
+        """Return configured groups for the user, matched by sub then email."""
+        for key in (user.get('sub'), user.get('email')):
+            if key and key in self._groups_by_key:
+                return self._groups_by_key[key]
+        return []
+
+
+def create_membership_client(kind: str, membership_file: str = '', api_url: str = '') -> GroupMembershipClient:
+    """
+    Build the membership client named by GROUP_MEMBERSHIP_CLIENT.
+    
+    Args:
+        kind: 'graph' (Microsoft Graph) or 'static' (YAML file)
+        membership_file: GROUP_MEMBERSHIP_FILE for the static client
+        api_url: GRAPH_API_URL for the Graph client
+    """
+    if kind == 'graph':
+        return GraphMembershipClient(api_url) if api_url else GraphMembershipClient()
+    if kind == 'static':
+        return StaticMembershipClient(membership_file)
+    raise ValueError(f"Unknown group membership client: {kind!r} (expected 'graph' or 'static')")
+
+
+class GroupMembershipResolver:
+    """
+    Resolve Entra group overage with a per-``sub`` TTL cache.
+    
+    Fresh entries are served from memory. Stale entries are still served
+    immediately while a background task refreshes them, so only a user's
+    first login (per worker) waits on the membership lookup.
+    """
+    
+    def __init__(self, client: GroupMembershipClient, ttl: int = 900, max_entries: int = 10000):
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache: OrderedDict[str, tuple[list[str], float]] = OrderedDict()
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+    
+    def _store(self, sub: str, groups: list[str]) -> None:
+        """Cache groups for a user, evicting the least recently used entry."""
+        self._cache[sub] = (groups, time.monotonic())
+        self._cache.move_to_end(sub)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+    
+    async def _fetch(self, user: dict, access_token: Optional[str]) -> list[str]:
+        """Look up groups and cache the result."""
+        groups = await self.client.get_member_groups(user, access_token)
+        self._store(user['sub'], groups)
+        logger.info("Resolved %d groups for %s via membership lookup", len(groups), user['sub'])
+        return groups
+    
+    async def _refresh(self, user: dict, access_token: Optional[str]) -> None:
+        """Background refresh of a stale entry; failures keep the stale copy."""
+        try:
+            await self._fetch(user, access_token)
+        except Exception as e:
+            logger.warning("Group membership refresh failed for %s: %s", user['sub'], e)
+        finally:
+            self._refreshing.discard(user['sub'])
+    
+    async def resolve(self, user: dict, access_token: Optional[str]) -> list[str]:
+        """
+        Return group Object IDs for a user whose token hit group overage.
+        
+        Args:
+            user: User info from extract_user_info
+            access_token: Access token from the login
+        
+        Returns:
+            List of group Object IDs; empty if the lookup fails with nothing cached
+        """
+        sub = user.get('sub')
+        if not sub:
+            return []
+        
+        cached = self._cache.get(sub)
+        if cached:
+            groups, fetched_at = cached
+            self._cache.move_to_end(sub)
+            
+            if time.monotonic() - fetched_at >= self.ttl and sub not in self._refreshing:
+                self._refreshing.add(sub)
+                task = asyncio.create_task(self._refresh(dict(user), access_token))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            
+            return groups
+        
+        try:
+            return await self._fetch(user, access_token)
+        except Exception as e:
+            logger.warning("Group membership lookup failed for %s: %s", sub, e)
+            return []
+    
+    def invalidate(self, sub: str) -> None:
+        """Drop a cached entry."""
+        self._cache.pop(sub, None)
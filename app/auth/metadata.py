@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class OIDCMetadataCache:
+    """
+    Prefetch and persist OIDC discovery metadata and JWKS for an authlib client.
+    
+    authlib fetches ``.well-known/openid-configuration`` and the JWKS lazily on
+    the first login in each worker. This cache loads both at startup, writes
+    them to disk so restarts begin from the last-known-good copy, and refreshes
+    them in the background once they are older than the TTL. A failed refresh
+    keeps serving the previous copy.
+    """
+    
+    # Seconds to wait before retrying after a failed refresh
+    RETRY_INTERVAL = 60
+    
+    # Timeout for each metadata/JWKS request
+    FETCH_TIMEOUT = 10.0
+    
+    def __init__(self, client, metadata_url: str, cache_path: str, ttl: int = 3600):
+        self.client = client
+        self.metadata_url = metadata_url
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+        self.fetched_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def _apply(self, metadata: dict, jwks: dict, fetched_at: float) -> None:
+        """Install metadata and keys on the authlib client."""
+        # '_loaded_at' stops authlib from fetching the metadata itself
+        self.client.server_metadata.update(metadata)
+        self.client.server_metadata['jwks'] = jwks
+        self.client.server_metadata['_loaded_at'] = fetched_at
+        self.fetched_at = fetched_at
+    
+    def load_persisted(self) -> bool:
+        """
+        Load the last-known-good copy from disk.
+        
+        Returns:
+            True if a usable copy was loaded
+        """
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        if data.get('metadata_url') != self.metadata_url:
+            return False
+        
+        try:
+            self._apply(data['metadata'], data['jwks'], data['fetched_at'])
+        except (KeyError, TypeError):
+            return False
+        
+        return True
+    
+    def _persist(self, metadata: dict, jwks: dict, fetched_at: float) -> None:
+        """Atomically write the cache file (workers may race on it)."""
+        data = {
+            'metadata_url': self.metadata_url,
+            'metadata': metadata,
+            'jwks': jwks,
+            'fetched_at': fetched_at,
+        }
+        
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, prefix='.oidc-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning("Could not persist OIDC metadata to %s: %s", self.cache_path, e)
+    
+    async def refresh(self) -> bool:
+        """
+        Fetch fresh metadata and JWKS from the provider.
+        
+        Returns:
+            True on success; on failure the current copy is left in place
+        """
+        try:
+            async with httpx.AsyncClient(timeout=self.FETCH_TIMEOUT) as http:
+                resp = await http.get(self.metadata_url)
+                resp.raise_for_status()
+                metadata = resp.json()
+                
+                jwks_uri = metadata.get('jwks_uri')
+                if not jwks_uri:
+                    raise ValueError('Missing "jwks_uri" in metadata')
+                
+                resp = await http.get(jwks_uri)
+                resp.raise_for_status()
+                jwks = resp.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("OIDC metadata refresh failed, keeping last-known-good copy: %s", e)
+            return False
+        
+        metadata.pop('_loaded_at', None)
+        metadata.pop('jwks', None)
+        fetched_at = time.time()
+        self._apply(metadata, jwks, fetched_at)
+        self._persist(metadata, jwks, fetched_at)
+        logger.info("Refreshed OIDC metadata and JWKS from %s", self.metadata_url)
+        return True
+    
+    def is_stale(self) -> bool:
+        """Check whether the current copy is missing or older than the TTL."""
+        return self.fetched_at is None or time.time() - self.fetched_at >= self.ttl
+    
+    async def warm(self) -> None:
+        """Load the persisted copy, then fetch from the provider if it is stale."""
+        if self.load_persisted():
+            logger.info("Loaded OIDC metadata from %s", self.cache_path)
+        
+        if self.is_stale():
+            await self.refresh()
+    
+    async def _refresh_loop(self) -> None:
+        """Refresh in the background whenever the copy reaches its TTL."""
+        while True:
+            if self.fetched_at is None:
+                delay = 0
+            else:
+                delay = max(0, self.fetched_at + self.ttl - time.time())
+            await asyncio.sleep(delay)
+            
+            if not await self.refresh():
+                await asyncio.sleep(self.RETRY_INTERVAL)
+    
+    async def start(self) -> None:
+        """Warm the cache and start background refresh."""
+        await self.warm()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        """Stop background refresh."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
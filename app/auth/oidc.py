@@ -2,6 +2,8 @@ from authlib.integrations.starlette_client import OAuth
 from authlib.integrations.base_client import OAuthError
 from starlette.config import Config
 from app.config import get_settings
+from app.auth.metadata import OIDCMetadataCache
+from app.auth.groups import GroupMembershipResolver, create_membership_client
 import secrets
 
 settings = get_settings()
@@ -15,18 +17,40 @@ config = Config(environ={
 
 oauth = OAuth(config)
 
+# Entra discovery document, or a stub provider for offline testing
+server_metadata_url = settings.oidc_metadata_url or (
+    f'https://login.microsoftonline.com/{settings.entra_tenant_id}/v2.0/.well-known/openid-configuration'
+)
+
 # Register Microsoft Entra ID provider
 oauth.register(
     name='microsoft',
     client_id=settings.entra_client_id,
     client_secret=settings.entra_client_secret,
-    server_metadata_url=f'https://login.microsoftonline.com/{settings.entra_tenant_id}/v2.0/.well-known/openid-configuration',
+    server_metadata_url=server_metadata_url,
     client_kwargs={
         'scope': 'openid email profile User.Read',
         'token_endpoint_auth_method': 'client_secret_post',
     }
 )
 
+# Prefetched metadata and JWKS, warmed at startup (see app.main)
+metadata_cache = OIDCMetadataCache(
+    oauth.microsoft,
+    metadata_url=server_metadata_url,
+    cache_path=settings.oidc_metadata_cache_path,
+    ttl=settings.oidc_metadata_ttl
+)
+
+# Group membership lookup for tokens that hit Entra group overage
+membership_client = create_membership_client(
+    settings.group_membership_client,
+    membership_file=settings.group_membership_file,
+    api_url=settings.graph_api_url
+)
+
+group_resolver = GroupMembershipResolver(membership_client, ttl=settings.group_cache_ttl)
+
 
 def generate_nonce() -> str:
     """Generate a secure random nonce for OIDC flow."""
@@ -66,6 +90,20 @@ async def validate_token(token: dict) -> dict:
     return token
 
 
+def has_group_overage(token: dict) -> bool:
+    """
+    Check whether Entra omitted the groups claim because the user is in too many groups.
+    
+    Args:
+        token: Validated token dictionary
+        
+    Returns:
+        True if group membership must be looked up separately
+    """
+    claim_names = token.get('_claim_names') or {}
+    return 'groups' in claim_names or token.get('hasgroups') is True
+
+
 def extract_user_info(token: dict) -> dict:
     """
     Extract user information from OIDC token.
@@ -80,5 +118,6 @@ def extract_user_info(token: dict) -> dict:
         'email': token.get('email') or token.get('preferred_username', ''),
         'name': token.get('name', ''),
         'sub': token.get('sub', ''),
-        'groups': token.get('groups', [])  # Entra ID group Object IDs
+        'groups': token.get('groups', []),  # Entra ID group Object IDs
+        'group_overage': has_group_overage(token)
     }
@@ -0,0 +1,337 @@
+import asyncio
+import hashlib
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import engine, SessionLocal
+from app.events import ChangeBroadcaster, create_broadcaster, install_session_hooks
+from app.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# PostgreSQL channel for invalidation messages
+CHANNEL = 'cache_invalidation'
+
+# Expired entries are purged from the SQL backends every this many writes
+PURGE_EVERY = 200
+
+
+def make_key(*parts, **params) -> str:
+    """Short, stable cache key for normalized request parameters."""
+    raw = json.dumps([parts, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+class MemoryCache:
+    """
+    Per-worker LRU with per-entry expiry.
+    
+    The fastest backend, but each uvicorn worker holds its own copy.
+    """
+    
+    shared = False
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, tuple[float, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+            return value
+    
+    def set(self, namespace: str, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                return
+            for entry_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[entry_key]
+
+
+class SharedCache:
+    """
+    Cache shared by all workers on one host.
+    
+    Entries live in a SQLite database on tmpfs (/dev/shm by default), so
+    every worker reads the same entries from shared memory and SQLite's
+    file locking keeps concurrent writers consistent. Nothing is durable;
+    losing the file only empties the cache.
+    """
+    
+    shared = True
+    
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_namespace ON cache_entries (namespace)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (f"{namespace}:{key}", time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache read failed: %s", e)
+            return None
+        return row[0] if row else None
+    
+    def set(self, namespace: str, key: str, value: bytes, ttl: int) -> None:
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, namespace, value, expires_at) VALUES (?, ?, ?, ?)",
+                (f"{namespace}:{key}", namespace, value, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._purge(conn)
+        except sqlite3.Error as e:
+            logger.warning("Shared cache write failed: %s", e)
+    
+    def _purge(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries, then the soonest-expiring ones over the limit."""
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        conn.execute("""
+            DELETE FROM cache_entries WHERE key IN (
+                SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+    
+    def clear(self, namespace: Optional[str] = None) -> None:
+        try:
+            if namespace is None:
+                self._connect().execute("DELETE FROM cache_entries")
+            else:
+                self._connect().execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+        except sqlite3.Error as e:
+            logger.warning("Shared cache clear failed: %s", e)
+
+
+class PostgresCache:
+    """
+    Cache shared by every worker on every node, in an UNLOGGED table.
+    
+    UNLOGGED skips the WAL, so writes are cheap and entries aren't
+    replicated; the table is emptied after a crash, which a cache can
+    afford. Created by migration 005_cache_entries.
+    """
+    
+    shared = True
+    
+    def __init__(self, cache_engine):
+        self.engine = cache_engine
+        self._writes = 0
+    
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            with self.engine.connect() as conn:
+                value = conn.execute(text("""
+                    SELECT value FROM cache_entries WHERE key = :key AND expires_at > now()
+                """), {'key': f"{namespace}:{key}"}).scalar()
+        except SQLAlchemyError as e:
+            logger.warning("PostgreSQL cache read failed: %s", e)
+            return None
+        return bytes(value) if value is not None else None
+    
+    def set(self, namespace: str, key: str, value: bytes, ttl: int) -> None:
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO cache_entries (key, namespace, value, expires_at)
+                    VALUES (:key, :namespace, :value, now() + make_interval(secs => :ttl))
+                    ON CONFLICT (key) DO UPDATE
+                    SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+                """), {'key': f"{namespace}:{key}", 'namespace': namespace, 'value': value, 'ttl': ttl})
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    conn.execute(text("DELETE FROM cache_entries WHERE expires_at <= now()"))
+        except SQLAlchemyError as e:
+            logger.warning("PostgreSQL cache write failed: %s", e)
+    
+    def clear(self, namespace: Optional[str] = None) -> None:
+        try:
+            with self.engine.begin() as conn:
+                if namespace is None:
+                    conn.execute(text("DELETE FROM cache_entries"))
+                else:
+                    conn.execute(text("DELETE FROM cache_entries WHERE namespace = :namespace"),
+                                 {'namespace': namespace})
+        except SQLAlchemyError as e:
+            logger.warning("PostgreSQL cache clear failed: %s", e)
+
+
+class Cache:
+    """
+    Namespaced cache for query results, rendered output and PDFs.
+    
+    Values are pickled into the configured backend. Invalidation is
+    queued on the writer's session and broadcast when it commits
+    (LISTEN/NOTIFY on PostgreSQL), so every worker on every node drops the
+    namespace, and none drops it for a write that rolled back.
+    """
+    
+    def __init__(self, backend, broadcaster: ChangeBroadcaster, default_ttl: int):
+        self.backend = backend
+        self.broadcaster = broadcaster
+        self.default_ttl = default_ttl
+        broadcaster.add_listener(self._on_message)
+    
+    def get(self, namespace: str, key: str) -> Any:
+        """Cached value, or None on a miss."""
+        raw = self.backend.get(namespace, key)
+        CACHE_REQUESTS.labels(namespace=namespace, result='hit' if raw is not None else 'miss').inc()
+        if raw is None:
+            return None
+        try:
+            return pickle.loads(raw)
+        except Exception:
+            logger.warning("Discarding unreadable cache entry %s:%s", namespace, key)
+            return None
+    
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store ``value`` (None is never cached)."""
+        if value is None:
+            return
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.backend.set(namespace, key, raw, ttl or self.default_ttl)
+    
+    def get_or_set(
+        self,
+        namespace: str,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        store: bool = True
+    ) -> Any:
+        """
+        Cached value, computing and storing it on a miss.
+        
+        Args:
+            namespace: Group of entries invalidated together
+            key: Entry key within the namespace (see make_key)
+            compute: Called on a miss
+            ttl: Seconds to keep the value (default CACHE_TTL)
+            store: Whether to store a computed value (False when it may be
+                stale, e.g. read from a lagging replica)
+        """
+        value = self.get(namespace, key)
+        if value is None:
+            value = compute()
+            if store:
+                self.set(namespace, key, value, ttl)
+        return value
+    
+    def invalidate(self, db: Session, *namespaces: str) -> None:
+        """Drop ``namespaces`` everywhere once ``db`` commits."""
+        self.broadcaster.queue(db, {'type': 'invalidate', 'namespaces': list(namespaces)})
+    
+    def _clear(self, namespaces: Optional[list]) -> None:
+        for namespace in namespaces or [None]:
+            self.backend.clear(namespace)
+    
+    def _on_message(self, message: dict) -> None:
+        """Apply a broadcast invalidation to this worker's backend."""
+        if message.get('type') == 'invalidate':
+            namespaces = message.get('namespaces') or []
+        elif message.get('type') == 'resync':
+            # Invalidations may have been missed while disconnected
+            namespaces = None
+        else:
+            return
+        
+        if not self.backend.shared:
+            self._clear(namespaces)
+            return
+        
+        # Shared backends do I/O; keep it off the event loop
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._clear(namespaces)
+            return
+        loop.run_in_executor(None, self._clear, namespaces)
+    
+    async def start(self) -> None:
+        """Start receiving invalidations (called from the app lifespan)."""
+        await self.broadcaster.start()
+    
+    async def stop(self) -> None:
+        await self.broadcaster.stop()
+
+
+def create_cache(backend: str = 'memory') -> Cache:
+    """
+    Build the cache for this deployment.
+    
+    Args:
+        backend: 'memory' (per worker), 'shared' (all workers on this host)
+            or 'postgres' (all nodes)
+    """
+    if backend == 'memory':
+        store = MemoryCache(settings.cache_max_entries)
+    elif backend == 'shared':
+        store = SharedCache(settings.cache_shared_path, settings.cache_max_entries)
+    elif backend == 'postgres':
+        store = PostgresCache(engine)
+    else:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    
+    broadcaster = create_broadcaster(engine, settings.change_events_backend, channel=CHANNEL)
+    install_session_hooks(SessionLocal, broadcaster)
+    return Cache(store, broadcaster, settings.cache_ttl)
+
+
+# Per-worker cache used by routers and services
+cache = create_cache(settings.cache_backend)
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Callable, Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.metrics import COALESCED_REQUESTS
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical requests in this worker.
+    
+    The first request for a key starts the (blocking) computation in the
+    threadpool; requests for the same key that arrive while it runs await
+    the same task and get the same result object. The task is shielded,
+    so a requester going away doesn't cancel it for the others. Nothing
+    is kept once it finishes; combine with the cache for reuse over time.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+    
+    @staticmethod
+    def _finished(task: asyncio.Task) -> None:
+        # Retrieve the exception so an abandoned failure isn't reported as unhandled
+        if not task.cancelled():
+            task.exception()
+    
+    async def do(self, endpoint: str, key: str, fn: Callable[..., Any], *args) -> Any:
+        """
+        Result of ``fn(*args)``, shared with concurrent callers of the same key.
+        
+        Args:
+            endpoint: Route name (metric label; also part of the key)
+            key: Normalized parameters and record version (see make_key)
+            fn: Blocking function to run in the threadpool
+        """
+        flight_key = f"{endpoint}:{key}"
+        task = self._inflight.get(flight_key)
+        if task is not None:
+            COALESCED_REQUESTS.labels(endpoint=endpoint).inc()
+            return await asyncio.shield(task)
+        
+        task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+        self._inflight[flight_key] = task
+        task.add_done_callback(self._finished)
+        task.add_done_callback(lambda t: self._inflight.pop(flight_key, None))
+        return await asyncio.shield(task)
+
+
+# Per-worker coalescer used by the export routes
+single_flight = SingleFlight()
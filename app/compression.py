@@ -0,0 +1,159 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.assets import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Content types worth compressing; everything else (PDF, images, archives)
+# is already compressed or not worth the CPU
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/csv',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'text/calendar',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+class _Encoder:
+    """Incremental compressor; every chunk is flushed so streams stay live."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it to the output."""
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """Trailer for the end of the stream."""
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware for negotiated brotli/gzip response compression.
+
+    Responses are compressed when the client accepts an encoding, the
+    content type is in COMPRESSIBLE_TYPES, the response isn't already
+    encoded, and the body reaches ``minimum_size``. Streaming responses
+    (e.g. the CSV export) are compressed chunk by chunk; at most
+    ``minimum_size`` bytes are held back while deciding.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, scope) -> Optional[str]:
+        """Preferred encoding the client accepts: brotli, then gzip."""
+        accepted = accepted_encodings(Headers(scope=scope).get('accept-encoding', ''))
+        if 'br' in accepted and brotli is not None:
+            return 'br'
+        if 'gzip' in accepted:
+            return 'gzip'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        pending = []
+        pending_size = 0
+        encoder = None
+        passthrough = False
+
+        async def start_compressed(body: bytes, more_body: bool):
+            nonlocal encoder
+            encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+            headers = MutableHeaders(scope=start_message)
+            del headers['content-length']
+            headers['content-encoding'] = encoding
+            headers.add_vary_header('Accept-Encoding')
+
+            data = encoder.compress(body)
+            if not more_body:
+                data += encoder.finish()
+            await send(start_message)
+            await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+
+        async def send_uncompressed(body: bytes, more_body: bool):
+            nonlocal passthrough
+            passthrough = True
+            await send(start_message)
+            await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+        async def send_wrapper(message):
+            nonlocal start_message, pending_size, passthrough
+
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message.get('headers', []))
+                content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+                # Range responses (attachment downloads) address the
+                # identity bytes, and may be sent with zerocopysend
+                if (
+                    'content-encoding' in headers
+                    or 'accept-ranges' in headers
+                    or content_type not in COMPRESSIBLE_TYPES
+                    or message['status'] in (204, 206, 304, 416)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+
+                # Hold the start until we know whether to compress
+                start_message = message
+                return
+
+            if message['type'] != 'http.response.body' or passthrough:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if encoder is not None:
+                data = encoder.compress(body) if body else b''
+                if not more_body:
+                    data += encoder.finish()
+                if data or not more_body:
+                    await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+                return
+
+            # Still deciding: buffer up to minimum_size
+            pending.append(body)
+            pending_size += len(body)
+            if pending_size >= self.minimum_size:
+                await start_compressed(b''.join(pending), more_body)
+            elif not more_body:
+                await send_uncompressed(b''.join(pending), False)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,8 +1,14 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
+import logging
+import threading
+import time
 import yaml
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     """Application settings from environment variables."""
@@ -10,6 +16,26 @@ class Settings(BaseSettings):
     # Database
     database_url: str
     
+    # Connection pool (per worker)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # seconds to wait for a connection
+    db_pool_recycle: int = 1800  # 30 minutes
+    db_pool_pre_ping: bool = True
+    db_pgbouncer: bool = False  # NullPool, no server-side prepared statements
+    database_listen_url: str = ""  # direct PostgreSQL URL for LISTEN (required with PgBouncer)
+    
+    # Read replica (optional): dashboard, change pages, exports and analytics
+    database_read_url: str = ""
+    db_replica_max_lag: float = 10.0  # seconds; lagging further falls back to the primary
+    db_replica_lag_check_interval: float = 5.0  # seconds between lag checks (per worker)
+    db_read_your_writes_seconds: int = 30  # reads stay on the primary this long after a write
+    
+    # SQL profiling (debug; adds Server-Timing headers and N+1 warnings)
+    sql_profiling: bool = False
+    sql_slow_query_ms: int = 100
+    sql_n_plus_one_threshold: int = 5
+    
     # Security
     secret_key: str
     
@@ -19,6 +45,17 @@ class Settings(BaseSettings):
     entra_tenant_id: str
     redirect_uri: str
     
+    # OIDC metadata/JWKS cache
+    oidc_metadata_url: str = ""  # Defaults to the Entra tenant discovery document
+    oidc_metadata_cache_path: str = "/tmp/changekeeper_oidc_metadata.json"
+    oidc_metadata_ttl: int = 3600  # 1 hour
+    
+    # Entra group overage resolution
+    group_membership_client: str = "graph"  # graph or static
+    group_membership_file: str = ""  # YAML membership file for the static client
+    graph_api_url: str = "https://graph.microsoft.com/v1.0"
+    group_cache_ttl: int = 900  # 15 minutes
+    
     # Email (optional)
     enable_email: bool = False
     smtp_host: str = ""
@@ -34,6 +71,59 @@ class Settings(BaseSettings):
     # Application
     app_name: str = "ChangeKeeper"
     
+    # /metrics access besides signed-in admins
+    metrics_token: str = ""  # Prometheus bearer_token
+    metrics_allowed_ips: str = ""  # comma-separated IPs/CIDRs, matched against the socket peer
+    
+    # Live dashboard events: auto (LISTEN/NOTIFY on PostgreSQL), postgres, or memory
+    change_events_backend: str = "auto"
+    sse_heartbeat_seconds: int = 25
+    
+    # iCalendar feeds of planned changes
+    calendar_feed_past_days: int = 90  # Planned starts older than this are left out
+    calendar_feed_cache_size: int = 256  # Feeds cached per worker
+    calendar_feed_refresh_minutes: int = 15  # Suggested client poll interval
+    calendar_feed_max_idle_days: int = 90  # Feeds stop when the owner hasn't signed in for this long (0 = never)
+    
+    # Analytics materialized views (PostgreSQL)
+    analytics_weeks: int = 26
+    analytics_refresh_interval: int = 300  # seconds
+    analytics_refresh_after_writes: int = 25  # refresh early after this many writes (0 disables)
+    
+    # Shared cache: memory (per worker), shared (workers on one host), postgres (all nodes)
+    cache_backend: str = "memory"
+    cache_ttl: int = 60  # seconds; dashboard counts may read a lagging replica
+    cache_pdf_ttl: int = 3600  # PDFs are keyed by record version
+    cache_max_entries: int = 512
+    cache_shared_path: str = "/dev/shm/changekeeper_cache.db"
+    
+    # Per-user rate limits on expensive routes
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "shared"  # memory (per worker), shared (workers on one host), postgres (all nodes)
+    rate_limit_capacity: int = 60  # token bucket size (burst)
+    rate_limit_refill_per_second: float = 0.5
+    rate_limit_max_in_flight: int = 3  # concurrent metered requests per user
+    rate_limit_lease_seconds: int = 300  # in-flight leases of crashed workers expire
+    rate_limit_costs: dict = {}  # JSON overrides, e.g. {"csv_export": 30}
+    
+    # Change attachments: content stored once per SHA-256 under attachment_dir
+    attachment_dir: str = "data/attachments"
+    attachment_max_bytes: int = 26214400  # 25 MB
+    attachment_chunk_size: int = 65536  # bytes per disk write / download read
+    
+    # Response compression (brotli preferred when installed, else gzip)
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # bytes
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    
+    # Templates: compiled bytecode cache (empty to disable) and dev auto-reload
+    template_cache_dir: str = "/tmp/changekeeper_jinja_cache"
+    template_auto_reload: bool = False
+    
+    # Fingerprinted, precompressed static assets (python -m app.assets)
+    static_build_dir: str = "app/static_build"
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -46,11 +136,34 @@ def get_settings() -> Settings:
 
 
 class RoleConfig:
-    """Load and manage role configuration from roles.yaml."""
+    """Load and manage role configuration from roles.yaml.
+    
+    Group IDs are indexed into one frozenset per role so each login is a set
+    intersection rather than a list scan. The file is reloaded when its mtime
+    changes; the new index is built off to the side and swapped in with a
+    single assignment, so logins never wait on a reload.
+    """
+    
+    # Roles checked in priority order (highest first)
+    ROLE_PRIORITY = ('admin', 'auditor')
+    
+    # Minimum seconds between mtime checks
+    RELOAD_CHECK_INTERVAL = 2.0
     
     def __init__(self, config_path: str = "roles.yaml"):
         self.config_path = Path(config_path)
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._mtime = self._get_mtime()
         self.roles_data = self._load_config()
+        self._index = self._build_index(self.roles_data)
+    
+    def _get_mtime(self) -> Optional[float]:
+        """Return the config file mtime, or None if it does not exist."""
+        try:
+            return self.config_path.stat().st_mtime
+        except OSError:
+            return None
     
     def _load_config(self) -> dict:
         """Load roles configuration from YAML file."""
@@ -58,7 +171,77 @@ class RoleConfig:
             return {"roles": {}, "default_role": "user"}
         
         with open(self.config_path, 'r') as f:
-            return yaml.safe_load(f) or {"roles": {}, "default_role": "user"}
+            roles_data = yaml.safe_load(f) or {"roles": {}, "default_role": "user"}
+        self._validate(roles_data)
+        return roles_data
+    
+    def _validate(self, roles_data) -> None:
+        """
+        Check the file has the shape _build_index expects.
+        
+        Raises:
+            ValueError: Describing the first problem found
+        """
+        if not isinstance(roles_data, dict):
+            raise ValueError("expected a mapping with 'roles' and 'default_role'")
+        roles = roles_data.get("roles") or {}
+        if not isinstance(roles, dict):
+            raise ValueError("'roles' must map role names to settings")
+        for role, role_data in roles.items():
+            if role_data is None:
+                continue
+            if not isinstance(role_data, dict):
+                raise ValueError(f"roles.{role} must be a mapping with 'groups'")
+            if not isinstance(role_data.get("groups") or [], list):
+                raise ValueError(f"roles.{role}.groups must be a list of group Object IDs")
+        if not isinstance(roles_data.get("default_role", "user"), str):
+            raise ValueError("'default_role' must be a role name")
+    
+    def _build_index(self, roles_data: dict) -> tuple:
+        """
+        Precompute group ID indexes from roles data.
+        
+        Returns:
+            Tuple of ((role, frozenset of group IDs), ...) in priority order
+            and the default role
+        """
+        roles = roles_data.get("roles") or {}
+        role_groups = tuple(
+            (role, frozenset(str(gid) for gid in ((roles.get(role) or {}).get("groups") or [])))
+            for role in self.ROLE_PRIORITY
+        )
+        return role_groups, roles_data.get("default_role", "user")
+    
+    def _maybe_reload(self) -> None:
+        """Reload the config if the file changed, without blocking callers."""
+        now = time.monotonic()
+        if now - self._last_check < self.RELOAD_CHECK_INTERVAL:
+            return
+        
+        # Another thread is already reloading; keep serving the current index
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        
+        try:
+            self._last_check = now
+            mtime = self._get_mtime()
+            if mtime == self._mtime:
+                return
+            
+            try:
+                roles_data = self._load_config()
+                index = self._build_index(roles_data)
+            except (OSError, yaml.YAMLError, ValueError) as e:
+                # Remember the bad version so it isn't re-parsed (and re-logged)
+                # on every check; the next edit is picked up as usual
+                self._mtime = mtime
+                logger.error("Failed to reload %s, keeping previous roles: %s", self.config_path, e)
+                return
+            
+            self.roles_data, self._index, self._mtime = roles_data, index, mtime
+            logger.info("Reloaded role configuration from %s", self.config_path)
+        finally:
+            self._reload_lock.release()
     
     def get_user_role(self, group_ids: list[str]) -> str:
         """
@@ -70,24 +253,23 @@ class RoleConfig:
         Returns:
             Role name (admin, auditor, or user)
         """
-        if not group_ids:
-            return self.roles_data.get("default_role", "user")
+        self._maybe_reload()
+        role_groups, default_role = self._index
         
-        # Check admin groups first (highest priority)
-        admin_groups = self.roles_data.get("roles", {}).get("admin", {}).get("groups", [])
-        if any(gid in admin_groups for gid in group_ids):
-            return "admin"
+        if not group_ids:
+            return default_role
         
-        # Check auditor groups
-        auditor_groups = self.roles_data.get("roles", {}).get("auditor", {}).get("groups", [])
-        if any(gid in auditor_groups for gid in group_ids):
-            return "auditor"
+        for role, groups in role_groups:
+            matched = groups.intersection(group_ids)
+            if matched:
+                logger.debug("Resolved role %s via groups %s", role, sorted(matched))
+                return role
         
         # Default to user role
-        return self.roles_data.get("default_role", "user")
+        return default_role
 
 
 @lru_cache()
 def get_role_config() -> RoleConfig:
-    """Get cached role configuration instance."""
+    """Get cached role configuration instance (reloads itself on file change)."""
     return RoleConfig()
@@ -1,21 +1,294 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, NullPool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from fastapi import Request, Response
+from typing import Optional
 from app.config import get_settings
+from app import metrics
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
-)
+
+class PoolStats:
+    """Connection pool gauges and counters, updated from pool event hooks."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.pool = None
+    
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Record time spent waiting for a connection from the pool."""
+        metrics.DB_POOL_WAIT.observe(seconds)
+        if timed_out:
+            metrics.DB_POOL_TIMEOUTS.inc()
+        
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+    
+    def increment(self, counter: str) -> None:
+        """Increment a named counter."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def snapshot(self) -> dict:
+        """Return current pool gauges and counters."""
+        pool = self.pool
+        gauges = {}
+        if isinstance(pool, QueuePool):
+            gauges = {
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+            }
+        
+        with self._lock:
+            return {
+                'pool_class': type(pool).__name__ if pool else None,
+                **gauges,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait_count': self.wait_count,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = PoolStats()
+replica_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times checkout waits (SQLAlchemy has no event for these)."""
+    
+    stats = pool_stats
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    """InstrumentedQueuePool for the read replica, with its own stats."""
+    
+    stats = replica_pool_stats
+
+
+def _pgbouncer_connect_args(url: str) -> dict:
+    """
+    Driver options that disable server-side prepared statements.
+    
+    PgBouncer in transaction mode hands each transaction a different server
+    connection, so statements prepared on one are missing on the next.
+    psycopg2 never prepares server-side and needs no options.
+    """
+    driver = make_url(url).get_driver_name()
+    if driver == 'psycopg':
+        return {'prepare_threshold': None}
+    if driver == 'asyncpg':
+        return {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+    return {}
+
+
+def build_engine(url: str, replica: bool = False):
+    """Create an engine with pool settings from Settings and pool event hooks."""
+    poolclass = ReplicaQueuePool if replica else InstrumentedQueuePool
+    stats = poolclass.stats
+    if settings.db_pgbouncer:
+        # PgBouncer does the pooling; don't hold connections in each worker
+        new_engine = create_engine(
+            url,
+            poolclass=NullPool,
+            connect_args=_pgbouncer_connect_args(url)
+        )
+    else:
+        new_engine = create_engine(
+            url,
+            poolclass=poolclass,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle
+        )
+    
+    stats.pool = new_engine.pool
+    
+    @event.listens_for(new_engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        stats.increment('connects')
+    
+    @event.listens_for(new_engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.increment('checkouts')
+        metrics.DB_POOL_CHECKED_OUT.inc()
+    
+    @event.listens_for(new_engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        stats.increment('checkins')
+        metrics.DB_POOL_CHECKED_OUT.dec()
+    
+    @event.listens_for(new_engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.increment('invalidations')
+    
+    @event.listens_for(new_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+    
+    @event.listens_for(new_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics.DB_QUERY_LATENCY.observe(time.perf_counter() - conn.info['query_start'].pop())
+    
+    @event.listens_for(new_engine, 'handle_error')
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        if context.connection is not None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+    
+    return new_engine
+
+
+class ReplicaMonitor:
+    """
+    Cached replication lag of the read replica.
+    
+    Lag is measured at most every ``check_interval`` seconds by whichever
+    request gets there first; the others keep using the last value, so a
+    slow or unreachable replica holds up one request, not all of them.
+    """
+    
+    # Replay lag in seconds; 0 when the replica has replayed everything it
+    # received (the last replay timestamp goes stale when the primary is idle)
+    LAG_QUERY = text("""
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """)
+    
+    def __init__(self, replica_engine, max_lag: float, check_interval: float):
+        self.engine = replica_engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._lag: Optional[float] = None
+    
+    def measure(self) -> Optional[float]:
+        """Query the replica's lag in seconds (None if it can't be reached)."""
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name != 'postgresql':
+                    conn.execute(text("SELECT 1"))
+                    return 0.0
+                return float(conn.execute(self.LAG_QUERY).scalar())
+        except SQLAlchemyError as e:
+            logger.warning("Read replica lag check failed: %s", e)
+            return None
+    
+    def lag(self) -> Optional[float]:
+        """Last measured lag, re-measured when older than check_interval."""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._lag = self.measure()
+                self._last_check = time.monotonic()
+                metrics.DB_REPLICA_LAG.set(-1 if self._lag is None else self._lag)
+            finally:
+                self._lock.release()
+        return self._lag
+    
+    def healthy(self) -> bool:
+        """Whether reads can go to the replica."""
+        lag = self.lag()
+        return lag is not None and lag <= self.max_lag
+    
+    def snapshot(self) -> dict:
+        """Lag and health for /health/db-pool."""
+        return {
+            'lag_seconds': self._lag,
+            'max_lag_seconds': self.max_lag,
+            'healthy': self._lag is not None and self._lag <= self.max_lag,
+        }
+
+
+engine = build_engine(settings.database_url)
+
+# Optional read replica (DATABASE_READ_URL) for read-only pages and exports
+read_engine = build_engine(settings.database_read_url, replica=True) if settings.database_read_url else None
+
+replica_monitor = ReplicaMonitor(
+    read_engine,
+    max_lag=settings.db_replica_max_lag,
+    check_interval=settings.db_replica_lag_check_interval
+) if read_engine is not None else None
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Set after a write so the same browser reads from the primary for a while
+READ_PRIMARY_COOKIE = f"{settings.session_cookie_name}_rw"
+
+
+class ReplicaSession(Session):
+    """
+    Session that reads from the replica and writes to the primary.
+    
+    Flushes and INSERT/UPDATE/DELETE statements (e.g. export audit entries)
+    go to the primary. Once the session has written, every later statement
+    goes there too, so refreshing or re-reading what it just wrote doesn't
+    hit a replica that hasn't replayed it yet.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wrote = False
+    
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self._wrote = True
+        return engine if self._wrote else read_engine
+    
+    def close(self) -> None:
+        super().close()
+        self._wrote = False
+
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=ReplicaSession)
+
 
 def get_db():
     """Dependency to get database session."""
@@ -24,3 +297,59 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def use_replica(request: Request) -> bool:
+    """
+    Whether a read-only request can be served from the replica.
+    
+    Not when no replica is configured, when this browser wrote recently
+    (read-your-writes), or when the replica is unreachable or lagging.
+    """
+    if replica_monitor is None:
+        return False
+    
+    try:
+        sticky_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        sticky_until = 0
+    if sticky_until > time.time():
+        metrics.DB_READS_ROUTED.labels(target='primary', reason='recent_write').inc()
+        return False
+    
+    if not replica_monitor.healthy():
+        metrics.DB_READS_ROUTED.labels(target='primary', reason='replica_lag').inc()
+        return False
+    
+    metrics.DB_READS_ROUTED.labels(target='replica', reason='').inc()
+    return True
+
+
+def get_read_db(request: Request):
+    """Dependency for read-only routes: a replica session when possible."""
+    db = ReadSessionLocal() if use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def mark_primary_reads(response: Response) -> None:
+    """
+    Send this browser's reads to the primary for DB_READ_YOUR_WRITES_SECONDS.
+    
+    Call after a write so the next page shows it even if the replica
+    hasn't caught up.
+    """
+    if read_engine is None:
+        return
+    
+    window = settings.db_read_your_writes_seconds
+    response.set_cookie(
+        READ_PRIMARY_COOKIE,
+        str(int(time.time() + window)),
+        max_age=window,
+        httponly=True,
+        secure=True,
+        samesite='lax'
+    )
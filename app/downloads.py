@@ -0,0 +1,143 @@
+import os
+import re
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException
+from starlette.responses import Response
+
+from app.config import get_settings
+
+settings = get_settings()
+
+_RANGE = re.compile(r'^\s*(\d*)\s*-\s*(\d*)\s*$')
+
+# ASGI extension for handing the server a file to send with sendfile(2)
+ZEROCOPY_EXTENSION = 'http.response.zerocopysend'
+
+
+def parse_range(
+    range_header: Optional[str],
+    size: int,
+    if_range: Optional[str] = None,
+    etag: Optional[str] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Byte range requested by a Range header.
+    
+    Only single ranges are served; multiple ranges, other units,
+    malformed headers and an If-Range that doesn't match ``etag`` all get
+    the whole file, as RFC 9110 allows.
+    
+    Args:
+        range_header: Range request header
+        size: File size in bytes
+        if_range: If-Range request header
+        etag: Current strong ETag of the file
+    
+    Returns:
+        Inclusive (first, last) byte positions, or None for the whole file
+    
+    Raises:
+        HTTPException: 416 when the range starts past the end of the file
+    """
+    if not range_header or (if_range is not None and if_range.strip() != etag):
+        return None
+    
+    unit, _, ranges = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+    match = _RANGE.match(ranges)
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    
+    first, last = match.group(1), match.group(2)
+    if last != '' and first != '' and int(last) < int(first):
+        return None
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        first, last = max(size - length, 0), size - 1
+        satisfiable = length > 0 and size > 0
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last != '' else size - 1
+        satisfiable = first < size
+    
+    if not satisfiable:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={'Content-Range': f'bytes */{size}'}
+        )
+    return first, last
+
+
+class RangeFileResponse(Response):
+    """
+    File response for a byte range (or the whole file).
+    
+    When the server offers the ``http.response.zerocopysend`` extension the
+    open file is handed over for sendfile(2), so the bytes never pass
+    through Python; otherwise the range is read in chunks from the
+    offset. The file is opened before the headers go out, so a missing
+    blob fails the request instead of truncating it.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        byte_range: Optional[Tuple[int, int]] = None,
+        media_type: str = 'application/octet-stream',
+        headers: Optional[Mapping[str, str]] = None,
+        chunk_size: Optional[int] = None
+    ):
+        self.path = path
+        self.chunk_size = chunk_size or settings.attachment_chunk_size
+        self.media_type = media_type
+        self.background = None
+        self.body = b''
+        
+        if byte_range is None:
+            self.status_code = 200
+            self.offset, self.count = 0, size
+        else:
+            self.status_code = 206
+            self.offset, self.count = byte_range[0], byte_range[1] - byte_range[0] + 1
+        self.init_headers(headers)
+        self.headers['accept-ranges'] = 'bytes'
+        self.headers['content-length'] = str(self.count)
+        if byte_range is not None:
+            self.headers['content-range'] = f'bytes {byte_range[0]}-{byte_range[1]}/{size}'
+    
+    async def __call__(self, scope, receive, send) -> None:
+        file = await anyio.to_thread.run_sync(open, self.path, 'rb')
+        try:
+            await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+            if scope['method'].upper() == 'HEAD' or self.count == 0:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            elif ZEROCOPY_EXTENSION in (scope.get('extensions') or {}):
+                await send({
+                    'type': ZEROCOPY_EXTENSION,
+                    'file': file,
+                    'offset': self.offset,
+                    'count': self.count,
+                    'more_body': False,
+                })
+            else:
+                await self._send_chunks(file, send)
+        finally:
+            await anyio.to_thread.run_sync(file.close)
+    
+    async def _send_chunks(self, file, send) -> None:
+        remaining = self.count
+        await anyio.to_thread.run_sync(file.seek, self.offset, os.SEEK_SET)
+        while remaining > 0:
+            chunk = await anyio.to_thread.run_sync(file.read, min(self.chunk_size, remaining))
+            if not chunk:
+                break  # file shrank; blobs are immutable, so this shouldn't happen
+            remaining -= len(chunk)
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+        if remaining > 0:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
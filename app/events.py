@@ -0,0 +1,359 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import engine, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# PostgreSQL channel for change events
+CHANNEL = 'change_events'
+
+# Events buffered per connected client before it is told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Largest NOTIFY payload sent (PostgreSQL rejects more than 8000 bytes)
+NOTIFY_MAX_BYTES = 7900
+
+
+def change_event(kind: str, change) -> dict:
+    """
+    Compact event for a created or updated change.
+    
+    Carries only the fields the dashboard filters on, never free-text
+    descriptions. ``systems_affected`` is unbounded, so notify_payload
+    trims it to fit the NOTIFY limit.
+    
+    Args:
+        kind: 'created' or 'updated'
+        change: Change instance or row with the same attributes
+    """
+    def value(attr):
+        v = getattr(change, attr)
+        return getattr(v, 'value', v)
+    
+    created_at = change.created_at
+    return {
+        'type': kind,
+        'id': change.id,
+        'title': change.title[:200],
+        'category': value('category'),
+        'impact_level': value('impact_level'),
+        'status': value('status'),
+        'implementer': change.implementer,
+        'systems_affected': change.systems_affected,
+        'ticket_id': change.ticket_id,
+        'created_at': created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+    }
+
+
+def notify_payload(change: dict) -> str:
+    """
+    JSON for a change event, at most NOTIFY_MAX_BYTES long.
+    
+    A systems list too long for the limit is cut short and the event is
+    flagged ``systems_truncated``, so system filters still deliver it.
+    """
+    payload = json.dumps(change)  # ASCII-only, so characters are bytes
+    if len(payload) <= NOTIFY_MAX_BYTES:
+        return payload
+    
+    change = dict(change, systems_truncated=True)
+    systems = change.get('systems_affected') or ''
+    while True:
+        payload = json.dumps(change)
+        excess = len(payload) - NOTIFY_MAX_BYTES
+        if excess <= 0 or not systems:
+            return payload
+        # Shrink in proportion to the escaped size (non-ASCII escapes to 6 bytes)
+        escaped = len(json.dumps(systems))
+        keep = len(systems) * max(escaped - excess, 0) // escaped
+        systems = systems[:min(keep, len(systems) - 1)]
+        change['systems_affected'] = systems
+
+
+class Subscription:
+    """One connected dashboard: its filters and a bounded event queue."""
+    
+    def __init__(self, filters: dict):
+        self.filters = {key: value for key, value in filters.items() if value}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+    
+    def matches(self, change: dict) -> bool:
+        """Apply the dashboard filters in memory (same semantics as the query)."""
+        f = self.filters
+        for field in ('category', 'impact_level', 'status'):
+            if field in f and change.get(field) != f[field]:
+                return False
+        
+        # A truncated systems list may have lost the filtered system; deliver it
+        systems = change.get('systems_affected') or ''
+        if 'system' in f and f['system'] not in systems and not change.get('systems_truncated'):
+            return False
+        
+        if 'implementer' in f and f['implementer'].lower() not in (change.get('implementer') or '').lower():
+            return False
+        
+        if 'search' in f:
+            # Descriptions are not in the event; match title and ticket ID
+            term = f['search'].lower()
+            haystack = f"{change.get('title') or ''} {change.get('ticket_id') or ''}".lower()
+            if term not in haystack:
+                return False
+        
+        # ISO strings compare like the query's datetimes
+        created = change.get('created_at') or ''
+        if 'start_date' in f and created < f['start_date']:
+            return False
+        if 'end_date' in f and created > f['end_date']:
+            return False
+        
+        return True
+    
+    def offer(self, change: dict) -> None:
+        """Queue an event without blocking; a slow client is told to resync."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'type': 'resync'})
+
+
+class ChangeBroadcaster:
+    """
+    Fan change events out to this worker's connected dashboards.
+    
+    Events are queued on the database session and delivered only once the
+    transaction commits. This base class delivers them in-process (tests,
+    SQLite, single worker); PostgresChangeBroadcaster sends them through
+    NOTIFY so every worker sees them.
+    """
+    
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        self.subscribers: set[Subscription] = set()
+        self.listeners: list[Callable[[dict], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def subscribe(self, filters: dict) -> Subscription:
+        """Register a connected client."""
+        subscription = Subscription(filters)
+        self.subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a disconnected client."""
+        self.subscribers.discard(subscription)
+    
+    def add_listener(self, callback: Callable[[dict], None]) -> None:
+        """Call ``callback`` (on the event loop) for every event."""
+        self.listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[dict], None]) -> None:
+        """Stop calling ``callback``."""
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def dispatch(self, change: dict) -> None:
+        """Deliver an event to every matching subscriber of this worker."""
+        for callback in list(self.listeners):
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("Change event listener failed")
+        
+        for subscription in list(self.subscribers):
+            if subscription.matches(change):
+                subscription.offer(change)
+    
+    def queue(self, db: Session, change: dict) -> None:
+        """Send ``change`` when the session's transaction commits."""
+        db.info.setdefault(self.channel, []).append(change)
+    
+    def publish(self, db: Session, changes: list[dict]) -> None:
+        """Called after commit with the session's queued events."""
+        for change in changes:
+            if self._loop is not None and self._loop.is_running():
+                self._loop.call_soon_threadsafe(self.dispatch, change)
+            else:
+                self.dispatch(change)
+    
+    async def start(self) -> None:
+        """Begin delivering events (called from the app lifespan)."""
+        self._loop = asyncio.get_running_loop()
+    
+    async def stop(self) -> None:
+        """Stop delivering events."""
+        self._loop = None
+
+
+class PostgresChangeBroadcaster(ChangeBroadcaster):
+    """
+    Deliver change events to all workers via PostgreSQL LISTEN/NOTIFY.
+    
+    Writers send ``pg_notify`` inside their transaction, so PostgreSQL
+    delivers the event only on commit. Each worker holds a single LISTEN
+    connection, watched by the event loop (no thread, no polling) and
+    reconnected with backoff if it drops.
+    """
+    
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = CHANNEL,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        super().__init__(channel)
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._connection = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+    
+    def queue(self, db: Session, change: dict) -> None:
+        """NOTIFY within the caller's transaction (delivered on commit)."""
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {
+            'channel': self.channel,
+            'payload': notify_payload(change),
+        })
+    
+    def publish(self, db: Session, changes: list[dict]) -> None:
+        """Nothing to do; PostgreSQL delivers on commit."""
+    
+    def _listen(self) -> None:
+        """Open the LISTEN connection and watch its socket."""
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+        
+        connection = psycopg2.connect(self.dsn)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.channel}')
+        self._connection = connection
+        self._loop.add_reader(connection.fileno(), self._on_readable)
+        logger.info("Listening for events on %s", self.channel)
+    
+    def _close(self) -> None:
+        """Stop watching and close the LISTEN connection."""
+        if self._connection is None:
+            return
+        try:
+            self._loop.remove_reader(self._connection.fileno())
+        except (ValueError, OSError):
+            pass
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+    
+    def _on_readable(self) -> None:
+        """Drain notifications from the LISTEN connection."""
+        try:
+            self._connection.poll()
+        except Exception as e:
+            logger.warning("Change event listener lost its connection: %s", e)
+            self._close()
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+            return
+        
+        while self._connection.notifies:
+            notification = self._connection.notifies.pop(0)
+            try:
+                self.dispatch(json.loads(notification.payload))
+            except ValueError:
+                logger.warning("Ignoring malformed change event: %r", notification.payload[:200])
+    
+    async def _reconnect(self) -> None:
+        """Re-open the LISTEN connection with exponential backoff."""
+        delay = self.reconnect_delay
+        while self._loop is not None:
+            await asyncio.sleep(delay)
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning("Change event listener reconnect failed: %s", e)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+            
+            # Events may have been missed while disconnected
+            self.dispatch({'type': 'resync'})
+            return
+    
+    async def start(self) -> None:
+        await super().start()
+        try:
+            self._listen()
+        except Exception as e:
+            logger.warning("Change event listener unavailable, retrying: %s", e)
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+    
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._close()
+        await super().stop()
+
+
+def create_broadcaster(engine, backend: str = 'auto', channel: str = CHANNEL) -> ChangeBroadcaster:
+    """
+    Pick the broadcaster for this deployment.
+    
+    Args:
+        engine: Application engine
+        backend: 'postgres', 'memory', or 'auto' (postgres on PostgreSQL)
+        channel: NOTIFY channel (and session.info key for queued events)
+    
+    Raises:
+        ValueError: PostgreSQL events through PgBouncer without DATABASE_LISTEN_URL
+    """
+    use_postgres = backend == 'postgres' or (backend == 'auto' and engine.dialect.name == 'postgresql')
+    if use_postgres:
+        if settings.database_listen_url:
+            url = make_url(settings.database_listen_url)
+        elif settings.db_pgbouncer:
+            # Transaction-pooled PgBouncer accepts LISTEN but never delivers
+            raise ValueError(
+                "DB_PGBOUNCER=true needs DATABASE_LISTEN_URL (a direct PostgreSQL URL) "
+                "for change events and cache invalidation"
+            )
+        else:
+            url = engine.url
+        dsn = url.set(drivername='postgresql').render_as_string(hide_password=False)
+        return PostgresChangeBroadcaster(dsn, channel)
+    return ChangeBroadcaster(channel)
+
+
+def install_session_hooks(session_factory, broadcaster: ChangeBroadcaster) -> None:
+    """Deliver queued events on commit and drop them on rollback."""
+    
+    @event.listens_for(session_factory, 'after_commit')
+    def after_commit(session):
+        changes = session.info.pop(broadcaster.channel, None)
+        if changes:
+            broadcaster.publish(session, changes)
+    
+    @event.listens_for(session_factory, 'after_rollback')
+    def after_rollback(session):
+        session.info.pop(broadcaster.channel, None)
+
+
+# Per-worker broadcaster used by routers and the app lifespan
+change_events = create_broadcaster(engine, settings.change_events_backend)
+install_session_hooks(SessionLocal, change_events)
@@ -1,24 +1,53 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from starlette.middleware.sessions import SessionMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from app.config import get_settings
-from app.auth import get_current_user_optional
-from app.routers import auth, changes, reports
-from app.database import engine, Base
+from app.auth import get_current_user_optional, require_admin, metadata_cache
+from app.routers import analytics, attachments, auth, calendar, changes, reports
+from app.database import engine, read_engine, Base, pool_stats, replica_pool_stats, replica_monitor
+from app.metrics import (
+    MetricsMiddleware, SocketPeerMiddleware, require_metrics_access, render_metrics, CONTENT_TYPE_LATEST
+)
+from app.profiling import SQLProfilingMiddleware, install_sql_profiling
+from app.assets import AssetStaticFiles, assets
+from app.compression import CompressionMiddleware
+from app.templating import templates, precompile_templates
+from app.events import change_events
+from app.cache import cache
+from app.services.analytics import analytics_refresher
 
 settings = get_settings()
 
 # Create database tables (for development; use Alembic in production)
 # Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm per-worker caches on startup and stop background tasks on shutdown."""
+    # Prefetch OIDC metadata and JWKS so the first logins skip the round trips
+    await metadata_cache.start()
+    # Fan out change events to this worker's live dashboards
+    await change_events.start()
+    # Receive cache invalidations from other workers
+    await cache.start()
+    # Keep the analytics materialized views fresh (PostgreSQL only)
+    await analytics_refresher.start()
+    yield
+    await analytics_refresher.stop()
+    await cache.stop()
+    await change_events.stop()
+    await metadata_cache.stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="IT Change Management System",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Add proxy headers middleware for Cloudflare Tunnel / reverse proxy support
@@ -27,6 +56,9 @@ app.add_middleware(
     trusted_hosts=["*"]
 )
 
+# Outside the proxy headers middleware, so it sees the real socket peer
+app.add_middleware(SocketPeerMiddleware)
+
 # Add session middleware
 app.add_middleware(
     SessionMiddleware,
@@ -37,16 +69,41 @@ app.add_middleware(
     https_only=True    # Set to True for production with HTTPS
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Per-request SQL profiling (debug only; nothing is registered when off)
+if settings.sql_profiling:
+    for profiled_engine in (engine, read_engine):
+        if profiled_engine is not None:  # read_engine is unset without DATABASE_READ_URL
+            install_sql_profiling(profiled_engine, slow_query_ms=settings.sql_slow_query_ms)
+    app.add_middleware(SQLProfilingMiddleware, n_plus_one_threshold=settings.sql_n_plus_one_threshold)
+
+# Negotiated brotli/gzip compression for HTML, CSV and JSON (streams chunk by chunk)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality
+    )
+
+# Add request latency metrics (outermost, so it times the full request)
+app.add_middleware(MetricsMiddleware)
+
+# Fingerprint and precompress static assets (a no-op if the build step already ran)
+assets.build(settings.static_build_dir)
 
-# Setup templates
-templates = Jinja2Templates(directory="app/templates")
+# Mount static files; fingerprinted names are served immutable and precompressed
+app.mount("/static", AssetStaticFiles(directory="app/static", manifest=assets), name="static")
+
+# Compile (or load cached bytecode for) all templates before serving
+template_stats = precompile_templates()
 
 # Include routers
 app.include_router(auth.router)
 app.include_router(changes.router)
 app.include_router(reports.router)
+app.include_router(calendar.router)
+app.include_router(analytics.router)
+app.include_router(attachments.router)
 
 
 @app.get("/login", response_class=HTMLResponse)
@@ -69,6 +126,21 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db-pool")
+async def db_pool_stats(user: dict = Depends(require_admin)):
+    """Connection pool gauges for this worker (admin only)."""
+    stats = pool_stats.snapshot()
+    if replica_monitor is not None:
+        stats['replica'] = {**replica_pool_stats.snapshot(), **replica_monitor.snapshot()}
+    return stats
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+async def metrics():
+    """Prometheus metrics, aggregated across workers (token, allowed address or admin)."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Global exception handler for better UX
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
@@ -84,7 +156,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     if request.headers.get('accept') == 'application/json':
         return JSONResponse(
             status_code=exc.status_code,
-            content={"detail": exc.detail}
+            content={"detail": exc.detail},
+            headers=exc.headers  # e.g. Retry-After on 429
         )
     
     # For regular requests, return error page
@@ -95,5 +168,6 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "status_code": exc.status_code,
             "detail": exc.detail
         },
-        status_code=exc.status_code
+        status_code=exc.status_code,
+        headers=exc.headers
     )
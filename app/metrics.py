@@ -0,0 +1,245 @@
+import hmac
+import ipaddress
+import os
+import time
+from functools import lru_cache
+
+from fastapi import Request, HTTPException, status
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    CONTENT_TYPE_LATEST,
+)
+
+from app.config import get_settings
+
+# Latency buckets (seconds) shared by the request and service histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# HTTP
+REQUEST_LATENCY = Histogram(
+    'changekeeper_http_request_duration_seconds',
+    'HTTP request latency by route template',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+# Database
+DB_QUERY_LATENCY = Histogram(
+    'changekeeper_db_query_duration_seconds',
+    'SQL statement execution time',
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_WAIT = Histogram(
+    'changekeeper_db_pool_wait_seconds',
+    'Time spent waiting for a pooled connection',
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_TIMEOUTS = Counter(
+    'changekeeper_db_pool_timeouts_total',
+    'Connection checkouts that timed out'
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'changekeeper_db_pool_checked_out',
+    'Connections currently checked out',
+    multiprocess_mode='livesum'
+)
+DB_REPLICA_LAG = Gauge(
+    'changekeeper_db_replica_lag_seconds',
+    'Last measured read replica lag (-1 when unreachable)',
+    multiprocess_mode='max'
+)
+DB_READS_ROUTED = Counter(
+    'changekeeper_db_reads_routed_total',
+    'Read-only requests by database they were sent to',
+    ['target', 'reason']
+)
+
+# Cache
+CACHE_REQUESTS = Counter(
+    'changekeeper_cache_requests_total',
+    'Cache lookups by namespace and result',
+    ['namespace', 'result']
+)
+COALESCED_REQUESTS = Counter(
+    'changekeeper_coalesced_requests_total',
+    'Requests served by joining an identical in-flight computation',
+    ['endpoint']
+)
+
+# Rate limiting
+RATE_LIMITED = Counter(
+    'changekeeper_rate_limited_total',
+    'Requests rejected with 429 by route and reason (tokens or in_flight)',
+    ['route', 'reason']
+)
+
+# Services
+SECRET_DETECTION_HITS = Counter(
+    'changekeeper_secret_detection_hits_total',
+    'Potential secrets found by SecretDetector',
+    ['pattern']
+)
+PDF_RENDERS = Counter(
+    'changekeeper_pdf_renders_total',
+    'Change record PDFs rendered'
+)
+PDF_RENDER_LATENCY = Histogram(
+    'changekeeper_pdf_render_duration_seconds',
+    'PDF render time',
+    buckets=LATENCY_BUCKETS
+)
+CSV_ROWS_EXPORTED = Counter(
+    'changekeeper_csv_rows_exported_total',
+    'Change records written to CSV exports'
+)
+CSV_EXPORT_LATENCY = Histogram(
+    'changekeeper_csv_export_duration_seconds',
+    'CSV export build time',
+    buckets=LATENCY_BUCKETS
+)
+EMAIL_SENDS = Counter(
+    'changekeeper_email_sends_total',
+    'Change summary emails by result',
+    ['result']
+)
+ANALYTICS_REFRESH_LATENCY = Histogram(
+    'changekeeper_analytics_refresh_duration_seconds',
+    'Analytics materialized view refresh time',
+    buckets=LATENCY_BUCKETS
+)
+AUDIT_WRITES = Counter(
+    'changekeeper_audit_writes_total',
+    'Audit log entries written',
+    ['action']
+)
+
+
+def get_registry() -> CollectorRegistry:
+    """
+    Registry to expose on /metrics.
+    
+    With PROMETHEUS_MULTIPROC_DIR set (required for --workers > 1), each
+    worker writes its samples to that directory and the scrape aggregates
+    all of them, whichever worker serves it.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> bytes:
+    """Render all metrics in the Prometheus text format."""
+    return generate_latest(get_registry())
+
+
+def _route_label(scope: dict) -> str:
+    """Route template for a request, keeping label cardinality bounded."""
+    route = scope.get('route')
+    if route is not None and getattr(route, 'path', None):
+        return route.path
+    
+    # Mounted apps (e.g. /static) set root_path to the mount prefix
+    if scope.get('root_path'):
+        return scope['root_path']
+    
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency by route template.
+    
+    Implemented as plain ASGI (not BaseHTTPMiddleware) so streaming responses
+    such as the CSV export pass through untouched; latency is measured until
+    the final body chunk is sent.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(
+                method=scope['method'],
+                route=_route_label(scope),
+                status=str(status_code)
+            ).observe(time.perf_counter() - start)
+
+
+class SocketPeerMiddleware:
+    """
+    Keep the socket peer address before ProxyHeadersMiddleware rewrites it.
+    
+    ``request.client`` comes from X-Forwarded-For once the proxy headers
+    middleware has run, so it can't be trusted for access control. Must
+    be added after (i.e. outside) ProxyHeadersMiddleware.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            scope['socket_client'] = scope.get('client')
+        await self.app(scope, receive, send)
+
+
+@lru_cache(maxsize=8)
+def _allowed_networks(value: str) -> tuple:
+    return tuple(ipaddress.ip_network(entry.strip(), strict=False) for entry in value.split(',') if entry.strip())
+
+
+def require_metrics_access(request: Request) -> None:
+    """
+    Allow /metrics with METRICS_TOKEN, from METRICS_ALLOWED_IPS, or for signed-in admins.
+    
+    The address check uses the socket peer, never forwarded headers.
+    """
+    settings = get_settings()
+    
+    if settings.metrics_token:
+        authorization = request.headers.get('authorization', '')
+        scheme, _, token = authorization.partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), settings.metrics_token):
+            return
+    
+    if settings.metrics_allowed_ips:
+        peer = request.scope.get('socket_client') or ('', 0)
+        try:
+            address = ipaddress.ip_address(peer[0])
+        except ValueError:
+            address = None
+        if address is not None and any(address in net for net in _allowed_networks(settings.metrics_allowed_ips)):
+            return
+    
+    user = request.session.get('user')
+    if user and user.get('role') == 'admin':
+        return
+    
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Metrics require a token, an allowed address or an admin session"
+    )
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Boolean
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Date, DateTime, Text, Enum, Boolean, ForeignKey, PrimaryKeyConstraint
+)
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -54,6 +56,8 @@ class Change(Base):
     systems_affected = Column(Text, nullable=False)  # JSON array stored as text
     planned_start = Column(DateTime(timezone=True), nullable=True)
     planned_end = Column(DateTime(timezone=True), nullable=True)
+    # On PostgreSQL, migration 002 adds generated planned_window (tstzrange) and
+    # systems (text[]) columns for conflict checks; they are not mapped here
     implementer = Column(String(255), nullable=False, index=True)
     
     # Step 2: Risk
@@ -108,3 +112,67 @@ class AuditLog(Base):
     
     def __repr__(self):
         return f"<AuditLog(id={self.id}, action='{self.action}', user='{self.user_email}')>"
+
+
+class ChangeDailyRollup(Base):
+    """Change counts per created day, category, status, impact level and system.
+    
+    Maintained incrementally by RollupService on create and status change.
+    Rows with system '' count every change once; rows with a system name
+    count the changes touching that system.
+    """
+    __tablename__ = "change_daily_rollup"
+    # System first: totals read the system='' rows for a day range
+    __table_args__ = (
+        PrimaryKeyConstraint('system', 'day', 'category', 'status', 'impact_level'),
+    )
+    
+    day = Column(Date, nullable=False)
+    category = Column(String(50), nullable=False)
+    status = Column(String(50), nullable=False)
+    impact_level = Column(String(50), nullable=False)
+    system = Column(String(255), nullable=False)
+    changes = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ChangeDailyRollup(day={self.day}, status='{self.status}', system='{self.system}', changes={self.changes})>"
+
+
+class Attachment(Base):
+    """Supporting file (config diff, screenshot, ...) attached to a change.
+    
+    The content is stored once per SHA-256 under ATTACHMENT_DIR, so
+    identical uploads share a blob; this row holds the per-upload metadata.
+    """
+    __tablename__ = "attachments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    change_id = Column(Integer, ForeignKey("changes.id", ondelete="CASCADE"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False, index=True)
+    uploaded_by = Column(String(255), nullable=False)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<Attachment(id={self.id}, change_id={self.change_id}, filename='{self.filename}')>"
+
+
+class CalendarFeedOwner(Base):
+    """Per-user state behind calendar feed tokens.
+    
+    Tokens carry ``token_version``; bumping it revokes every feed URL the
+    user has issued. ``role`` and ``signed_in_at`` are updated at each
+    sign-in, and feeds stop when the role no longer allows reading changes
+    or the owner hasn't signed in for CALENDAR_FEED_MAX_IDLE_DAYS.
+    """
+    __tablename__ = "calendar_feed_owners"
+    
+    user_email = Column(String(255), primary_key=True)
+    role = Column(String(50), nullable=False)
+    token_version = Column(Integer, nullable=False, default=1)
+    signed_in_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CalendarFeedOwner(user='{self.user_email}', role='{self.role}', version={self.token_version})>"
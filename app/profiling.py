@@ -0,0 +1,140 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfile:
+    """SQL statements executed while handling one request."""
+    
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.statements: Counter = Counter()
+    
+    def record(self, statement: str, seconds: float) -> None:
+        """Record one executed statement."""
+        self.query_count += 1
+        self.query_seconds += seconds
+        self.statements[statement] += 1
+    
+    def repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times (likely N+1)."""
+        return [(stmt, count) for stmt, count in self.statements.most_common() if count >= threshold]
+    
+    def server_timing(self, threshold: int) -> str:
+        """Build a Server-Timing header value."""
+        app_ms = (time.perf_counter() - self.start) * 1000
+        entries = [
+            f'db;dur={self.query_seconds * 1000:.1f};desc="{self.query_count} queries"',
+            f'app;dur={app_ms:.1f}',
+        ]
+        repeated = self.repeated_statements(threshold)
+        if repeated:
+            entries.append(f'n-plus-one;desc="{len(repeated)} repeated statements"')
+        return ', '.join(entries)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar('sql_profile', default=None)
+
+
+def _param_shape(parameters) -> object:
+    """Describe bound parameters by type (and length) without logging values."""
+    def shape(value):
+        if isinstance(value, (str, bytes)):
+            return f'{type(value).__name__}({len(value)})'
+        return type(value).__name__
+    
+    if isinstance(parameters, dict):
+        return {key: shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: describe the first row and the row count
+            return {'rows': len(parameters), 'first': _param_shape(parameters[0])}
+        return [shape(value) for value in parameters]
+    return shape(parameters)
+
+
+def install_sql_profiling(engine, slow_query_ms: int = 100) -> None:
+    """
+    Register cursor event hooks that time statements for the current request.
+    
+    Only called when profiling is enabled, so there is no overhead when off.
+    """
+    slow_seconds = slow_query_ms / 1000
+    
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profile_start', []).append(time.perf_counter())
+    
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['profile_start'].pop()
+        
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, elapsed)
+        
+        if elapsed >= slow_seconds:
+            logger.warning(
+                "Slow query (%.1f ms) in %s: %s params=%s",
+                elapsed * 1000,
+                f'{profile.method} {profile.path}' if profile else 'background',
+                ' '.join(statement.split()),
+                _param_shape(parameters)
+            )
+    
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get('profile_start'):
+            context.connection.info['profile_start'].pop()
+
+
+class SQLProfilingMiddleware:
+    """
+    ASGI middleware that profiles SQL per request.
+    
+    Adds a Server-Timing header with query count and time, and logs
+    statements repeated at least ``n_plus_one_threshold`` times.
+    """
+    
+    def __init__(self, app, n_plus_one_threshold: int = 5):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        profile = RequestProfile(scope['method'], scope['path'])
+        token = _current_profile.set(profile)
+        
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', profile.server_timing(self.n_plus_one_threshold).encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            
+            for statement, count in profile.repeated_statements(self.n_plus_one_threshold):
+                logger.warning(
+                    "Possible N+1 in %s %s: statement executed %d times: %s",
+                    profile.method,
+                    profile.path,
+                    count,
+                    ' '.join(statement.split())
+                )
@@ -0,0 +1,332 @@
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.auth import get_current_user
+from app.config import get_settings
+from app.database import engine
+from app.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Tokens each metered route costs (override with RATE_LIMIT_COSTS)
+DEFAULT_COSTS = {
+    'csv_export': 20,
+    'import': 20,
+    'pdf': 5,
+    'bulk_status': 5,
+    'analytics': 2,
+    'attachment': 5,
+}
+
+# Retry-After (seconds) for a client at its in-flight cap
+IN_FLIGHT_RETRY_AFTER = 1
+
+
+def refill(tokens: float, updated_at: float, now: float, capacity: int, rate: float) -> float:
+    """Tokens in a bucket after refilling at ``rate`` per second since ``updated_at``."""
+    return min(capacity, tokens + max(now - updated_at, 0) * rate)
+
+
+class MemoryRateLimitStore:
+    """
+    Buckets and in-flight leases in this worker only.
+    
+    For tests and single-worker deployments; with several workers each
+    enforces the limits separately.
+    """
+    
+    def __init__(self, capacity: int, rate: float, max_in_flight: int, lease_seconds: int):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._leases: dict[str, dict[str, float]] = {}
+    
+    def admit(self, key: str, cost: int) -> Tuple[Optional[str], float, Optional[str]]:
+        """
+        Take a lease and ``cost`` tokens for ``key``.
+        
+        Returns:
+            (lease ID, 0, None) when admitted, otherwise (None, seconds to
+            wait, 'tokens' or 'in_flight')
+        """
+        now = time.time()
+        with self._lock:
+            leases = self._leases.setdefault(key, {})
+            for lease_id in [l for l, started in leases.items() if started < now - self.lease_seconds]:
+                del leases[lease_id]
+            if len(leases) >= self.max_in_flight:
+                return None, IN_FLIGHT_RETRY_AFTER, 'in_flight'
+            
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = refill(tokens, updated_at, now, self.capacity, self.rate)
+            if tokens < cost:
+                self._buckets[key] = (tokens, now)
+                return None, (cost - tokens) / self.rate, 'tokens'
+            
+            self._buckets[key] = (tokens - cost, now)
+            lease_id = uuid.uuid4().hex
+            leases[lease_id] = now
+            return lease_id, 0.0, None
+    
+    def release(self, key: str, lease_id: str) -> None:
+        with self._lock:
+            self._leases.get(key, {}).pop(lease_id, None)
+
+
+class SharedRateLimitStore(MemoryRateLimitStore):
+    """
+    Buckets and leases shared by all workers on one host.
+    
+    Kept in the shared cache's SQLite file on tmpfs; BEGIN IMMEDIATE
+    serializes admissions across workers.
+    """
+    
+    def __init__(self, path: str, capacity: int, rate: float, max_in_flight: int, lease_seconds: int):
+        super().__init__(capacity, rate, max_in_flight, lease_seconds)
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_leases (
+                id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                started_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_leases_key ON rate_limit_leases (key)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+    
+    def admit(self, key: str, cost: int) -> Tuple[Optional[str], float, Optional[str]]:
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM rate_limit_leases WHERE key = ? AND started_at < ?",
+                (key, now - self.lease_seconds)
+            )
+            in_flight = conn.execute("SELECT count(*) FROM rate_limit_leases WHERE key = ?", (key,)).fetchone()[0]
+            if in_flight >= self.max_in_flight:
+                conn.execute("COMMIT")
+                return None, IN_FLIGHT_RETRY_AFTER, 'in_flight'
+            
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = refill(*row, now, self.capacity, self.rate) if row else self.capacity
+            admitted = tokens >= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, tokens - cost if admitted else tokens, now)
+            )
+            lease_id = None
+            if admitted:
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO rate_limit_leases (id, key, started_at) VALUES (?, ?, ?)",
+                    (lease_id, key, now)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if not admitted:
+            return None, (cost - tokens) / self.rate, 'tokens'
+        return lease_id, 0.0, None
+    
+    def release(self, key: str, lease_id: str) -> None:
+        self._connect().execute("DELETE FROM rate_limit_leases WHERE id = ?", (lease_id,))
+
+
+class PostgresRateLimitStore(MemoryRateLimitStore):
+    """
+    Buckets and leases shared by every node, in UNLOGGED tables.
+    
+    A transaction-scoped advisory lock per key serializes admissions for
+    one user without blocking anyone else. Created by migration
+    006_rate_limits.
+    """
+    
+    def __init__(self, store_engine, capacity: int, rate: float, max_in_flight: int, lease_seconds: int):
+        super().__init__(capacity, rate, max_in_flight, lease_seconds)
+        self.engine = store_engine
+    
+    def admit(self, key: str, cost: int) -> Tuple[Optional[str], float, Optional[str]]:
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {'key': key})
+            conn.execute(text("""
+                DELETE FROM rate_limit_leases WHERE key = :key AND started_at < :expired
+            """), {'key': key, 'expired': now - self.lease_seconds})
+            in_flight = conn.execute(text("SELECT count(*) FROM rate_limit_leases WHERE key = :key"),
+                                     {'key': key}).scalar()
+            if in_flight >= self.max_in_flight:
+                return None, IN_FLIGHT_RETRY_AFTER, 'in_flight'
+            
+            row = conn.execute(text("SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = :key"),
+                               {'key': key}).first()
+            tokens = refill(*row, now, self.capacity, self.rate) if row else self.capacity
+            admitted = tokens >= cost
+            conn.execute(text("""
+                INSERT INTO rate_limit_buckets (key, tokens, updated_at) VALUES (:key, :tokens, :now)
+                ON CONFLICT (key) DO UPDATE SET tokens = EXCLUDED.tokens, updated_at = EXCLUDED.updated_at
+            """), {'key': key, 'tokens': tokens - cost if admitted else tokens, 'now': now})
+            if not admitted:
+                return None, (cost - tokens) / self.rate, 'tokens'
+            
+            lease_id = uuid.uuid4().hex
+            conn.execute(text("""
+                INSERT INTO rate_limit_leases (id, key, started_at) VALUES (:id, :key, :now)
+            """), {'id': lease_id, 'key': key, 'now': now})
+            return lease_id, 0.0, None
+    
+    def release(self, key: str, lease_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(text("DELETE FROM rate_limit_leases WHERE id = :id"), {'id': lease_id})
+
+
+class RateLimiter:
+    """
+    Per-user token buckets with route cost weights and an in-flight cap.
+    
+    Each user's bucket holds up to RATE_LIMIT_CAPACITY tokens and refills
+    at RATE_LIMIT_REFILL_PER_SECOND; a metered request spends its route's
+    cost. Separately, a user may have at most RATE_LIMIT_MAX_IN_FLIGHT
+    metered requests running at once. Leases expire after
+    RATE_LIMIT_LEASE_SECONDS in case a worker dies mid-request.
+    """
+    
+    def __init__(self, store, costs: dict, enabled: bool = True):
+        self.store = store
+        self.costs = costs
+        self.enabled = enabled
+    
+    def admit(self, name: str, key: str) -> Optional[str]:
+        """
+        Admit a request to the ``name`` route for ``key``.
+        
+        Returns:
+            Lease ID to release when the request finishes (None when the
+            limiter is off or its store is unavailable)
+        
+        Raises:
+            HTTPException: 429 with Retry-After when throttled
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            lease_id, wait, reason = self.store.admit(key, self.costs.get(name, 1))
+        except (sqlite3.Error, SQLAlchemyError) as e:
+            # Fail open: an unavailable store shouldn't take the app down with it
+            logger.warning("Rate limit store unavailable, admitting request: %s", e)
+            return None
+        if lease_id is not None:
+            return lease_id
+        
+        RATE_LIMITED.labels(route=name, reason=reason).inc()
+        detail = (
+            "Too many requests in progress; wait for one to finish"
+            if reason == 'in_flight' else
+            "Rate limit exceeded; try again later"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={'Retry-After': str(max(1, math.ceil(wait)))}
+        )
+    
+    def release(self, key: str, lease_id: Optional[str]) -> None:
+        """Return an in-flight lease."""
+        if lease_id is None:
+            return
+        try:
+            self.store.release(key, lease_id)
+        except (sqlite3.Error, SQLAlchemyError) as e:
+            logger.warning("Could not release rate limit lease (it will expire): %s", e)
+
+
+def create_rate_limiter(backend: str = 'shared') -> RateLimiter:
+    """
+    Build the limiter.
+    
+    Args:
+        backend: 'memory' (per worker), 'shared' (all workers on this host)
+            or 'postgres' (all nodes)
+    """
+    policy = {
+        'capacity': settings.rate_limit_capacity,
+        'rate': settings.rate_limit_refill_per_second,
+        'max_in_flight': settings.rate_limit_max_in_flight,
+        'lease_seconds': settings.rate_limit_lease_seconds,
+    }
+    if backend == 'memory':
+        store = MemoryRateLimitStore(**policy)
+    elif backend == 'shared' and not os.path.isdir(os.path.dirname(settings.cache_shared_path) or '.'):
+        # e.g. no /dev/shm on a development machine
+        logger.warning(
+            "Rate limits are per worker: %s's directory does not exist", settings.cache_shared_path
+        )
+        store = MemoryRateLimitStore(**policy)
+    elif backend == 'shared':
+        store = SharedRateLimitStore(settings.cache_shared_path, **policy)
+    elif backend == 'postgres':
+        store = PostgresRateLimitStore(engine, **policy)
+    else:
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+    
+    return RateLimiter(store, {**DEFAULT_COSTS, **settings.rate_limit_costs}, settings.rate_limit_enabled)
+
+
+# Per-worker limiter; its state is shared according to RATE_LIMIT_BACKEND
+rate_limiter = create_rate_limiter(settings.rate_limit_backend)
+
+
+def rate_limit(name: str):
+    """
+    Dependency factory metering a route per signed-in user.
+    
+    Args:
+        name: Route name in the cost table (e.g. 'pdf', 'csv_export')
+    
+    Returns:
+        Dependency for the route's ``dependencies`` list
+    """
+    def dependency(user: dict = Depends(get_current_user)):
+        key = (user.get('email') or user.get('sub') or '').lower()
+        lease_id = rate_limiter.admit(name, key)
+        try:
+            yield
+        finally:
+            rate_limiter.release(key, lease_id)
+    
+    return dependency
@@ -1,3 +1,3 @@
-from app.routers import auth, changes, reports
+from app.routers import analytics, auth, calendar, changes, reports
 
-__all__ = ['auth', 'changes', 'reports']
+__all__ = ['analytics', 'auth', 'calendar', 'changes', 'reports']
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import HTMLResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_db, get_read_db
+from app.templating import templates
+from app.auth import get_current_user, require_admin
+from app.ratelimit import rate_limit
+from app.services import AnalyticsService
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("", response_class=HTMLResponse, dependencies=[Depends(rate_limit('analytics'))])
+async def analytics_page(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    user: dict = Depends(get_current_user),
+    weeks: Optional[int] = Query(None, ge=1, le=156)
+):
+    """Charts of change volume, outcomes by system and high-impact share."""
+    stats = AnalyticsService.summary(db, weeks)
+    return templates.TemplateResponse("analytics.html", {
+        "request": request,
+        "user": user,
+        "stats": stats
+    })
+
+
+@router.get("/data", dependencies=[Depends(rate_limit('analytics'))])
+async def analytics_data(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    user: dict = Depends(get_current_user),
+    weeks: Optional[int] = Query(None, ge=1, le=156)
+):
+    """Analytics as JSON (same figures as the page)."""
+    return AnalyticsService.summary(db, weeks)
+
+
+@router.post("/refresh")
+async def refresh_analytics(
+    db: Session = Depends(get_db),
+    user: dict = Depends(require_admin)
+):
+    """Refresh the materialized views now (admin only)."""
+    if not AnalyticsService.uses_views(db):
+        raise HTTPException(
+            status_code=400,
+            detail="Analytics are computed live on this database"
+        )
+    
+    elapsed = await run_in_threadpool(AnalyticsService.refresh, db)
+    if elapsed is None:
+        raise HTTPException(
+            status_code=409,
+            detail="A refresh is already running"
+        )
+    return {"success": True, "ms": round(elapsed * 1000, 1)}
@@ -0,0 +1,192 @@
+import logging
+from urllib.parse import quote
+
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.database import get_db, get_read_db, mark_primary_reads
+from app.downloads import RangeFileResponse, parse_range
+from app.models import Attachment, Change
+from app.auth import get_current_user, require_write_access
+from app.ratelimit import rate_limit
+from app.routers.changes import get_client_ip
+from app.services import AuditService, AttachmentService
+from app.services.attachments import AttachmentTooLarge
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/changes/{change_id}/attachments", tags=["attachments"])
+
+settings = get_settings()
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Attachments are limited to {settings.attachment_max_bytes // (1024 * 1024)} MB"
+    )
+
+
+@router.post("", dependencies=[Depends(rate_limit('attachment'))])
+async def upload_attachment(
+    request: Request,
+    response: Response,
+    change_id: int,
+    filename: str = Query(..., max_length=1024),
+    confirm_no_secrets: bool = Query(False),
+    db: Session = Depends(get_db),
+    user: dict = Depends(require_write_access)
+):
+    """
+    Attach a file to a change.
+    
+    The request body is the raw file (not multipart), streamed to disk in
+    chunks while it is hashed and, for text files, scanned for secrets.
+    Identical content is stored once.
+    """
+    if not db.query(Change.id).filter(Change.id == change_id).first():
+        raise HTTPException(status_code=404, detail="Change not found")
+    
+    declared_length = request.headers.get('content-length')
+    if declared_length and declared_length.isdigit() and int(declared_length) > settings.attachment_max_bytes:
+        raise _too_large()
+    
+    name = AttachmentService.clean_filename(filename)
+    content_type = AttachmentService.guess_content_type(name, request.headers.get('content-type'))
+    upload = await run_in_threadpool(AttachmentService.begin_upload, name, content_type)
+    try:
+        # Coalesce the server's small body chunks into fewer, larger writes
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= settings.attachment_chunk_size:
+                await run_in_threadpool(upload.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(upload.write, bytes(buffer))
+        findings = await run_in_threadpool(upload.finish)
+    except AttachmentTooLarge:
+        await run_in_threadpool(upload.abort)
+        raise _too_large()
+    except BaseException:
+        await run_in_threadpool(upload.abort)
+        raise
+    
+    if findings and not confirm_no_secrets:
+        await run_in_threadpool(upload.abort)
+        findings_text = ', '.join([f"{pattern}: {preview}" for pattern, preview in findings])
+        raise HTTPException(
+            status_code=400,
+            detail=f"Potential secrets detected: {findings_text}. Please confirm no secrets checkbox to proceed."
+        )
+    
+    try:
+        attachment = await run_in_threadpool(
+            AttachmentService.create, db, change_id, upload, name, content_type, user
+        )
+    except BaseException:
+        await run_in_threadpool(upload.abort)
+        raise
+    
+    result = AttachmentService.to_dict(attachment)
+    AuditService.log_action(
+        db=db,
+        action='attach',
+        user_email=user.get('email', ''),
+        user_name=user.get('name', ''),
+        change_id=change_id,
+        details={
+            'attachment_id': result['id'],
+            'filename': result['filename'],
+            'size': result['size'],
+            'sha256': result['sha256'],
+            'secrets_confirmed': bool(findings),
+        },
+        ip_address=get_client_ip(request)
+    )
+    
+    # Show the new attachment on the next page even if the replica is behind
+    mark_primary_reads(response)
+    
+    return {"success": True, "attachment": result}
+
+
+@router.get("")
+async def list_attachments(
+    change_id: int,
+    db: Session = Depends(get_read_db),
+    user: dict = Depends(get_current_user)
+):
+    """Attachments of a change (metadata only)."""
+    if not db.query(Change.id).filter(Change.id == change_id).first():
+        raise HTTPException(status_code=404, detail="Change not found")
+    
+    return [AttachmentService.to_dict(a) for a in AttachmentService.list_for_change(db, change_id)]
+
+
+@router.get("/{attachment_id}")
+async def download_attachment(
+    request: Request,
+    change_id: int,
+    attachment_id: int,
+    db: Session = Depends(get_read_db),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Download an attachment.
+    
+    Supports single byte ranges (resumed downloads, media seeking); the
+    strong ETag is the content's SHA-256, so If-Range and If-None-Match
+    work across identical files.
+    """
+    attachment = db.query(Attachment).filter(
+        Attachment.id == attachment_id,
+        Attachment.change_id == change_id
+    ).first()
+    if not attachment:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    
+    path = AttachmentService.blob_path(attachment.sha256)
+    if not path.is_file():
+        logger.error("Attachment %d content missing at %s", attachment.id, path)
+        raise HTTPException(status_code=404, detail="Attachment content not found")
+    
+    etag = f'"{attachment.sha256}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+        'Content-Disposition': f"attachment; filename*=UTF-8''{quote(attachment.filename)}",
+        'X-Content-Type-Options': 'nosniff',
+    }
+    if etag in [t.strip() for t in request.headers.get('if-none-match', '').split(',')]:
+        return Response(status_code=304, headers=headers)
+    
+    byte_range = parse_range(
+        request.headers.get('range'), attachment.size, request.headers.get('if-range'), etag
+    )
+    
+    details = {'attachment_id': attachment.id, 'filename': attachment.filename, 'sha256': attachment.sha256}
+    response = RangeFileResponse(
+        str(path),
+        attachment.size,
+        byte_range,
+        media_type=attachment.content_type,
+        headers=headers
+    )
+    
+    # One audit entry per download, not per resumed or seeking range request
+    if byte_range is None or byte_range[0] == 0:
+        AuditService.log_action(
+            db=db,
+            action='export_attachment',
+            user_email=user.get('email', ''),
+            user_name=user.get('name', ''),
+            change_id=change_id,
+            details=details,
+            ip_address=get_client_ip(request)
+        )
+    
+    return response
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import RedirectResponse
-from app.auth import oauth, generate_nonce, generate_state, extract_user_info
+from sqlalchemy.orm import Session
+from app.auth import oauth, group_resolver, generate_nonce, generate_state, extract_user_info
 from app.config import get_role_config
+from app.database import get_db
+from app.services import CalendarFeedService
 from authlib.integrations.base_client import OAuthError
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -29,7 +32,7 @@ async def login(request: Request):
 
 
 @router.get("/callback")
-async def auth_callback(request: Request):
+async def auth_callback(request: Request, db: Session = Depends(get_db)):
     """Handle OIDC callback."""
     try:
         # Verify state parameter
@@ -54,6 +57,9 @@ async def auth_callback(request: Request):
         
         # Determine user role based on group membership
         group_ids = user_info.get('groups', [])
+        if user_info.get('group_overage'):
+            # Too many groups for the token; look them up (cached per sub)
+            group_ids = await group_resolver.resolve(user_info, token.get('access_token'))
         role = role_config.get_user_role(group_ids)
         
         # Store user session
@@ -64,13 +70,16 @@ async def auth_callback(request: Request):
             'role': role
         }
         
+        # Calendar feeds follow the role from the latest sign-in
+        CalendarFeedService.record_sign_in(db, request.session['user'])
+        
         # Clean up OAuth temporary data
         request.session.pop('oauth_nonce', None)
         request.session.pop('oauth_state', None)
         
         # Redirect to dashboard
         return RedirectResponse(url='/', status_code=302)
-        
+    
     except OAuthError as e:
         raise HTTPException(status_code=400, detail=f"OAuth error: {str(e)}")
     except Exception as e:
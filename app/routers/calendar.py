@@ -0,0 +1,119 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_db
+from app.auth import get_current_user
+from app.routers.changes import get_client_ip
+from app.services import AuditService, CalendarFeedService
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+@router.get("/subscribe")
+async def calendar_subscribe(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+    mine: bool = False,
+    category: Optional[str] = None,
+    system: Optional[str] = None,
+    impact_level: Optional[str] = None,
+    implementer: Optional[str] = None,
+    status: Optional[str] = None
+):
+    """
+    Issue a feed URL for the user's changes or a filtered view.
+    
+    Args:
+        mine: Only changes the user created or implements
+        category, system, impact_level, implementer, status: Dashboard filters
+    """
+    filters = {
+        'category': category,
+        'system': system,
+        'impact_level': impact_level,
+        'implementer': implementer,
+        'status': status,
+    }
+    token = CalendarFeedService.create_token(db, user, mine=mine, filters=filters)
+    url = str(request.url_for('calendar_feed', token=token))
+    
+    AuditService.log_action(
+        db=db,
+        action='calendar_subscribe',
+        user_email=user.get('email', ''),
+        user_name=user.get('name'),
+        details={'mine': mine, 'filters': {key: value for key, value in filters.items() if value}},
+        ip_address=get_client_ip(request)
+    )
+    
+    return {
+        "url": url,
+        "webcal_url": 'webcal://' + url.split('://', 1)[1],
+    }
+
+
+@router.post("/feeds/reset")
+async def reset_calendar_feeds(
+    request: Request,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user)
+):
+    """Revoke every calendar feed URL the user has issued (e.g. after one leaked)."""
+    version = CalendarFeedService.reset_tokens(db, user)
+    
+    AuditService.log_action(
+        db=db,
+        action='calendar_reset',
+        user_email=user.get('email', ''),
+        user_name=user.get('name'),
+        details={'token_version': version},
+        ip_address=get_client_ip(request)
+    )
+    
+    return {"success": True}
+
+
+@router.get("/feeds/{token}.ics", name="calendar_feed")
+async def calendar_feed(
+    token: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    iCalendar feed of planned changes (authenticated by the signed token).
+    
+    Returns 304 when the client's ETag is current, and 404 for reset or
+    revoked feeds.
+    """
+    payload = await run_in_threadpool(CalendarFeedService.load_token, db, token)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    
+    base_url = str(request.base_url).rstrip('/')
+    body, etag = await run_in_threadpool(CalendarFeedService.render, db, token, payload, base_url)
+    
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache',
+    }
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(
+        content=body,
+        media_type='text/calendar',
+        headers={**headers, 'Content-Disposition': 'inline; filename="changes.ics"'}
+    )
@@ -1,20 +1,43 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, Form
-from fastapi.responses import HTMLResponse, StreamingResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Request, Depends, HTTPException, Form, File, Query, UploadFile
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
+import asyncio
+import io
 import json
 
-from app.database import get_db
+from starlette.concurrency import run_in_threadpool
+
+from app.cache import cache, make_key
+from app.coalesce import single_flight
+from app.config import get_settings
+from app.database import ReplicaSession, get_db, get_read_db, mark_primary_reads
+from app.events import change_event, change_events
+from app.services.analytics import analytics_refresher
+from app.templating import templates
 from app.models import Change
-from app.schemas import ChangeCreate, ChangeFilter
+from app.schemas import ChangeCreate, ChangeFilter, BulkStatusUpdate
 from app.auth import get_current_user, require_write_access, require_admin
-from app.services import AuditService, PDFGenerator, EmailService, SecretDetector
+from app.ratelimit import rate_limit
+from app import services
+from app.services import (
+    AuditService, EmailService, SecretDetector, ChangeImporter, ChangeStatusService, ConflictService,
+    RollupService, AttachmentService
+)
+from app.services.change_import import (
+    CATEGORY_MAP,
+    IMPACT_MAP,
+    USER_IMPACT_MAP,
+    STATUS_MAP,
+    normalize_choice,
+    validate_change_data,
+)
 
 router = APIRouter(tags=["changes"])
-templates = Jinja2Templates(directory="app/templates")
+
+settings = get_settings()
 
 
 def get_client_ip(request: Request) -> str:
@@ -28,7 +51,7 @@ def get_client_ip(request: Request) -> str:
 @router.get("/", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: dict = Depends(get_current_user),
     category: Optional[str] = None,
     system: Optional[str] = None,
@@ -87,9 +110,23 @@ async def dashboard(
     # Order by created_at descending
     query = query.order_by(Change.created_at.desc())
     
-    # Pagination
+    filters = {
+        "category": category,
+        "system": system,
+        "impact_level": impact_level,
+        "implementer": implementer,
+        "status": status,
+        "search": search,
+        "start_date": start_date,
+        "end_date": end_date
+    }
+    
+    # Pagination (the match count is the expensive part; cached per filter set).
+    # Replica results aren't stored: one that finishes just after a write's
+    # invalidation could hold pre-write figures for the whole TTL.
+    cacheable = not isinstance(db, ReplicaSession)
     page_size = 50
-    total = query.count()
+    total = cache.get_or_set('dashboard', make_key('count', **filters), query.count, store=cacheable)
     total_pages = (total + page_size - 1) // page_size
     offset = (page - 1) * page_size
     
@@ -107,19 +144,13 @@ async def dashboard(
         "request": request,
         "user": user,
         "changes": changes,
-        "filters": {
-            "category": category,
-            "system": system,
-            "impact_level": impact_level,
-            "implementer": implementer,
-            "status": status,
-            "search": search,
-            "start_date": start_date,
-            "end_date": end_date
-        },
+        "filters": filters,
         "page": page,
         "total_pages": total_pages,
         "total": total,
+        "summary": cache.get_or_set(
+            'dashboard', 'summary', lambda: RollupService.dashboard_summary(db), store=cacheable
+        ),
         "email_enabled": EmailService.is_enabled()
     })
 
@@ -134,13 +165,45 @@ async def new_change_wizard(
         "request": request,
         "user": user,
         "default_implementer": user.get('email', ''),
-        "email_enabled": EmailService.is_enabled()
+        "email_enabled": EmailService.is_enabled(),
+        "secret_patterns_version": SecretDetector.export_patterns()['version']
     })
 
 
+@router.get("/changes/secret-patterns.json")
+async def secret_patterns(
+    request: Request,
+    v: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Export secret detection patterns for the wizard's client-side pre-scan.
+    
+    The server-side check in create_change remains authoritative.
+    
+    Args:
+        v: Pattern set version; versioned URLs are cached as immutable
+    """
+    export = SecretDetector.export_patterns()
+    etag = f'"{export["version"]}"'
+    
+    if v == export['version']:
+        cache_control = "private, max-age=31536000, immutable"
+    else:
+        cache_control = "private, no-cache"
+    
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    
+    return JSONResponse(content=export, headers=headers)
+
+
 @router.post("/changes")
 async def create_change(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     user: dict = Depends(require_write_access)
 ):
@@ -148,65 +211,11 @@ async def create_change(
     # Parse form data
     form_data = await request.form()
     
-    # Build change data with explicit enum normalization
-    # Maps handle both uppercase and correct case variations
-    category_map = {
-        'NETWORK': 'Network',
-        'IDENTITY': 'Identity', 
-        'ENDPOINT': 'Endpoint',
-        'APPLICATION': 'Application',
-        'VENDOR': 'Vendor',
-        'OTHER': 'Other',
-        'Network': 'Network',
-        'Identity': 'Identity',
-        'Endpoint': 'Endpoint',
-        'Application': 'Application',
-        'Vendor': 'Vendor',
-        'Other': 'Other'
-    }
-    
-    impact_map = {
-        'LOW': 'Low',
-        'MEDIUM': 'Medium',
-        'HIGH': 'High',
-        'Low': 'Low',
-        'Medium': 'Medium',
-        'High': 'High'
-    }
-    
-    user_impact_map = {
-        'NONE': 'None',
-        'SOME': 'Some',
-        'MANY': 'Many',
-        'None': 'None',
-        'Some': 'Some',
-        'Many': 'Many'
-    }
-    
-    status_map = {
-        'PLANNED': 'Planned',
-        'IN PROGRESS': 'In Progress',
-        'COMPLETED': 'Completed',
-        'ROLLED BACK': 'Rolled Back',
-        'FAILED': 'Failed',
-        'Planned': 'Planned',
-        'In Progress': 'In Progress',
-        'Completed': 'Completed',
-        'Rolled Back': 'Rolled Back',
-        'Failed': 'Failed'
-    }
-    
-    # Get raw values from form
-    raw_category = form_data.get('category', '')
-    raw_impact = form_data.get('impact_level', '')
-    raw_user_impact = form_data.get('user_impact', '')
-    raw_status = form_data.get('status', '')
-    
-    # Normalize - try uppercase first, then use as-is as fallback
-    category = category_map.get(raw_category.upper(), category_map.get(raw_category, raw_category))
-    impact_level = impact_map.get(raw_impact.upper(), impact_map.get(raw_impact, raw_impact))
-    user_impact = user_impact_map.get(raw_user_impact.upper(), user_impact_map.get(raw_user_impact, raw_user_impact))
-    status = status_map.get(raw_status.upper(), status_map.get(raw_status, raw_status))
+    # Normalize enums with the maps shared with bulk import
+    category = normalize_choice(form_data.get('category', ''), CATEGORY_MAP)
+    impact_level = normalize_choice(form_data.get('impact_level', ''), IMPACT_MAP)
+    user_impact = normalize_choice(form_data.get('user_impact', ''), USER_IMPACT_MAP)
+    status = normalize_choice(form_data.get('status', ''), STATUS_MAP)
     
     change_data = {
         'title': form_data.get('title'),
@@ -240,28 +249,11 @@ async def create_change(
             detail=f"Potential secrets detected: {findings_text}. Please confirm no secrets checkbox to proceed."
         )
     
-    # Manual validation (bypassing Pydantic to avoid enum conversion issues)
-    if not change_data.get('title'):
-        raise HTTPException(status_code=400, detail="Title is required")
-    if not change_data.get('category'):
-        raise HTTPException(status_code=400, detail="Category is required")
-    if not change_data.get('systems_affected'):
-        raise HTTPException(status_code=400, detail="At least one system is required")
-    if not change_data.get('implementer'):
-        raise HTTPException(status_code=400, detail="Implementer is required")
-    if not change_data.get('impact_level'):
-        raise HTTPException(status_code=400, detail="Impact level is required")
-    if not change_data.get('user_impact'):
-        raise HTTPException(status_code=400, detail="User impact is required")
-    if not change_data.get('what_changed'):
-        raise HTTPException(status_code=400, detail="What changed is required")
-    if not change_data.get('status'):
-        raise HTTPException(status_code=400, detail="Status is required")
-    
-    # Validate backout plan for Medium/High impact
-    if change_data.get('impact_level') in ['Medium', 'High']:
-        if not change_data.get('backout_plan') or not change_data.get('backout_plan').strip():
-            raise HTTPException(status_code=400, detail="Backout plan is required for Medium or High impact changes")
+    # Manual validation (bypassing Pydantic to avoid enum conversion issues),
+    # including the backout plan rule for Medium/High impact
+    errors = validate_change_data(change_data)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[0])
     
     # Create change record directly with normalized values
     change = Change(
@@ -285,6 +277,12 @@ async def create_change(
     )
     
     db.add(change)
+    db.flush()
+    
+    # Daily rollup, cached dashboard counts and live dashboards commit together with the insert
+    RollupService.record_created(db, [change])
+    cache.invalidate(db, 'dashboard')
+    change_events.queue(db, change_event('created', change))
     db.commit()
     db.refresh(change)
     
@@ -310,15 +308,196 @@ async def create_change(
         }
         EmailService.send_change_summary(user.get('email', ''), change_dict, change_url)
     
+    # Overlapping work on the same systems (informational; creation still succeeds)
+    conflicts = ConflictService.find_conflicts(
+        db,
+        change_data['systems_affected'],
+        change_data.get('planned_start'),
+        change_data.get('planned_end'),
+        exclude_id=change.id
+    )
+    
+    # Show the new change on the next page even if the replica is behind
+    mark_primary_reads(response)
+    
     # Return the change ID
-    return {"success": True, "change_id": change.id}
+    return {"success": True, "change_id": change.id, "conflicts": conflicts}
+
+
+@router.post("/changes/import", dependencies=[Depends(rate_limit('import'))])
+async def import_changes(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Form(None, alias="format"),
+    confirm_no_secrets: bool = Form(False),
+    dry_run: bool = Form(False),
+    db: Session = Depends(get_db),
+    user: dict = Depends(require_admin)
+):
+    """
+    Bulk import change records from CSV or NDJSON (admin only).
+    
+    Valid rows are loaded in batches (COPY on PostgreSQL) and committed with
+    a single summarizing audit entry; invalid rows are returned with their
+    row numbers and errors.
+    
+    Args:
+        file: CSV with a header row, or NDJSON (one JSON object per line)
+        format: 'csv' or 'ndjson' (default: from the file extension)
+        confirm_no_secrets: Import rows even if potential secrets are found
+        dry_run: Validate only
+    """
+    filename = file.filename or 'upload'
+    file_format = (file_format or ('ndjson' if filename.endswith(('.ndjson', '.jsonl')) else 'csv')).lower()
+    if file_format not in ('csv', 'ndjson'):
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+    
+    stream = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    try:
+        # Parsing and loading are blocking; keep them off the event loop
+        summary = await run_in_threadpool(
+            ChangeImporter.import_rows,
+            db,
+            ChangeImporter.read_rows(stream, file_format),
+            user,
+            filename,
+            confirm_no_secrets,
+            dry_run,
+            get_client_ip(request)
+        )
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    finally:
+        stream.detach()
+    
+    # Imports don't emit change events; count them toward the next analytics refresh
+    analytics_refresher.note_writes(summary.get('imported', 0))
+    if summary.get('imported'):
+        mark_primary_reads(response)
+    
+    return summary
+
+
+@router.post("/changes/bulk-status", dependencies=[Depends(rate_limit('bulk_status'))])
+async def bulk_update_status(
+    request: Request,
+    payload: BulkStatusUpdate,
+    response: Response,
+    db: Session = Depends(get_db),
+    user: dict = Depends(require_write_access)
+):
+    """
+    Move many changes to a new status in one request.
+    
+    Changes whose current status does not allow the transition are skipped
+    and reported; the rest are updated together.
+    """
+    if payload.outcome_notes:
+        has_secrets, findings = SecretDetector.has_secrets({'outcome_notes': payload.outcome_notes})
+        if has_secrets and not payload.confirm_no_secrets:
+            findings_text = ', '.join([f"{name}: {preview}" for name, preview in findings])
+            raise HTTPException(
+                status_code=400,
+                detail=f"Potential secrets detected: {findings_text}. Please confirm no secrets checkbox to proceed."
+            )
+    
+    result = ChangeStatusService.bulk_update(
+        db=db,
+        change_ids=payload.change_ids,
+        new_status=payload.status.value,
+        user=user,
+        outcome_notes=payload.outcome_notes or None,
+        ip_address=get_client_ip(request)
+    )
+    if result.get('updated'):
+        mark_primary_reads(response)
+    return result
+
+
+@router.get("/changes/conflicts")
+async def check_conflicts(
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+    systems: List[str] = Query([]),
+    planned_start: Optional[str] = None,
+    planned_end: Optional[str] = None,
+    exclude_id: Optional[int] = None
+):
+    """
+    Planned or in-progress changes touching the same systems in an
+    overlapping window. Used by the wizard before submitting.
+    """
+    conflicts = ConflictService.find_conflicts(db, systems, planned_start, planned_end, exclude_id)
+    return {"conflicts": conflicts}
+
+
+@router.get("/changes/events")
+async def change_event_stream(
+    request: Request,
+    user: dict = Depends(get_current_user),
+    category: Optional[str] = None,
+    system: Optional[str] = None,
+    impact_level: Optional[str] = None,
+    implementer: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    Server-Sent Events stream of created/updated changes for the dashboard.
+    
+    Takes the dashboard's filter parameters and only sends matching events.
+    Holds no database connection while open.
+    """
+    subscription = change_events.subscribe({
+        'category': category,
+        'system': system,
+        'impact_level': impact_level,
+        'implementer': implementer,
+        'status': status,
+        'search': search,
+        'start_date': start_date,
+        'end_date': end_date,
+    })
+    
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    change = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.sse_heartbeat_seconds
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Keeps proxies from closing an idle connection
+                    yield ": ping\n\n"
+                    continue
+                
+                if change['type'] == 'resync':
+                    yield "event: resync\ndata: {}\n\n"
+                    break
+                yield f"event: change\ndata: {json.dumps(change)}\n\n"
+        finally:
+            change_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/changes/{change_id}", response_class=HTMLResponse)
 async def view_change(
     request: Request,
     change_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: dict = Depends(get_current_user)
 ):
     """View change detail page."""
@@ -338,15 +517,16 @@ async def view_change(
         "request": request,
         "user": user,
         "change": change,
+        "attachments": AttachmentService.list_for_change(db, change_id),
         "email_enabled": EmailService.is_enabled()
     })
 
 
-@router.get("/changes/{change_id}/pdf")
+@router.get("/changes/{change_id}/pdf", dependencies=[Depends(rate_limit('pdf'))])
 async def download_change_pdf(
     request: Request,
     change_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: dict = Depends(get_current_user)
 ):
     """Generate and download PDF for a change record."""
@@ -375,13 +555,26 @@ async def download_change_pdf(
         'outcome_notes': change.outcome_notes,
         'post_change_issues': change.post_change_issues,
         'created_by': change.created_by,
-        'created_at': change.created_at
+        'created_at': change.created_at,
+        'updated_at': change.updated_at
     }
     
-    # Generate PDF
-    pdf_buffer = PDFGenerator.generate_change_pdf(change_dict)
+    # Generate PDF, reusing a render of this exact version of the record;
+    # concurrent requests for it share one render
+    # PDFGenerator (and ReportLab) is loaded on first use
+    key = make_key(change_id, change.updated_at or change.created_at)
+    
+    def render() -> bytes:
+        return cache.get_or_set(
+            'pdf',
+            key,
+            lambda: services.PDFGenerator.generate_change_pdf(change_dict).getvalue(),
+            ttl=settings.cache_pdf_ttl
+        )
     
-    # Audit log
+    pdf_bytes = await single_flight.do('pdf', key, render)
+    
+    # Audit log (every requester, including those that shared a render)
     AuditService.log_export(
         db=db,
         user=user,
@@ -394,7 +587,7 @@ async def download_change_pdf(
     filename = f"change_{change_id}_{datetime.now().strftime('%Y%m%d')}.pdf"
     
     return StreamingResponse(
-        pdf_buffer,
+        io.BytesIO(pdf_bytes),
         media_type="application/pdf",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
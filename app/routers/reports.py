@@ -1,51 +1,32 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 import csv
 import io
 import json
 
-from app.database import get_db
+from app.cache import make_key
+from app.coalesce import single_flight
+from app.database import ReadSessionLocal, ReplicaSession, SessionLocal, get_read_db
 from app.models import Change
 from app.auth import require_admin
-from app.services import AuditService
+from app.ratelimit import rate_limit
+from app.routers.changes import get_client_ip
+from app.services import AuditService, RollupService
+from app.metrics import CSV_ROWS_EXPORTED, CSV_EXPORT_LATENCY
+import time
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
-def get_client_ip(request: Request) -> str:
-    """Extract client IP address from request."""
-    forwarded = request.headers.get('X-Forwarded-For')
-    if forwarded:
-        return forwarded.split(',')[0].strip()
-    return request.client.host if request.client else 'unknown'
-
-
-@router.get("/changes.csv")
-async def export_changes_csv(
-    request: Request,
-    start: str = Query(..., description="Start date in YYYY-MM-DD format"),
-    end: str = Query(..., description="End date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db),
-    user: dict = Depends(require_admin)
-):
-    """
-    Export changes to CSV for a date range (admin only).
-    
-    Args:
-        start: Start date (YYYY-MM-DD)
-        end: End date (YYYY-MM-DD)
-    """
-    # Parse dates
+def parse_date_range(start: str, end: str):
+    """Parse YYYY-MM-DD start/end query values."""
     try:
         start_date = datetime.strptime(start, '%Y-%m-%d')
         end_date = datetime.strptime(end, '%Y-%m-%d')
-        
-        # Set end date to end of day
-        end_date = end_date.replace(hour=23, minute=59, second=59)
-        
     except ValueError:
         raise HTTPException(
             status_code=400,
@@ -57,6 +38,17 @@ async def export_changes_csv(
             status_code=400,
             detail="Start date must be before end date"
         )
+    return start_date, end_date
+
+
+def build_changes_csv(db: Session, start_date: datetime, end_date: datetime) -> Tuple[str, int]:
+    """
+    Build the CSV export for changes created in [start_date, end_date].
+    
+    Returns:
+        CSV text and the number of changes in it
+    """
+    export_start = time.perf_counter()
     
     # Query changes in date range
     changes = db.query(Change).filter(
@@ -121,6 +113,81 @@ async def export_changes_csv(
             change.post_change_issues or ''
         ])
     
+    CSV_ROWS_EXPORTED.inc(len(changes))
+    CSV_EXPORT_LATENCY.observe(time.perf_counter() - export_start)
+    
+    return output.getvalue(), len(changes)
+
+
+def build_shared_changes_csv(replica: bool, start_date: datetime, end_date: datetime) -> Tuple[str, int]:
+    """
+    build_changes_csv on a session of its own.
+    
+    A coalesced build outlives the request that started it if that client
+    goes away, and the requests waiting on it still need the result, so it
+    can't use that request's session.
+    
+    Args:
+        replica: Read from the replica (the starting request's routing)
+    """
+    db = ReadSessionLocal() if replica else SessionLocal()
+    try:
+        return build_changes_csv(db, start_date, end_date)
+    finally:
+        db.close()
+
+
+@router.get("/changes/totals")
+async def export_totals(
+    start: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end: str = Query(..., description="End date in YYYY-MM-DD format"),
+    db: Session = Depends(get_read_db),
+    user: dict = Depends(require_admin)
+):
+    """
+    Change counts by status for an export range, read from the daily rollup
+    (shown in the export dialog before downloading).
+    """
+    start_date, end_date = parse_date_range(start, end)
+    by_status = RollupService.status_totals(db, start=start_date.date(), end=end_date.date())
+    return {"total": sum(by_status.values()), "by_status": by_status}
+
+
+@router.get("/changes.csv", dependencies=[Depends(rate_limit('csv_export'))])
+async def export_changes_csv(
+    request: Request,
+    start: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end: str = Query(..., description="End date in YYYY-MM-DD format"),
+    db: Session = Depends(get_read_db),
+    user: dict = Depends(require_admin)
+):
+    """
+    Export changes to CSV for a date range (admin only).
+    
+    Args:
+        start: Start date (YYYY-MM-DD)
+        end: End date (YYYY-MM-DD)
+    """
+    # Parse dates
+    start_date, end_date = parse_date_range(start, end)
+    
+    # Set end date to end of day
+    end_date = end_date.replace(hour=23, minute=59, second=59)
+    
+    # Changes in the range and when they last changed; identical exports
+    # of unchanged data that run at the same time share one build
+    record_count, last_modified = db.query(
+        func.count(Change.id),
+        func.max(func.coalesce(Change.updated_at, Change.created_at))
+    ).filter(
+        Change.created_at >= start_date,
+        Change.created_at <= end_date
+    ).one()
+    key = make_key(start_date, end_date, record_count, last_modified)
+    content, record_count = await single_flight.do(
+        'csv_export', key, build_shared_changes_csv, isinstance(db, ReplicaSession), start_date, end_date
+    )
+    
     # Audit log
     AuditService.log_export(
         db=db,
@@ -129,17 +196,16 @@ async def export_changes_csv(
         details={
             'start_date': start,
             'end_date': end,
-            'record_count': len(changes)
+            'record_count': record_count
         },
         ip_address=get_client_ip(request)
     )
     
     # Prepare response
-    output.seek(0)
     filename = f"changekeeper_export_{start}_to_{end}.csv"
     
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter([content]),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -101,6 +101,14 @@ class ChangeFilter(BaseModel):
     page_size: int = Field(default=50, ge=1, le=200)
 
 
+class BulkStatusUpdate(BaseModel):
+    """Schema for moving many changes to a new status at once."""
+    change_ids: List[int] = Field(..., min_length=1, max_length=500)
+    status: StatusEnum
+    outcome_notes: Optional[str] = None
+    confirm_no_secrets: bool = False
+
+
 class AuditLogCreate(BaseModel):
     """Schema for creating audit log entries."""
     action: str
@@ -1,11 +1,42 @@
-from app.services.audit import AuditService
-from app.services.pdf import PDFGenerator
-from app.services.email import EmailService
-from app.services.secret_detection import SecretDetector
+import importlib
+
+# Services are imported on first attribute access, so a worker that never
+# renders a PDF doesn't pay for ReportLab at startup.
+_SERVICE_MODULES = {
+    'AuditService': 'app.services.audit',
+    'PDFGenerator': 'app.services.pdf',
+    'EmailService': 'app.services.email',
+    'SecretDetector': 'app.services.secret_detection',
+    'ChangeImporter': 'app.services.change_import',
+    'ChangeStatusService': 'app.services.status',
+    'ConflictService': 'app.services.conflicts',
+    'CalendarFeedService': 'app.services.calendar_feed',
+    'AnalyticsService': 'app.services.analytics',
+    'RollupService': 'app.services.rollup',
+    'AttachmentService': 'app.services.attachments',
+}
 
 __all__ = [
     'AuditService',
     'PDFGenerator',
     'EmailService',
-    'SecretDetector'
+    'SecretDetector',
+    'ChangeImporter',
+    'ChangeStatusService',
+    'ConflictService',
+    'CalendarFeedService',
+    'AnalyticsService',
+    'RollupService',
+    'AttachmentService'
 ]
+
+
+def __getattr__(name: str):
+    """Import a service module lazily on first access."""
+    module_name = _SERVICE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
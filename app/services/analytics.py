@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.events import change_events
+from app.metrics import ANALYTICS_REFRESH_LATENCY
+from app.models import Change
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Materialized views from migration 003_analytics_views, in refresh order
+MATERIALIZED_VIEWS = ('mv_change_weekly', 'mv_change_system_outcomes', 'mv_analytics_refreshed')
+
+# Advisory lock so only one worker refreshes at a time
+REFRESH_LOCK_ID = 0x43484B41  # 'CHKA'
+
+# Systems shown in the outcomes table
+TOP_SYSTEMS = 20
+
+
+def _week_start(value: datetime) -> date:
+    """Monday of the value's week (date_trunc('week', ...))."""
+    day = value.date()
+    return day - timedelta(days=day.weekday())
+
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+
+class AnalyticsService:
+    """
+    Change volume, outcome and impact statistics for leadership reporting.
+    
+    On PostgreSQL these read small materialized views, so response time
+    doesn't grow with history; elsewhere they are computed from ``changes``.
+    """
+    
+    @staticmethod
+    def uses_views(db: Session) -> bool:
+        """Whether the materialized views are available."""
+        return db.get_bind().dialect.name == 'postgresql'
+    
+    @staticmethod
+    def _weekly_rows(db: Session, since: date) -> List[Tuple]:
+        """(week, category, impact_level, status, changes) rows since ``since``."""
+        if AnalyticsService.uses_views(db):
+            return db.execute(text("""
+                SELECT week, category, impact_level, status, changes
+                FROM mv_change_weekly
+                WHERE week >= :since
+            """), {'since': since}).all()
+        
+        counts = defaultdict(int)
+        rows = db.query(Change.created_at, Change.category, Change.impact_level, Change.status).filter(
+            Change.created_at >= datetime.combine(since, datetime.min.time())
+        )
+        for created_at, category, impact_level, status in rows:
+            counts[(_week_start(created_at), category.value, impact_level.value, status.value)] += 1
+        return [key + (count,) for key, count in counts.items()]
+    
+    @staticmethod
+    def _system_rows(db: Session, limit: int) -> List[Tuple]:
+        """(system, changes, completed, failed, rolled_back) rows, busiest first."""
+        if AnalyticsService.uses_views(db):
+            return db.execute(text("""
+                SELECT system, changes, completed, failed, rolled_back
+                FROM mv_change_system_outcomes
+                ORDER BY changes DESC, system
+                LIMIT :limit
+            """), {'limit': limit}).all()
+        
+        counts = defaultdict(lambda: [0, 0, 0, 0])
+        for systems_affected, status in db.query(Change.systems_affected, Change.status):
+            for system in json.loads(systems_affected or '[]'):
+                entry = counts[system]
+                entry[0] += 1
+                if status.value == 'Completed':
+                    entry[1] += 1
+                elif status.value == 'Failed':
+                    entry[2] += 1
+                elif status.value == 'Rolled Back':
+                    entry[3] += 1
+        rows = sorted(counts.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+        return [(system, *entry) for system, entry in rows]
+    
+    @staticmethod
+    def refreshed_at(db: Session) -> Optional[datetime]:
+        """When the views were last refreshed (None when computed live)."""
+        if not AnalyticsService.uses_views(db):
+            return None
+        return db.execute(text("SELECT refreshed_at FROM mv_analytics_refreshed")).scalar()
+    
+    @staticmethod
+    def summary(db: Session, weeks: Optional[int] = None) -> dict:
+        """
+        Weekly volume by category, outcomes by system and high-impact share.
+        
+        Args:
+            db: Database session
+            weeks: Number of weeks to include (default ANALYTICS_WEEKS)
+        
+        Returns:
+            Dictionary ready for JSON or the analytics template
+        """
+        weeks = weeks or settings.analytics_weeks
+        first_week = _week_start(datetime.now(timezone.utc)) - timedelta(weeks=weeks - 1)
+        week_list = [first_week + timedelta(weeks=i) for i in range(weeks)]
+        
+        volume = {week: defaultdict(int) for week in week_list}
+        high = defaultdict(int)
+        categories = set()
+        for week, category, impact_level, status, count in AnalyticsService._weekly_rows(db, first_week):
+            if week not in volume:
+                continue
+            volume[week][category] += count
+            categories.add(category)
+            if impact_level == 'High':
+                high[week] += count
+        
+        categories = sorted(categories)
+        weekly = []
+        for week in week_list:
+            total = sum(volume[week].values())
+            weekly.append({
+                'week': week.isoformat(),
+                'total': total,
+                'by_category': {category: volume[week].get(category, 0) for category in categories},
+                'high_impact': high[week],
+                'high_impact_share': _rate(high[week], total),
+            })
+        
+        systems = []
+        for system, changes, completed, failed, rolled_back in AnalyticsService._system_rows(db, TOP_SYSTEMS):
+            finished = completed + failed + rolled_back
+            systems.append({
+                'system': system,
+                'changes': changes,
+                'finished': finished,
+                'failed': failed,
+                'rolled_back': rolled_back,
+                'failure_rate': _rate(failed, finished),
+                'rollback_rate': _rate(rolled_back, finished),
+            })
+        
+        total = sum(week['total'] for week in weekly)
+        total_high = sum(week['high_impact'] for week in weekly)
+        refreshed_at = AnalyticsService.refreshed_at(db)
+        
+        return {
+            'weeks': weeks,
+            'categories': categories,
+            'weekly': weekly,
+            'systems': systems,
+            'totals': {
+                'changes': total,
+                'high_impact': total_high,
+                'high_impact_share': _rate(total_high, total),
+            },
+            'source': 'materialized_views' if AnalyticsService.uses_views(db) else 'live',
+            'refreshed_at': refreshed_at.isoformat() if refreshed_at else None,
+        }
+    
+    @staticmethod
+    def refresh(db: Session) -> Optional[float]:
+        """
+        Refresh the materialized views concurrently (readers aren't blocked).
+        
+        Returns:
+            Seconds taken, or None if another worker holds the refresh lock
+            or the views don't exist on this database
+        """
+        if not AnalyticsService.uses_views(db):
+            return None
+        
+        if not db.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {'id': REFRESH_LOCK_ID}).scalar():
+            db.rollback()
+            return None
+        
+        start = time.perf_counter()
+        for view in MATERIALIZED_VIEWS:
+            db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+        db.commit()
+        
+        elapsed = time.perf_counter() - start
+        ANALYTICS_REFRESH_LATENCY.observe(elapsed)
+        logger.info("Refreshed analytics views in %.0f ms", elapsed * 1000)
+        return elapsed
+
+
+class AnalyticsRefresher:
+    """
+    Refresh the analytics views every ``interval`` seconds, or sooner once
+    ``after_writes`` changes have been written.
+    
+    Writes are counted from committed change events; with LISTEN/NOTIFY
+    every worker sees every write, and the advisory lock in
+    AnalyticsService.refresh keeps them from refreshing at the same time.
+    """
+    
+    def __init__(self, interval: int, after_writes: int):
+        self.interval = interval
+        self.after_writes = after_writes
+        self.pending_writes = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def note_writes(self, count: int = 1) -> None:
+        """Count written changes; safe to call from any thread."""
+        self.pending_writes += count
+        if self.after_writes and self.pending_writes >= self.after_writes and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    def _on_change_event(self, change: dict) -> None:
+        if change.get('type') in ('created', 'updated'):
+            self.note_writes()
+    
+    @staticmethod
+    def _refresh() -> None:
+        db = SessionLocal()
+        try:
+            AnalyticsService.refresh(db)
+        except Exception as e:
+            logger.warning("Analytics refresh failed: %s", e)
+            db.rollback()
+        finally:
+            db.close()
+    
+    async def _refresh_loop(self) -> None:
+        """Wait for the interval or enough writes, then refresh."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self.pending_writes = 0
+            await run_in_threadpool(self._refresh)
+    
+    async def start(self) -> None:
+        """Start refreshing (no-op unless the database has the views)."""
+        if engine.dialect.name != 'postgresql' or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        change_events.add_listener(self._on_change_event)
+        self._task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        """Stop background refresh."""
+        if self._task is None:
+            return
+        change_events.remove_listener(self._on_change_event)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+
+
+analytics_refresher = AnalyticsRefresher(
+    interval=settings.analytics_refresh_interval,
+    after_writes=settings.analytics_refresh_after_writes
+)
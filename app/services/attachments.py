@@ -0,0 +1,233 @@
+import codecs
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import unicodedata
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Attachment
+from app.services.secret_detection import SecretDetector, SecretScanner
+
+settings = get_settings()
+
+# Leading bytes checked to decide whether an upload is text
+SNIFF_BYTES = 8192
+
+# Extensions scanned for secrets even if the content doesn't sniff as text
+TEXT_EXTENSIONS = {
+    '.txt', '.log', '.diff', '.patch', '.conf', '.cfg', '.ini', '.env', '.json', '.yaml', '.yml',
+    '.xml', '.csv', '.sh', '.ps1', '.py', '.toml', '.properties', '.md',
+}
+
+# Declared types that are text despite not being text/*
+TEXT_CONTENT_TYPES = {
+    'application/json', 'application/xml', 'application/x-yaml', 'application/yaml',
+    'application/x-sh', 'application/toml',
+}
+
+
+class AttachmentTooLarge(Exception):
+    """Upload exceeded ATTACHMENT_MAX_BYTES."""
+
+
+class AttachmentUpload:
+    """
+    One upload being written to disk.
+    
+    Chunks go straight to a temporary file next to the blob store while
+    the SHA-256 (and, for text, the secret scan) is computed on the way
+    through, so the body is never held in memory. Whether the content is
+    text is decided from its first chunk, not the client's content type or
+    file name; ``scan`` forces the scan for declared text types. ``commit``
+    moves the file into place under its hash, or drops it when that
+    content is already stored.
+    """
+    
+    def __init__(self, root: Path, max_bytes: int, scan: bool = False):
+        tmp_dir = root / 'tmp'
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=tmp_dir, prefix='upload-')
+        self.root = root
+        self.max_bytes = max_bytes
+        self.path = Path(path)
+        self.size = 0
+        self._file = os.fdopen(fd, 'wb')
+        self._hash = hashlib.sha256()
+        self._scanner: Optional[SecretScanner] = SecretDetector.scanner() if scan else None
+    
+    def write(self, chunk: bytes) -> None:
+        """
+        Append a chunk.
+        
+        Raises:
+            AttachmentTooLarge: When the upload passes max_bytes
+        """
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise AttachmentTooLarge(f"Attachment exceeds {self.max_bytes} bytes")
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        if self.size == len(chunk) and self._scanner is None and AttachmentService.looks_like_text(chunk):
+            self._scanner = SecretDetector.scanner()
+        if self._scanner is not None:
+            self._scanner.feed(chunk)
+    
+    def finish(self) -> List[tuple]:
+        """
+        Close the temporary file.
+        
+        Returns:
+            Secret findings as (pattern_name, preview); empty for binary files
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        return self._scanner.finish() if self._scanner is not None else []
+    
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+    
+    def commit(self) -> str:
+        """
+        Move the content into the blob store (call after ``finish``).
+        
+        Returns:
+            SHA-256 of the content
+        """
+        blob = AttachmentService.blob_path(self.sha256, self.root)
+        if blob.exists():
+            # Same content already stored; keep the existing blob
+            self.path.unlink(missing_ok=True)
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self.path, blob)
+        return self.sha256
+    
+    def abort(self) -> None:
+        """Discard the upload."""
+        if not self._file.closed:
+            self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class AttachmentService:
+    """Change attachments stored once per SHA-256 on local disk."""
+    
+    @staticmethod
+    def storage_root() -> Path:
+        return Path(settings.attachment_dir)
+    
+    @staticmethod
+    def blob_path(sha256: str, root: Optional[Path] = None) -> Path:
+        """Where content with this hash is stored (fanned out by prefix)."""
+        return (root or AttachmentService.storage_root()) / sha256[:2] / sha256
+    
+    @staticmethod
+    def clean_filename(filename: Optional[str]) -> str:
+        """Base name safe to store and echo back in Content-Disposition."""
+        name = unicodedata.normalize('NFC', filename or '')
+        name = re.split(r'[\\/]', name)[-1]
+        name = ''.join(ch for ch in name if unicodedata.category(ch)[0] != 'C').strip().lstrip('.')
+        return name[:255] or 'attachment'
+    
+    @staticmethod
+    def guess_content_type(filename: str, declared: Optional[str] = None) -> str:
+        """Declared type unless missing or generic, else from the extension."""
+        declared = (declared or '').split(';')[0].strip().lower()
+        if declared and declared != 'application/octet-stream':
+            return declared[:255]
+        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    
+    @staticmethod
+    def looks_like_text(data: bytes) -> bool:
+        """Whether the first SNIFF_BYTES of ``data`` are UTF-8 without NUL bytes."""
+        block = data[:SNIFF_BYTES]
+        if not block or b'\x00' in block:
+            return False
+        try:
+            # Not final: the block may end inside a multi-byte character
+            codecs.getincrementaldecoder('utf-8')().decode(block, final=False)
+        except UnicodeDecodeError:
+            return False
+        return True
+    
+    @staticmethod
+    def is_text(filename: str, content_type: str) -> bool:
+        """Whether an upload is declared as text (scanned whatever it sniffs as)."""
+        return (
+            content_type.startswith('text/')
+            or content_type in TEXT_CONTENT_TYPES
+            or Path(filename).suffix.lower() in TEXT_EXTENSIONS
+        )
+    
+    @staticmethod
+    def begin_upload(filename: str, content_type: str) -> AttachmentUpload:
+        """Start writing an upload to a temporary file."""
+        return AttachmentUpload(
+            AttachmentService.storage_root(),
+            settings.attachment_max_bytes,
+            scan=AttachmentService.is_text(filename, content_type)
+        )
+    
+    @staticmethod
+    def create(
+        db: Session,
+        change_id: int,
+        upload: AttachmentUpload,
+        filename: str,
+        content_type: str,
+        user: dict
+    ) -> Attachment:
+        """
+        Store a finished upload and record it.
+        
+        Args:
+            db: Database session
+            change_id: Change the file supports
+            upload: Finished upload
+            filename: Cleaned file name
+            content_type: Content type to serve it as
+            user: Uploading user (session dict)
+        
+        Returns:
+            Created Attachment
+        """
+        attachment = Attachment(
+            change_id=change_id,
+            filename=filename,
+            content_type=content_type,
+            size=upload.size,
+            sha256=upload.commit(),
+            uploaded_by=user.get('email', '')
+        )
+        db.add(attachment)
+        db.commit()
+        db.refresh(attachment)
+        return attachment
+    
+    @staticmethod
+    def list_for_change(db: Session, change_id: int) -> List[Attachment]:
+        """Attachments of a change, oldest first."""
+        return db.query(Attachment).filter(
+            Attachment.change_id == change_id
+        ).order_by(Attachment.id).all()
+    
+    @staticmethod
+    def to_dict(attachment: Attachment) -> dict:
+        return {
+            'id': attachment.id,
+            'change_id': attachment.change_id,
+            'filename': attachment.filename,
+            'content_type': attachment.content_type,
+            'size': attachment.size,
+            'sha256': attachment.sha256,
+            'uploaded_by': attachment.uploaded_by,
+            'uploaded_at': attachment.uploaded_at.isoformat() if attachment.uploaded_at else None,
+        }
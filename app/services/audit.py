@@ -1,6 +1,8 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models import AuditLog
-from typing import Optional
+from app.metrics import AUDIT_WRITES
+from typing import List, Optional, Tuple
 import json
 
 
@@ -44,6 +46,7 @@ class AuditService:
         db.add(audit_entry)
         db.commit()
         db.refresh(audit_entry)
+        AUDIT_WRITES.labels(action=action).inc()
         
         return audit_entry
     
@@ -117,3 +120,45 @@ class AuditService:
             change_id=change_id,
             ip_address=ip_address
         )
+    
+    @staticmethod
+    def log_actions_bulk(
+        db: Session,
+        action: str,
+        user: dict,
+        entries: List[Tuple[int, Optional[dict]]],
+        ip_address: Optional[str] = None
+    ) -> int:
+        """
+        Write audit entries for many changes in one multi-row INSERT.
+        
+        Does not commit, so the entries land in the same transaction as the
+        change they record.
+        
+        Args:
+            db: Database session
+            action: Action type
+            user: Acting user (session dict)
+            entries: (change_id, details) per change
+            ip_address: User IP address
+            
+        Returns:
+            Number of entries written
+        """
+        if not entries:
+            return 0
+        
+        db.execute(insert(AuditLog).values([
+            {
+                'action': action,
+                'user_email': user.get('email', ''),
+                'user_name': user.get('name', ''),
+                'change_id': change_id,
+                'details': json.dumps(details) if details else None,
+                'ip_address': ip_address,
+            }
+            for change_id, details in entries
+        ]))
+        AUDIT_WRITES.labels(action=action).inc(len(entries))
+        
+        return len(entries)
@@ -0,0 +1,342 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import CalendarFeedOwner, Change
+
+settings = get_settings()
+
+# Roles whose feeds are served (every role that can read changes)
+FEED_ROLES = ('admin', 'auditor', 'user')
+
+# Filters a feed token may carry (dashboard semantics)
+FEED_FILTERS = ('category', 'system', 'impact_level', 'implementer', 'status')
+
+# Calendar STATUS for each change status
+EVENT_STATUS = {
+    'Planned': 'TENTATIVE',
+    'In Progress': 'CONFIRMED',
+    'Completed': 'CONFIRMED',
+    'Rolled Back': 'CANCELLED',
+    'Failed': 'CANCELLED',
+}
+
+# Events without a planned end are shown with this duration
+DEFAULT_EVENT_DURATION = timedelta(hours=1)
+
+# Changed events loaded per query when rebuilding a feed
+REBUILD_BATCH_SIZE = 500
+
+
+def _utc(value: datetime) -> datetime:
+    """Naive datetimes (SQLite) are stored as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _ics_datetime(value: datetime) -> str:
+    return _utc(value).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _ics_text(value: str) -> str:
+    """Escape a TEXT value (RFC 5545 3.3.11)."""
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 3.1)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Don't split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return '\r\n '.join(parts)
+
+
+@dataclass
+class _FeedState:
+    """Cached serialization of one feed."""
+    # change ID -> (last modified, planned start, VEVENT text)
+    events: Dict[int, Tuple[datetime, datetime, str]] = field(default_factory=dict)
+    body: bytes = b''
+    etag: str = ''
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class CalendarFeedService:
+    """
+    iCalendar feeds of planned changes for calendar clients.
+    
+    Feeds are addressed by a signed token that carries the owner, the
+    owner's token version and the filters, since calendar clients can't
+    send a session cookie. Every poll checks the version, role and last
+    sign-in recorded for the owner, so feed URLs can be reset and stop
+    working when the owner loses access. Each feed
+    keeps its serialized VEVENTs in a per-worker cache. A poll reads only
+    (id, last modified) for the feed; when nothing changed the cached body
+    and ETag are returned, otherwise only new or modified changes are loaded
+    and re-serialized.
+    """
+    
+    _serializer = URLSafeSerializer(settings.secret_key, salt='calendar-feed')
+    _feeds: 'OrderedDict[str, _FeedState]' = OrderedDict()
+    _feeds_lock = threading.Lock()
+    
+    @staticmethod
+    def _owner(db: Session, user: dict) -> CalendarFeedOwner:
+        """Feed owner row for a session user, created on first use."""
+        email = user.get('email', '')
+        owner = db.get(CalendarFeedOwner, email)
+        if owner is None:
+            owner = CalendarFeedOwner(user_email=email, role=user.get('role', 'user'), token_version=1)
+            db.add(owner)
+        return owner
+    
+    @staticmethod
+    def record_sign_in(db: Session, user: dict) -> None:
+        """
+        Refresh the role and sign-in time of a user who owns feeds.
+        
+        Called at every sign-in; users without feeds get no row.
+        """
+        db.query(CalendarFeedOwner).filter(CalendarFeedOwner.user_email == user.get('email', '')).update(
+            {'role': user.get('role', 'user'), 'signed_in_at': datetime.now(timezone.utc)},
+            synchronize_session=False
+        )
+        db.commit()
+    
+    @staticmethod
+    def create_token(db: Session, user: dict, mine: bool = False, filters: Optional[dict] = None) -> str:
+        """
+        Signed feed token for a user's changes or a filtered view.
+        
+        Args:
+            db: Database session
+            user: Session user the feed belongs to
+            mine: Only changes the user created or implements
+            filters: Dashboard filters (see FEED_FILTERS)
+        """
+        owner = CalendarFeedService._owner(db, user)
+        owner.role = user.get('role', 'user')
+        owner.signed_in_at = datetime.now(timezone.utc)
+        db.commit()
+        
+        payload = {'u': owner.user_email, 'v': owner.token_version}
+        if mine:
+            payload['mine'] = True
+        clean = {key: value for key, value in (filters or {}).items() if key in FEED_FILTERS and value}
+        if clean:
+            payload['f'] = dict(sorted(clean.items()))
+        return CalendarFeedService._serializer.dumps(payload)
+    
+    @staticmethod
+    def reset_tokens(db: Session, user: dict) -> int:
+        """
+        Revoke every feed URL the user has issued.
+        
+        Returns:
+            The new token version
+        """
+        owner = CalendarFeedService._owner(db, user)
+        owner.token_version = (owner.token_version or 0) + 1
+        db.commit()
+        return owner.token_version
+    
+    @staticmethod
+    def load_token(db: Session, token: str) -> Optional[dict]:
+        """
+        Verified token payload, or None if the feed shouldn't be served.
+        
+        None when the signature is invalid, the owner has reset their feed
+        URLs since it was issued, their role no longer allows reading
+        changes, or they haven't signed in for CALENDAR_FEED_MAX_IDLE_DAYS.
+        """
+        try:
+            payload = CalendarFeedService._serializer.loads(token)
+        except BadSignature:
+            return None
+        if not isinstance(payload, dict) or not payload.get('u'):
+            return None
+        
+        owner = db.get(CalendarFeedOwner, payload['u'])
+        if owner is None or owner.token_version != payload.get('v') or owner.role not in FEED_ROLES:
+            return None
+        max_idle = settings.calendar_feed_max_idle_days
+        if max_idle and _utc(owner.signed_in_at) < datetime.now(timezone.utc) - timedelta(days=max_idle):
+            return None
+        return payload
+    
+    @staticmethod
+    def _query(db: Session, payload: dict):
+        """Planned changes in the feed's scope."""
+        horizon = datetime.now(timezone.utc) - timedelta(days=settings.calendar_feed_past_days)
+        query = db.query(Change).filter(
+            Change.planned_start.isnot(None),
+            Change.planned_start >= horizon
+        )
+        
+        if payload.get('mine'):
+            email = payload['u']
+            query = query.filter(or_(Change.created_by == email, Change.implementer.ilike(email)))
+        
+        filters = payload.get('f') or {}
+        if filters.get('category'):
+            query = query.filter(Change.category == filters['category'])
+        if filters.get('system'):
+            query = query.filter(Change.systems_affected.contains(filters['system']))
+        if filters.get('impact_level'):
+            query = query.filter(Change.impact_level == filters['impact_level'])
+        if filters.get('implementer'):
+            query = query.filter(Change.implementer.ilike(f"%{filters['implementer']}%"))
+        if filters.get('status'):
+            query = query.filter(Change.status == filters['status'])
+        return query
+    
+    @staticmethod
+    def _serialize_event(change: Change, base_url: str) -> str:
+        """One VEVENT block."""
+        status = change.status.value
+        start = change.planned_start
+        end = change.planned_end if change.planned_end and change.planned_end > start else start + DEFAULT_EVENT_DURATION
+        modified = change.updated_at or change.created_at
+        systems = ', '.join(json.loads(change.systems_affected or '[]'))
+        url = f"{base_url}/changes/{change.id}"
+        
+        description = '\n'.join(line for line in (
+            f"Status: {status}",
+            f"Systems: {systems}",
+            f"Impact: {change.impact_level.value} (user impact: {change.user_impact.value})",
+            f"Implementer: {change.implementer}",
+            "Maintenance window" if change.maintenance_window else None,
+            f"Ticket: {change.ticket_id}" if change.ticket_id else None,
+            url,
+        ) if line)
+        
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:change-{change.id}@{settings.app_name.lower().replace(' ', '-')}",
+            f"DTSTAMP:{_ics_datetime(modified)}",
+            f"LAST-MODIFIED:{_ics_datetime(modified)}",
+            # Must increase on every revision; seconds since creation does
+            f"SEQUENCE:{max(0, int((_utc(modified) - _utc(change.created_at)).total_seconds()))}",
+            f"DTSTART:{_ics_datetime(start)}",
+            f"DTEND:{_ics_datetime(end)}",
+            f"SUMMARY:{_ics_text(f'[{status}] {change.title}')}",
+            f"DESCRIPTION:{_ics_text(description)}",
+            f"CATEGORIES:{_ics_text(change.category.value)}",
+            f"STATUS:{EVENT_STATUS.get(status, 'CONFIRMED')}",
+            f"TRANSP:{'OPAQUE' if change.maintenance_window else 'TRANSPARENT'}",
+            f"URL:{url}",
+            'END:VEVENT',
+        ]
+        return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+    
+    @staticmethod
+    def _feed_state(key: str) -> _FeedState:
+        """Cached state for a feed, evicting the least recently used."""
+        with CalendarFeedService._feeds_lock:
+            feeds = CalendarFeedService._feeds
+            state = feeds.get(key)
+            if state is None:
+                state = feeds[key] = _FeedState()
+                while len(feeds) > settings.calendar_feed_cache_size:
+                    feeds.popitem(last=False)
+            else:
+                feeds.move_to_end(key)
+            return state
+    
+    @staticmethod
+    def render(db: Session, token: str, payload: dict, base_url: str) -> Tuple[bytes, str]:
+        """
+        Current feed body and ETag, rebuilt incrementally when stale.
+        
+        Args:
+            db: Database session
+            token: Feed token (cache key)
+            payload: Verified token payload
+            base_url: Absolute application URL for event links
+        
+        Returns:
+            Tuple of (ICS body, ETag)
+        """
+        query = CalendarFeedService._query(db, payload)
+        modified = func.coalesce(Change.updated_at, Change.created_at)
+        current = dict(query.with_entities(Change.id, modified).all())
+        
+        state = CalendarFeedService._feed_state(token)
+        with state.lock:
+            if state.body and current.keys() == state.events.keys() and all(
+                state.events[change_id][0] == last_modified for change_id, last_modified in current.items()
+            ):
+                return state.body, state.etag
+            
+            # Drop events that left the feed (status filter, past horizon)
+            for change_id in set(state.events) - set(current):
+                del state.events[change_id]
+            
+            # Re-serialize only new or modified changes
+            stale = sorted(
+                change_id for change_id, last_modified in current.items()
+                if change_id not in state.events or state.events[change_id][0] != last_modified
+            )
+            for i in range(0, len(stale), REBUILD_BATCH_SIZE):
+                batch = stale[i:i + REBUILD_BATCH_SIZE]
+                for change in db.query(Change).filter(Change.id.in_(batch)):
+                    state.events[change.id] = (
+                        current[change.id],
+                        change.planned_start,
+                        CalendarFeedService._serialize_event(change, base_url)
+                    )
+            
+            events = sorted(state.events.items(), key=lambda item: (_utc(item[1][1]), item[0]))
+            name = 'My changes' if payload.get('mine') else 'Planned changes'
+            filters = payload.get('f') or {}
+            if filters:
+                name += ' (' + ', '.join(str(value) for value in filters.values()) + ')'
+            
+            header = '\r\n'.join(_fold(line) for line in (
+                'BEGIN:VCALENDAR',
+                'VERSION:2.0',
+                f"PRODID:-//{settings.app_name}//Change Calendar//EN",
+                'CALSCALE:GREGORIAN',
+                'METHOD:PUBLISH',
+                f"X-WR-CALNAME:{_ics_text(f'{settings.app_name}: {name}')}",
+                f"REFRESH-INTERVAL;VALUE=DURATION:PT{settings.calendar_feed_refresh_minutes}M",
+            )) + '\r\n'
+            body = (header + ''.join(text for _, (_, _, text) in events) + 'END:VCALENDAR\r\n').encode('utf-8')
+            
+            state.body = body
+            # Weak: the compression middleware may re-encode the body
+            state.etag = 'W/"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            return state.body, state.etag
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Forget all cached feeds."""
+        with CalendarFeedService._feeds_lock:
+            CalendarFeedService._feeds.clear()
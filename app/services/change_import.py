@@ -0,0 +1,391 @@
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+from sqlalchemy.orm import Session
+from app.cache import cache
+
+from app.models import Change, CategoryEnum, ImpactLevelEnum, UserImpactEnum, StatusEnum
+from app.services.audit import AuditService
+from app.services.rollup import RollupService
+from app.services.secret_detection import SecretDetector
+
+logger = logging.getLogger(__name__)
+
+# Enum normalization shared by the form POST and bulk import.
+# Maps handle both uppercase and correct case variations.
+CATEGORY_MAP = {
+    'NETWORK': 'Network',
+    'IDENTITY': 'Identity',
+    'ENDPOINT': 'Endpoint',
+    'APPLICATION': 'Application',
+    'VENDOR': 'Vendor',
+    'OTHER': 'Other',
+    'Network': 'Network',
+    'Identity': 'Identity',
+    'Endpoint': 'Endpoint',
+    'Application': 'Application',
+    'Vendor': 'Vendor',
+    'Other': 'Other'
+}
+
+IMPACT_MAP = {
+    'LOW': 'Low',
+    'MEDIUM': 'Medium',
+    'HIGH': 'High',
+    'Low': 'Low',
+    'Medium': 'Medium',
+    'High': 'High'
+}
+
+USER_IMPACT_MAP = {
+    'NONE': 'None',
+    'SOME': 'Some',
+    'MANY': 'Many',
+    'None': 'None',
+    'Some': 'Some',
+    'Many': 'Many'
+}
+
+STATUS_MAP = {
+    'PLANNED': 'Planned',
+    'IN PROGRESS': 'In Progress',
+    'COMPLETED': 'Completed',
+    'ROLLED BACK': 'Rolled Back',
+    'FAILED': 'Failed',
+    'Planned': 'Planned',
+    'In Progress': 'In Progress',
+    'Completed': 'Completed',
+    'Rolled Back': 'Rolled Back',
+    'Failed': 'Failed'
+}
+
+# (field, normalization map, valid values)
+ENUM_FIELDS = [
+    ('category', CATEGORY_MAP, {e.value for e in CategoryEnum}),
+    ('impact_level', IMPACT_MAP, {e.value for e in ImpactLevelEnum}),
+    ('user_impact', USER_IMPACT_MAP, {e.value for e in UserImpactEnum}),
+    ('status', STATUS_MAP, {e.value for e in StatusEnum}),
+]
+
+# Required fields in the order the form reports them
+REQUIRED_FIELDS = [
+    ('title', "Title is required"),
+    ('category', "Category is required"),
+    ('systems_affected', "At least one system is required"),
+    ('implementer', "Implementer is required"),
+    ('impact_level', "Impact level is required"),
+    ('user_impact', "User impact is required"),
+    ('what_changed', "What changed is required"),
+    ('status', "Status is required"),
+]
+
+# Columns written by bulk import, in COPY order
+IMPORT_COLUMNS = [
+    'title', 'category', 'systems_affected', 'planned_start', 'planned_end',
+    'implementer', 'impact_level', 'user_impact', 'maintenance_window',
+    'backout_plan', 'what_changed', 'ticket_id', 'links', 'status',
+    'outcome_notes', 'post_change_issues', 'created_by', 'created_at',
+]
+
+# COPY ... WITH (FORMAT csv) reads an unquoted empty field as NULL; every
+# value is quoted, so no cell content can be mistaken for the marker
+COPY_NULL = ''
+
+
+def normalize_choice(raw: Optional[str], mapping: dict) -> str:
+    """Normalize an enum value - try uppercase first, then use as-is as fallback."""
+    raw = raw or ''
+    return mapping.get(raw.upper(), mapping.get(raw, raw))
+
+
+def validate_change_data(change_data: dict) -> List[str]:
+    """
+    Validate normalized change data with the same rules as the form.
+    
+    Args:
+        change_data: Normalized change fields
+    
+    Returns:
+        List of error messages (empty if valid)
+    """
+    errors = [message for field, message in REQUIRED_FIELDS if not change_data.get(field)]
+    
+    for field, _, valid in ENUM_FIELDS:
+        value = change_data.get(field)
+        if value and value not in valid:
+            errors.append(f"Invalid {field.replace('_', ' ')}: {value}")
+    
+    # Backout plan required for Medium/High impact
+    if change_data.get('impact_level') in ['Medium', 'High']:
+        if not change_data.get('backout_plan') or not change_data.get('backout_plan').strip():
+            errors.append("Backout plan is required for Medium or High impact changes")
+    
+    return errors
+
+
+def _as_list(value) -> List[str]:
+    """Accept a list, a JSON array string, or a ';'/','-separated string."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    
+    value = str(value).strip()
+    if value.startswith('['):
+        try:
+            return [str(v).strip() for v in json.loads(value) if str(v).strip()]
+        except ValueError:
+            pass
+    separator = ';' if ';' in value else ','
+    return [part.strip() for part in value.split(separator) if part.strip()]
+
+
+def _as_bool(value) -> bool:
+    """Interpret spreadsheet-style booleans."""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('true', 'yes', 'y', '1')
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    """Parse a date or datetime; raises ValueError if unparseable."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return date_parser.parse(str(value))
+
+
+def _blank_to_none(value) -> Optional[str]:
+    """Empty strings become None, like ``form_data.get(...) or None``."""
+    if value is None:
+        return None
+    value = str(value)
+    return value if value.strip() else None
+
+
+class ChangeImporter:
+    """Bulk import of historical change records from CSV or NDJSON."""
+    
+    BATCH_SIZE = 1000
+    
+    @staticmethod
+    def read_rows(stream: io.TextIOBase, file_format: str) -> Iterator[dict]:
+        """
+        Stream raw rows from a CSV (with header) or NDJSON file.
+        
+        Args:
+            stream: Text stream
+            file_format: 'csv' or 'ndjson'
+        
+        Yields:
+            One dict per input row; unparseable NDJSON lines yield ``{'_error': ...}``
+        """
+        if file_format == 'csv':
+            for row in csv.DictReader(stream):
+                yield {key.strip(): value for key, value in row.items() if key}
+            return
+        
+        if file_format != 'ndjson':
+            raise ValueError(f"Unsupported import format: {file_format}")
+        
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield {'_error': f"Invalid JSON: {e}"}
+                continue
+            yield row if isinstance(row, dict) else {'_error': "Each line must be a JSON object"}
+    
+    @staticmethod
+    def normalize_batch(rows: List[dict], default_created_by: str) -> Tuple[List[dict], List[List[str]]]:
+        """
+        Normalize a batch column by column.
+        
+        Each enum column is normalized once per distinct raw value in the
+        batch rather than once per row.
+        
+        Args:
+            rows: Raw input rows
+            default_created_by: Used when a row has no created_by
+        
+        Returns:
+            Tuple of (normalized rows, per-row parse errors)
+        """
+        normalized = []
+        errors = []
+        
+        for row in rows:
+            row_errors = [row['_error']] if '_error' in row else []
+            data = {
+                'title': _blank_to_none(row.get('title')),
+                'systems_affected': _as_list(row.get('systems_affected')),
+                'implementer': _blank_to_none(row.get('implementer')),
+                'maintenance_window': _as_bool(row.get('maintenance_window')),
+                'backout_plan': _blank_to_none(row.get('backout_plan')),
+                'what_changed': _blank_to_none(row.get('what_changed')),
+                'ticket_id': _blank_to_none(row.get('ticket_id')),
+                'links': _as_list(row.get('links')),
+                'outcome_notes': _blank_to_none(row.get('outcome_notes')),
+                'post_change_issues': _blank_to_none(row.get('post_change_issues')),
+                'created_by': _blank_to_none(row.get('created_by')) or default_created_by,
+            }
+            for field in ('planned_start', 'planned_end', 'created_at'):
+                try:
+                    data[field] = _as_datetime(row.get(field))
+                except (ValueError, OverflowError):
+                    data[field] = None
+                    row_errors.append(f"Invalid {field.replace('_', ' ')}: {row.get(field)}")
+            
+            normalized.append(data)
+            errors.append(row_errors)
+        
+        for field, mapping, _ in ENUM_FIELDS:
+            raw_values = [str(row.get(field) or '') for row in rows]
+            lookup = {raw: normalize_choice(raw, mapping) for raw in set(raw_values)}
+            for data, raw in zip(normalized, raw_values):
+                data[field] = lookup[raw]
+        
+        return normalized, errors
+    
+    @staticmethod
+    def _copy_field(value) -> str:
+        if value is None:
+            return COPY_NULL
+        return '"' + str(value).replace('"', '""') + '"'
+    
+    @staticmethod
+    def _copy_stream(records: List[dict]) -> io.StringIO:
+        """CSV for COPY FROM STDIN: values quoted, NULLs as unquoted empty fields."""
+        buffer = io.StringIO()
+        for record in records:
+            buffer.write(','.join(ChangeImporter._copy_field(record[column]) for column in IMPORT_COLUMNS))
+            buffer.write('\n')
+        buffer.seek(0)
+        return buffer
+    
+    @staticmethod
+    def _copy_rows(db: Session, records: List[dict]) -> None:
+        """Load rows with PostgreSQL COPY FROM STDIN."""
+        dbapi_connection = db.connection().connection.dbapi_connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY changes ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                ChangeImporter._copy_stream(records)
+            )
+    
+    @staticmethod
+    def _insert_rows(db: Session, records: List[dict]) -> None:
+        """Load rows; COPY on PostgreSQL, executemany elsewhere."""
+        if db.get_bind().dialect.name == 'postgresql':
+            ChangeImporter._copy_rows(db, records)
+        else:
+            db.execute(Change.__table__.insert(), records)
+    
+    @staticmethod
+    def import_rows(
+        db: Session,
+        rows: Iterable[dict],
+        user: dict,
+        source: str,
+        confirm_no_secrets: bool = False,
+        dry_run: bool = False,
+        ip_address: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> dict:
+        """
+        Validate and load rows in batches, then write one audit entry.
+        
+        Valid rows are loaded and invalid rows are reported; everything is
+        committed together with the audit entry.
+        
+        Args:
+            db: Database session
+            rows: Raw rows from read_rows
+            user: Importing user (session dict)
+            source: File name, recorded in the audit entry
+            confirm_no_secrets: Accept rows where potential secrets were found
+            dry_run: Validate only; nothing is written
+            ip_address: Client IP for the audit entry
+            batch_size: Rows per batch (default BATCH_SIZE)
+        
+        Returns:
+            Summary with counts and a per-row error list (1-based data row numbers)
+        """
+        batch_size = batch_size or ChangeImporter.BATCH_SIZE
+        summary = {'source': source, 'total': 0, 'imported': 0, 'failed': 0, 'dry_run': dry_run, 'errors': []}
+        now = datetime.now(timezone.utc)
+        
+        def process(batch: List[dict], first_row: int) -> None:
+            records, errors = ChangeImporter.normalize_batch(batch, user.get('email', ''))
+            findings = SecretDetector.find_secrets_batch(records)
+            
+            valid = []
+            for offset, (record, row_errors) in enumerate(zip(records, errors)):
+                if offset in findings and not confirm_no_secrets:
+                    findings_text = ', '.join(f"{name}: {preview}" for name, preview in findings[offset])
+                    row_errors.append(f"Potential secrets detected: {findings_text}")
+                if '_error' not in batch[offset]:
+                    row_errors.extend(validate_change_data(record))
+                
+                if row_errors:
+                    summary['errors'].append({'row': first_row + offset, 'errors': row_errors})
+                    continue
+                
+                record['systems_affected'] = json.dumps(record['systems_affected'])
+                record['links'] = json.dumps(record['links']) if record['links'] else None
+                record['created_at'] = record['created_at'] or now
+                valid.append(record)
+            
+            if valid and not dry_run:
+                ChangeImporter._insert_rows(db, valid)
+                RollupService.record_created(db, valid)
+            summary['imported'] += len(valid)
+        
+        batch = []
+        for row in rows:
+            batch.append(row)
+            summary['total'] += 1
+            if len(batch) >= batch_size:
+                process(batch, summary['total'] - len(batch) + 1)
+                batch = []
+        if batch:
+            process(batch, summary['total'] - len(batch) + 1)
+        
+        summary['failed'] = len(summary['errors'])
+        
+        if dry_run:
+            db.rollback()
+            return summary
+        
+        if summary['imported']:
+            cache.invalidate(db, 'dashboard')
+        
+        # Commits the loaded rows together with the audit entry
+        AuditService.log_action(
+            db=db,
+            action='import',
+            user_email=user.get('email', ''),
+            user_name=user.get('name', ''),
+            details={
+                'source': source,
+                'total': summary['total'],
+                'imported': summary['imported'],
+                'failed': summary['failed'],
+            },
+            ip_address=ip_address
+        )
+        logger.info(
+            "Imported %d of %d changes from %s (%d failed)",
+            summary['imported'], summary['total'], source, summary['failed']
+        )
+        
+        return summary
@@ -0,0 +1,161 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from sqlalchemy import DateTime, Integer, Text, bindparam, func, inspect, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.models import Change
+
+# Statuses whose planned window still matters
+ACTIVE_STATUSES = ('Planned', 'In Progress')
+
+# Most conflicts returned for one check
+CONFLICT_LIMIT = 20
+
+# Answered by the GiST (planned_window) and GIN (systems) indexes from
+# migration 002_schedule_conflicts
+_CONFLICT_QUERY = text("""
+    SELECT id, title, status, implementer, planned_start, planned_end,
+           ARRAY(SELECT unnest(systems) INTERSECT SELECT unnest(:systems)) AS shared_systems
+    FROM changes
+    WHERE planned_window && tstzrange(:start, :end, '[]')
+      AND systems && :systems
+      AND status IN ('Planned', 'In Progress')
+      AND id <> :exclude_id
+    ORDER BY planned_start, id
+    LIMIT :limit
+""").bindparams(
+    bindparam('systems', type_=ARRAY(Text)),
+    bindparam('start', type_=DateTime(timezone=True)),
+    bindparam('end', type_=DateTime(timezone=True)),
+    bindparam('exclude_id', type_=Integer),
+    bindparam('limit', type_=Integer),
+)
+
+
+# Whether each engine's ``changes`` table has the generated columns
+_indexed_engines: Dict[Engine, bool] = {}
+
+
+def _as_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """Accept datetimes or ISO strings (datetime-local form values)."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class ConflictService:
+    """Find active changes touching the same systems in overlapping windows."""
+    
+    @staticmethod
+    def uses_generated_columns(db: Session) -> bool:
+        """
+        Whether ``changes`` has the columns from migration 002.
+        
+        Schemas built with ``Base.metadata.create_all`` (tests, benchmark
+        seeding) lack them, so those use the portable query. Checked once
+        per engine.
+        """
+        engine = db.get_bind().engine
+        if engine.dialect.name != 'postgresql':
+            return False
+        if engine not in _indexed_engines:
+            columns = {c['name'] for c in inspect(engine).get_columns('changes')}
+            _indexed_engines[engine] = {'planned_window', 'systems'} <= columns
+        return _indexed_engines[engine]
+    
+    @staticmethod
+    def find_conflicts(
+        db: Session,
+        systems: List[str],
+        planned_start: Union[str, datetime, None],
+        planned_end: Union[str, datetime, None] = None,
+        exclude_id: Optional[int] = None,
+        limit: int = CONFLICT_LIMIT
+    ) -> List[dict]:
+        """
+        Planned or in-progress changes that overlap a proposed window.
+        
+        A missing end is treated as a point in time, matching the generated
+        ``planned_window`` column.
+        
+        Args:
+            db: Database session
+            systems: Systems the proposed change touches
+            planned_start: Proposed start
+            planned_end: Proposed end
+            exclude_id: Change to leave out (the change being checked)
+            limit: Maximum conflicts to return
+        
+        Returns:
+            List of conflicting changes with the systems they share
+        """
+        start = _as_datetime(planned_start)
+        end = _as_datetime(planned_end) or start
+        systems = sorted({s.strip() for s in systems if s and s.strip()})
+        if start is None or end < start or not systems:
+            return []
+        
+        if ConflictService.uses_generated_columns(db):
+            rows = db.execute(_CONFLICT_QUERY, {
+                'systems': systems,
+                'start': start,
+                'end': end,
+                'exclude_id': exclude_id or 0,
+                'limit': limit,
+            }).all()
+            return [ConflictService._conflict(row, sorted(row.shared_systems)) for row in rows]
+        
+        return ConflictService._find_conflicts_scan(db, systems, start, end, exclude_id, limit)
+    
+    @staticmethod
+    def _find_conflicts_scan(
+        db: Session,
+        systems: List[str],
+        start: datetime,
+        end: datetime,
+        exclude_id: Optional[int],
+        limit: int
+    ) -> List[dict]:
+        """Fallback without the generated columns: filter systems in Python."""
+        query = db.query(Change).filter(
+            Change.status.in_(ACTIVE_STATUSES),
+            Change.planned_start.isnot(None),
+            Change.planned_start <= end,
+            func.coalesce(Change.planned_end, Change.planned_start) >= start,
+            or_(Change.planned_end.is_(None), Change.planned_end >= Change.planned_start)
+        )
+        if exclude_id:
+            query = query.filter(Change.id != exclude_id)
+        
+        wanted = set(systems)
+        conflicts = []
+        for change in query.order_by(Change.planned_start, Change.id):
+            shared = wanted.intersection(json.loads(change.systems_affected or '[]'))
+            if shared:
+                conflicts.append(ConflictService._conflict(change, sorted(shared)))
+                if len(conflicts) >= limit:
+                    break
+        return conflicts
+    
+    @staticmethod
+    def _conflict(change, shared_systems: List[str]) -> dict:
+        """Serialize a conflicting change."""
+        status = change.status
+        return {
+            'id': change.id,
+            'title': change.title,
+            'status': getattr(status, 'value', status),
+            'implementer': change.implementer,
+            'planned_start': change.planned_start.isoformat() if change.planned_start else None,
+            'planned_end': change.planned_end.isoformat() if change.planned_end else None,
+            'systems': shared_systems,
+        }
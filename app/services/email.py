@@ -1,8 +1,6 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Optional
 from app.config import get_settings
+from app.metrics import EMAIL_SENDS
 import json
 
 settings = get_settings()
@@ -36,6 +34,11 @@ class EmailService:
         if not EmailService.is_enabled():
             return False
         
+        # Imported here so workers that never send email skip smtplib/MIME
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+        
         try:
             # Create message
             msg = MIMEMultipart('alternative')
@@ -62,11 +65,13 @@ class EmailService:
                     server.login(settings.smtp_user, settings.smtp_password)
                 server.send_message(msg)
             
+            EMAIL_SENDS.labels(result='success').inc()
             return True
             
         except Exception as e:
             # Log error but don't fail the change creation
             print(f"Email send failed: {e}")
+            EMAIL_SENDS.labels(result='failure').inc()
             return False
     
     @staticmethod
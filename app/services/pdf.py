@@ -5,6 +5,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
 from io import BytesIO
+from app.metrics import PDF_RENDERS, PDF_RENDER_LATENCY
 from datetime import datetime
 from typing import Optional
 import json
@@ -173,7 +174,10 @@ class PDFGenerator:
         
         # Footer
         elements.append(Spacer(1, 0.3*inch))
-        footer_text = f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        # Renders are cached per record version, so stamp the version rather
+        # than the render time
+        record_time = change.get('updated_at') or change['created_at']
+        footer_text = f"Record as of {PDFGenerator._format_datetime(record_time)}"
         elements.append(Paragraph(footer_text, ParagraphStyle(
             'Footer',
             parent=styles['Normal'],
@@ -183,7 +187,9 @@ class PDFGenerator:
         )))
         
         # Build PDF
-        doc.build(elements)
+        with PDF_RENDER_LATENCY.time():
+            doc.build(elements)
+        PDF_RENDERS.inc()
         buffer.seek(0)
         
         return buffer
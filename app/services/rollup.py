@@ -0,0 +1,231 @@
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.models import Change, ChangeDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# system value for rows that count every change once
+ALL_SYSTEMS = ''
+
+# Rollup rows written per statement
+WRITE_BATCH_SIZE = 1000
+
+# Changes read per round trip while rebuilding
+REBUILD_FETCH_SIZE = 5000
+
+KEY_COLUMNS = ('day', 'category', 'status', 'impact_level', 'system')
+
+RollupKey = Tuple[date, str, str, str, str]
+
+
+def _value(v) -> str:
+    return getattr(v, 'value', v)
+
+
+def _day(created_at: Optional[datetime]) -> date:
+    """UTC day a change was created (naive datetimes are UTC)."""
+    if created_at is None:
+        return datetime.now(timezone.utc).date()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _systems(systems_affected) -> List[str]:
+    """Distinct system names from the JSON column (or a list)."""
+    if isinstance(systems_affected, str):
+        try:
+            systems_affected = json.loads(systems_affected or '[]')
+        except ValueError:
+            systems_affected = []
+    return sorted({str(system)[:255] for system in systems_affected or []})
+
+
+class RollupService:
+    """
+    Incrementally maintained daily change counts (change_daily_rollup).
+    
+    Writers add deltas in the same transaction as the change itself, so
+    the rollup commits or rolls back with it. Summary widgets and export
+    totals read O(days) rollup rows instead of scanning changes.
+    """
+    
+    @staticmethod
+    def keys(change, status: Optional[str] = None) -> List[RollupKey]:
+        """
+        Rollup keys a change counts toward.
+        
+        Args:
+            change: Change, row or import record with created_at, category,
+                impact_level, status and systems_affected
+            status: Status to use instead of the change's own
+        """
+        get = change.get if isinstance(change, dict) else lambda attr: getattr(change, attr)
+        base = (
+            _day(get('created_at')),
+            _value(get('category')),
+            _value(status or get('status')),
+            _value(get('impact_level')),
+        )
+        return [base + (system,) for system in [ALL_SYSTEMS] + _systems(get('systems_affected'))]
+    
+    @staticmethod
+    def apply(db: Session, deltas: Dict[RollupKey, int]) -> None:
+        """Add ``deltas`` to the rollup with upserts (caller commits)."""
+        rows = [
+            dict(zip(KEY_COLUMNS, key), changes=delta)
+            for key, delta in sorted(deltas.items())  # fixed order avoids deadlocks
+            if delta
+        ]
+        if not rows:
+            return
+        
+        dialect = db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise RuntimeError(f"Rollup upserts are not supported on {dialect}")
+        
+        table = ChangeDailyRollup.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={'changes': table.c.changes + stmt.excluded.changes}
+        )
+        for i in range(0, len(rows), WRITE_BATCH_SIZE):
+            db.execute(stmt, rows[i:i + WRITE_BATCH_SIZE])
+    
+    @staticmethod
+    def record_created(db: Session, changes: Iterable) -> None:
+        """Count newly created changes."""
+        deltas = Counter()
+        for change in changes:
+            for key in RollupService.keys(change):
+                deltas[key] += 1
+        RollupService.apply(db, deltas)
+    
+    @staticmethod
+    def record_status_changes(db: Session, changes: Iterable, old_status: Dict[int, str]) -> None:
+        """
+        Move changes from their old status to their current one.
+        
+        Args:
+            db: Database session
+            changes: Changes (or rows) carrying the new status
+            old_status: Previous status by change ID
+        """
+        deltas = Counter()
+        for change in changes:
+            for key in RollupService.keys(change, status=_value(old_status[change.id])):
+                deltas[key] -= 1
+            for key in RollupService.keys(change):
+                deltas[key] += 1
+        RollupService.apply(db, deltas)
+    
+    @staticmethod
+    def _scan(db: Session) -> Counter:
+        """Counts computed from the changes table."""
+        counts = Counter()
+        rows = db.query(
+            Change.created_at, Change.category, Change.status, Change.impact_level, Change.systems_affected
+        ).execution_options(yield_per=REBUILD_FETCH_SIZE)
+        for created_at, category, status, impact_level, systems_affected in rows:
+            change = {
+                'created_at': created_at,
+                'category': category,
+                'status': status,
+                'impact_level': impact_level,
+                'systems_affected': systems_affected,
+            }
+            for key in RollupService.keys(change):
+                counts[key] += 1
+        return counts
+    
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recompute the whole rollup from changes (backfill / drift repair).
+        
+        On PostgreSQL the rollup is locked against concurrent upserts first,
+        so writes during the rebuild are applied after it, not lost.
+        
+        Returns:
+            Number of rollup rows written
+        """
+        if db.get_bind().dialect.name == 'postgresql':
+            db.execute(text("LOCK TABLE change_daily_rollup IN EXCLUSIVE MODE"))
+        
+        db.query(ChangeDailyRollup).delete(synchronize_session=False)
+        counts = RollupService._scan(db)
+        RollupService.apply(db, counts)
+        db.commit()
+        
+        logger.info("Rebuilt change_daily_rollup: %d rows", len(counts))
+        return len(counts)
+    
+    @staticmethod
+    def drift(db: Session) -> Dict[RollupKey, Tuple[int, int]]:
+        """
+        Keys where the rollup disagrees with the changes table.
+        
+        Returns:
+            Mapping of key to (rollup count, actual count)
+        """
+        actual = RollupService._scan(db)
+        stored = Counter()
+        for row in db.query(ChangeDailyRollup).filter(ChangeDailyRollup.changes != 0):
+            stored[(row.day, row.category, row.status, row.impact_level, row.system)] = row.changes
+        return {
+            key: (stored.get(key, 0), actual.get(key, 0))
+            for key in set(stored) | set(actual)
+            if stored.get(key, 0) != actual.get(key, 0)
+        }
+    
+    @staticmethod
+    def status_totals(
+        db: Session,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        system: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Change counts by status for created days in [start, end].
+        
+        Args:
+            db: Database session
+            start: First day (inclusive)
+            end: Last day (inclusive)
+            system: Only changes touching this system
+        """
+        query = db.query(ChangeDailyRollup.status, func.sum(ChangeDailyRollup.changes)).filter(
+            ChangeDailyRollup.system == (system or ALL_SYSTEMS)
+        )
+        if start:
+            query = query.filter(ChangeDailyRollup.day >= start)
+        if end:
+            query = query.filter(ChangeDailyRollup.day <= end)
+        
+        return {status: int(total) for status, total in query.group_by(ChangeDailyRollup.status) if total}
+    
+    @staticmethod
+    def dashboard_summary(db: Session) -> dict:
+        """Figures for the dashboard summary widgets."""
+        today = datetime.now(timezone.utc).date()
+        by_status = RollupService.status_totals(db)
+        last_30_days = RollupService.status_totals(db, start=today - timedelta(days=29))
+        
+        return {
+            'total': sum(by_status.values()),
+            'by_status': by_status,
+            'last_7_days': sum(RollupService.status_totals(db, start=today - timedelta(days=6)).values()),
+            'failed_30_days': last_30_days.get('Failed', 0) + last_30_days.get('Rolled Back', 0),
+        }
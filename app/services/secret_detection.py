@@ -1,5 +1,9 @@
+import codecs
 import re
-from typing import List, Tuple
+import hashlib
+import json
+from typing import Dict, List, Tuple
+from app.metrics import SECRET_DETECTION_HITS
 
 
 class SecretDetector:
@@ -26,6 +30,48 @@ class SecretDetector:
         (r'PRIVATE KEY.*-----END', 'Private key block'),
     ]
     
+    # Fields to scan for secrets
+    SCAN_FIELDS = [
+        'what_changed',
+        'backout_plan',
+        'outcome_notes',
+        'post_change_issues',
+        'links',
+    ]
+    
+    # Regex flags used by scan(), expressed as JavaScript RegExp flags
+    JS_FLAGS = 'im'
+    
+    # Python-only regex syntax the browser RegExp engine cannot run
+    # (named groups, inline flags, \A / \Z anchors)
+    _PYTHON_ONLY_SYNTAX = re.compile(r'\(\?P[<=>]|\(\?[aiLmsux]+[):-]|\\[AZ]')
+    
+    _export_cache = None
+    
+    _compiled_patterns = None
+    
+    _combined_pattern = None
+    
+    @classmethod
+    def _get_compiled_patterns(cls) -> List[Tuple[re.Pattern, str]]:
+        """Compile PATTERNS on first use."""
+        if cls._compiled_patterns is None:
+            cls._compiled_patterns = [
+                (re.compile(pattern, re.IGNORECASE | re.MULTILINE), name)
+                for pattern, name in cls.PATTERNS
+            ]
+        return cls._compiled_patterns
+    
+    @classmethod
+    def _get_combined_pattern(cls) -> re.Pattern:
+        """Single alternation of all PATTERNS, used to pre-filter batches."""
+        if cls._combined_pattern is None:
+            cls._combined_pattern = re.compile(
+                '|'.join(f'(?:{pattern})' for pattern, _ in cls.PATTERNS),
+                re.IGNORECASE | re.MULTILINE
+            )
+        return cls._combined_pattern
+    
     @classmethod
     def scan(cls, text: str) -> List[Tuple[str, str]]:
         """
@@ -41,11 +87,9 @@ class SecretDetector:
             return []
         
         findings = []
-        text_lower = text.lower()
         
-        for pattern, name in cls.PATTERNS:
-            matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-            for match in matches:
+        for regex, name in cls._get_compiled_patterns():
+            for match in regex.finditer(text):
                 # Create a preview (first 50 chars of match)
                 preview = match.group(0)[:50]
                 if len(match.group(0)) > 50:
@@ -65,18 +109,9 @@ class SecretDetector:
         Returns:
             Tuple of (has_secrets: bool, findings: List)
         """
-        # Fields to scan for secrets
-        fields_to_scan = [
-            'what_changed',
-            'backout_plan',
-            'outcome_notes',
-            'post_change_issues',
-            'links',
-        ]
-        
         all_findings = []
         
-        for field in fields_to_scan:
+        for field in cls.SCAN_FIELDS:
             value = change_data.get(field)
             if value:
                 # Handle both string and list values
@@ -88,4 +123,135 @@ class SecretDetector:
                 findings = cls.scan(value)
                 all_findings.extend(findings)
         
+        for name, _ in all_findings:
+            SECRET_DETECTION_HITS.labels(pattern=name).inc()
+        
         return len(all_findings) > 0, all_findings
+    
+    @classmethod
+    def find_secrets_batch(cls, records: List[dict]) -> Dict[int, List[Tuple[str, str]]]:
+        """
+        Check many change records at once (bulk import).
+        
+        Each record's fields are searched once with a combined pattern; only
+        records that match are scanned pattern by pattern for findings.
+        
+        Args:
+            records: Change field dictionaries
+            
+        Returns:
+            Dictionary mapping record index to findings, for records with findings
+        """
+        combined = cls._get_combined_pattern()
+        results = {}
+        
+        for index, record in enumerate(records):
+            parts = []
+            for field in cls.SCAN_FIELDS:
+                value = record.get(field)
+                if value:
+                    parts.append(' '.join(str(v) for v in value) if isinstance(value, list) else str(value))
+            
+            if parts and combined.search('\n'.join(parts)):
+                has_secrets, findings = cls.has_secrets(record)
+                if has_secrets:
+                    results[index] = findings
+        
+        return results
+    
+    @classmethod
+    def scanner(cls) -> 'SecretScanner':
+        """Incremental scanner for text arriving in chunks (attachment uploads)."""
+        return SecretScanner(cls)
+    
+    @classmethod
+    def is_js_compatible(cls, pattern: str) -> bool:
+        """Check whether a pattern can be compiled as a JavaScript RegExp."""
+        return cls._PYTHON_ONLY_SYNTAX.search(pattern) is None
+    
+    @classmethod
+    def export_patterns(cls) -> dict:
+        """
+        Export the JavaScript-compatible subset of PATTERNS for the wizard.
+        
+        The version is a hash of the exported content, so clients can cache
+        the export indefinitely under a versioned URL.
+        
+        Returns:
+            Dictionary with version, flags, fields and patterns
+        """
+        if cls._export_cache is None:
+            patterns = [
+                {'name': name, 'pattern': pattern}
+                for pattern, name in cls.PATTERNS
+                if cls.is_js_compatible(pattern)
+            ]
+            payload = {
+                'flags': cls.JS_FLAGS,
+                'fields': cls.SCAN_FIELDS,
+                'patterns': patterns,
+            }
+            digest = hashlib.sha256(
+                json.dumps(payload, sort_keys=True).encode('utf-8')
+            ).hexdigest()
+            cls._export_cache = {'version': digest[:12], **payload}
+        
+        return cls._export_cache
+
+
+class SecretScanner:
+    """
+    Scan a UTF-8 stream for secrets without holding all of it.
+    
+    Bytes are decoded incrementally and scanned a block of whole lines at
+    a time, so memory stays bounded by the chunk size plus one line. Some
+    patterns span lines (``password:`` then the value on the next one), so
+    each block is scanned together with the last OVERLAP characters of the
+    previous one; a single line longer than MAX_PENDING is scanned in
+    pieces that overlap the same way. Findings seen twice are reported once.
+    """
+    
+    MAX_PENDING = 256 * 1024
+    OVERLAP = 1024
+    
+    def __init__(self, detector=SecretDetector):
+        self.detector = detector
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ''
+        self._tail = ''
+        self._findings: Dict[Tuple[str, str], None] = {}
+    
+    def _scan(self, text: str) -> None:
+        block = self._tail + text
+        self._tail = block[-self.OVERLAP:]
+        # Cheap combined pre-check; most blocks have no candidates at all
+        if block and self.detector._get_combined_pattern().search(block):
+            for finding in self.detector.scan(block):
+                self._findings.setdefault(finding)
+    
+    def feed(self, chunk: bytes) -> None:
+        """Scan the complete lines available after ``chunk``."""
+        text = self._pending + self._decoder.decode(chunk)
+        cut = text.rfind('\n') + 1
+        if cut:
+            self._scan(text[:cut])
+            self._pending = text[cut:]
+        elif len(text) > self.MAX_PENDING:
+            self._scan(text)
+            self._pending = ''
+        else:
+            self._pending = text
+    
+    def finish(self) -> List[Tuple[str, str]]:
+        """
+        Scan what's left and return the findings.
+        
+        Returns:
+            List of tuples (pattern_name, matched_text_preview), without repeats
+        """
+        self._scan(self._pending + self._decoder.decode(b'', final=True))
+        self._pending = ''
+        findings = list(self._findings)
+        for name, _ in findings:
+            SECRET_DETECTION_HITS.labels(pattern=name).inc()
+        return findings
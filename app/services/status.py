@@ -0,0 +1,195 @@
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Integer, any_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.models import Change
+from app.cache import cache
+from app.events import change_event, change_events
+from app.services.audit import AuditService
+from app.services.rollup import RollupService
+
+
+class ChangeStatusService:
+    """Status transitions for change records."""
+
+    # Allowed next statuses for each status
+    ALLOWED_TRANSITIONS = {
+        'Planned': {'In Progress', 'Completed', 'Failed'},
+        'In Progress': {'Completed', 'Rolled Back', 'Failed'},
+        'Completed': {'Rolled Back'},
+        'Rolled Back': {'Planned'},
+        'Failed': {'Planned', 'Rolled Back'},
+    }
+
+    @staticmethod
+    def allowed_from(new_status: str) -> List[str]:
+        """Statuses from which a change may move to ``new_status``."""
+        return sorted(
+            status for status, targets in ChangeStatusService.ALLOWED_TRANSITIONS.items()
+            if new_status in targets
+        )
+
+    @staticmethod
+    def _id_filter(db: Session, change_ids: List[int]):
+        """``id = ANY(:ids)`` with one array parameter on PostgreSQL, ``IN`` elsewhere."""
+        if db.get_bind().dialect.name == 'postgresql':
+            return Change.id == any_(bindparam('change_ids', change_ids, type_=ARRAY(Integer)))
+        return Change.id.in_(change_ids)
+
+    @staticmethod
+    def _update_statuses(
+        db: Session,
+        change_ids: List[int],
+        current: dict,
+        allowed_from: List[str],
+        values: dict
+    ) -> Tuple[list, dict]:
+        """
+        Update the changes still in an allowed status.
+
+        On PostgreSQL the rows are locked by a ``SELECT ... FOR UPDATE`` in
+        a CTE and the UPDATE returns the status it replaced, so a concurrent
+        transaction that moved a change after our first read can't make the
+        rollup decrement the wrong status. Elsewhere (SQLite's RETURNING
+        can't reference another table) each change is only updated if it is
+        still in the status read, one UPDATE per status.
+
+        Returns:
+            Updated rows, and the status each had before by change ID
+        """
+        returning = (
+            Change.id, Change.title, Change.category, Change.impact_level, Change.status,
+            Change.implementer, Change.systems_affected, Change.ticket_id, Change.created_at
+        )
+
+        if db.get_bind().dialect.name == 'postgresql':
+            locked = (
+                select(Change.id, Change.status)
+                .where(ChangeStatusService._id_filter(db, change_ids))
+                .where(Change.status.in_(allowed_from))
+                .with_for_update()
+                .cte('locked')
+            )
+            rows = db.execute(
+                update(Change)
+                .where(Change.id == locked.c.id)
+                .values(**values)
+                .returning(*returning, locked.c.status.label('previous_status'))
+                .execution_options(synchronize_session=False)
+            ).all()
+            return rows, {row.id: row.previous_status for row in rows}
+
+        rows, previous = [], {}
+        by_status = defaultdict(list)
+        for change_id in change_ids:
+            by_status[current[change_id]].append(change_id)
+        for status, ids in by_status.items():
+            updated = db.execute(
+                update(Change)
+                .where(Change.id.in_(ids))
+                .where(Change.status == status)
+                .values(**values)
+                .returning(*returning)
+                .execution_options(synchronize_session=False)
+            ).all()
+            rows.extend(updated)
+            previous.update((row.id, status) for row in updated)
+        return rows, previous
+
+    @staticmethod
+    def bulk_update(
+        db: Session,
+        change_ids: List[int],
+        new_status: str,
+        user: dict,
+        outcome_notes: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ) -> dict:
+        """
+        Move many changes to ``new_status`` in one set-based UPDATE.
+
+        The UPDATE only matches rows whose current status allows the
+        transition, so a concurrent change between the read and the write
+        cannot produce an invalid transition. Audit entries for all updated
+        changes are written with one multi-row INSERT and committed together
+        with the UPDATE, along with the daily rollup and live dashboard
+        events.
+
+        Args:
+            db: Database session
+            change_ids: Changes to update
+            new_status: Target status value
+            user: Acting user (session dict)
+            outcome_notes: Replaces outcome notes when given
+            ip_address: Client IP for the audit entries
+
+        Returns:
+            Dictionary with updated IDs and skipped IDs with reasons
+        """
+        change_ids = sorted(set(change_ids))
+        allowed_from = ChangeStatusService.allowed_from(new_status)
+
+        current = dict(db.execute(
+            select(Change.id, Change.status).where(ChangeStatusService._id_filter(db, change_ids))
+        ).all())
+
+        skipped = []
+        for change_id in change_ids:
+            if change_id not in current:
+                skipped.append({'id': change_id, 'reason': 'Change not found'})
+            elif current[change_id].value not in allowed_from:
+                skipped.append({
+                    'id': change_id,
+                    'reason': f"Cannot move from {current[change_id].value} to {new_status}"
+                })
+
+        candidates = [change_id for change_id in change_ids if change_id in current and
+                      current[change_id].value in allowed_from]
+
+        updated = []
+        if candidates:
+            values = {'status': new_status, 'updated_at': func.now()}
+            if outcome_notes is not None:
+                values['outcome_notes'] = outcome_notes
+
+            rows, previous = ChangeStatusService._update_statuses(db, candidates, current, allowed_from, values)
+            updated = sorted(row.id for row in rows)
+            
+            # Decrement the status each row really had when it was updated,
+            # which may differ from the read above
+            RollupService.record_status_changes(db, rows, previous)
+            cache.invalidate(db, 'dashboard')
+            
+            # Live dashboards see the new status once this commits
+            for row in rows:
+                change_events.queue(db, change_event('updated', row))
+
+            for change_id in sorted(set(candidates) - set(updated)):
+                skipped.append({'id': change_id, 'reason': 'Status changed concurrently'})
+
+            AuditService.log_actions_bulk(
+                db=db,
+                action='edit',
+                user=user,
+                entries=[
+                    (change_id, {
+                        'field': 'status',
+                        'from': previous[change_id].value,
+                        'to': new_status,
+                        'bulk': True,
+                    })
+                    for change_id in updated
+                ],
+                ip_address=ip_address
+            )
+
+        db.commit()
+
+        return {
+            'status': new_status,
+            'updated': updated,
+            'skipped': sorted(skipped, key=lambda s: s['id']),
+        }
@@ -0,0 +1,51 @@
+// Change attachments: upload the raw file body (streamed to disk server-side)
+
+document.addEventListener('DOMContentLoaded', function() {
+    const button = document.getElementById('attachmentUpload');
+    if (!button) return;
+    button.addEventListener('click', () => uploadAttachment());
+});
+
+async function uploadAttachment(confirmNoSecrets = false) {
+    const section = document.getElementById('attachments');
+    const file = document.getElementById('attachmentFile').files[0];
+    const button = document.getElementById('attachmentUpload');
+    const result = document.getElementById('attachmentResult');
+    
+    if (!file) return;
+    
+    const params = new URLSearchParams({ filename: file.name });
+    if (confirmNoSecrets === true) params.set('confirm_no_secrets', 'true');
+    
+    button.disabled = true;
+    result.textContent = 'Uploading...';
+    
+    try {
+        const response = await fetch(`/changes/${section.dataset.changeId}/attachments?` + params.toString(), {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': file.type || 'application/octet-stream',
+                'Accept': 'application/json'
+            },
+            body: file
+        });
+        const data = await response.json();
+        
+        if (!response.ok) {
+            const detail = typeof data.detail === 'string' ? data.detail : 'Upload failed';
+            if (detail.includes('secret') && confirm(`${detail}\n\nUpload anyway?`)) {
+                button.disabled = false;
+                return uploadAttachment(true);
+            }
+            result.textContent = detail;
+            return;
+        }
+        
+        window.location.reload();
+    } catch (error) {
+        result.textContent = 'Upload failed: ' + error;
+    } finally {
+        button.disabled = false;
+    }
+}
@@ -0,0 +1,160 @@
+// Dashboard multi-select, bulk status update and live updates
+
+document.addEventListener('DOMContentLoaded', function() {
+    subscribeToChanges();
+    document.querySelectorAll('[data-calendar-feed]').forEach(button => {
+        button.addEventListener('click', () => showCalendarFeed(button.dataset.calendarFeed === 'mine'));
+    });
+    const resetFeeds = document.getElementById('resetCalendarFeeds');
+    if (resetFeeds) resetFeeds.addEventListener('click', resetCalendarFeeds);
+    
+    const bar = document.getElementById('bulkActions');
+    if (!bar) return;
+    
+    const selectAll = document.getElementById('selectAll');
+    const boxes = Array.from(document.querySelectorAll('.select-change'));
+    
+    selectAll.addEventListener('change', () => {
+        boxes.forEach(box => { box.checked = selectAll.checked; });
+        updateBulkBar();
+    });
+    boxes.forEach(box => box.addEventListener('change', updateBulkBar));
+    
+    document.getElementById('bulkApply').addEventListener('click', applyBulkStatus);
+});
+
+function selectedChangeIds() {
+    return Array.from(document.querySelectorAll('.select-change:checked'))
+        .map(box => parseInt(box.value, 10));
+}
+
+function updateBulkBar() {
+    const ids = selectedChangeIds();
+    const boxes = document.querySelectorAll('.select-change');
+    
+    document.getElementById('bulkActions').hidden = ids.length === 0;
+    document.getElementById('bulkCount').textContent = `${ids.length} selected`;
+    document.getElementById('selectAll').checked = ids.length > 0 && ids.length === boxes.length;
+}
+
+async function applyBulkStatus(confirmNoSecrets = false) {
+    const ids = selectedChangeIds();
+    const status = document.getElementById('bulkStatus').value;
+    const outcomeNotes = document.getElementById('bulkOutcomeNotes').value.trim();
+    const button = document.getElementById('bulkApply');
+    const result = document.getElementById('bulkResult');
+    
+    if (ids.length === 0) return;
+    if (confirmNoSecrets !== true && !confirm(`Move ${ids.length} change(s) to ${status}?`)) return;
+    
+    button.disabled = true;
+    result.textContent = 'Updating...';
+    
+    try {
+        const response = await fetch('/changes/bulk-status', {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            body: JSON.stringify({
+                change_ids: ids,
+                status: status,
+                outcome_notes: outcomeNotes || null,
+                confirm_no_secrets: confirmNoSecrets === true
+            })
+        });
+        const data = await response.json();
+        
+        if (!response.ok) {
+            const detail = typeof data.detail === 'string' ? data.detail : 'Update failed';
+            if (detail.includes('secret') && confirm(`${detail}\n\nUpdate anyway?`)) {
+                button.disabled = false;
+                return applyBulkStatus(true);
+            }
+            result.textContent = detail;
+            return;
+        }
+        
+        if (data.skipped.length === 0) {
+            window.location.reload();
+            return;
+        }
+        
+        const reasons = data.skipped.map(s => `#${s.id}: ${s.reason}`).join('\n');
+        alert(`Updated ${data.updated.length} change(s). Skipped ${data.skipped.length}:\n${reasons}`);
+        window.location.reload();
+    } catch (error) {
+        result.textContent = 'Update failed: ' + error;
+    } finally {
+        button.disabled = false;
+    }
+}
+
+function subscribeToChanges() {
+    if (!window.EventSource || !document.getElementById('liveBanner')) return;
+    
+    // Same filters as the page, so only matching changes are pushed
+    const params = new URLSearchParams(window.location.search);
+    params.delete('page');
+    const source = new EventSource('/changes/events?' + params.toString());
+    let newChanges = 0;
+    
+    source.addEventListener('change', event => {
+        const change = JSON.parse(event.data);
+        
+        if (change.type === 'created') {
+            newChanges += 1;
+            document.getElementById('liveBannerText').textContent =
+                `${newChanges} new change${newChanges === 1 ? '' : 's'}`;
+            document.getElementById('liveBanner').hidden = false;
+            return;
+        }
+        
+        const row = document.querySelector(`tr[data-change-id="${change.id}"]`);
+        if (!row) return;
+        const badge = row.querySelector('.change-status');
+        badge.textContent = change.status;
+        badge.className = 'badge change-status badge-status-' + change.status.toLowerCase().replace(/ /g, '-');
+    });
+    
+    // Events were dropped for this client; the page is no longer trustworthy
+    source.addEventListener('resync', () => {
+        source.close();
+        window.location.reload();
+    });
+}
+
+async function showCalendarFeed(mine) {
+    const params = new URLSearchParams(window.location.search);
+    ['page', 'search', 'start_date', 'end_date'].forEach(key => params.delete(key));
+    if (mine) params.set('mine', 'true');
+    
+    const response = await fetch('/calendar/subscribe?' + params.toString(), {
+        credentials: 'same-origin',
+        headers: { 'Accept': 'application/json' }
+    });
+    if (!response.ok) {
+        alert('Could not create a calendar feed');
+        return;
+    }
+    const data = await response.json();
+    
+    // Outlook: Add calendar > Subscribe from web, then paste the URL
+    if (navigator.clipboard) {
+        navigator.clipboard.writeText(data.url).catch(() => {});
+    }
+    prompt('Calendar feed URL (copied). Add it in Outlook via "Subscribe from web". Anyone with this URL can read the feed.', data.url);
+}
+
+async function resetCalendarFeeds() {
+    if (!confirm('Stop every calendar feed URL you have created? Calendars subscribed to them will stop updating.')) return;
+    
+    const response = await fetch('/calendar/feeds/reset', {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Accept': 'application/json' }
+    });
+    alert(response.ok ? 'Your calendar feed URLs were reset. Subscribe again to get a new one.' : 'Could not reset calendar feeds');
+}
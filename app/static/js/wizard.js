@@ -4,11 +4,24 @@ let currentStep = 1;
 let systemsTags = [];
 let linksTags = [];
 
+// Client-side secret pre-scan state
+let secretPatterns = [];
+let secretFields = [];
+const secretFindings = {};
+const secretScanTimeouts = {};
+const SECRET_SCAN_DELAY = 300;
+
+// Schedule-conflict check state
+let conflictCheckTimeout = null;
+const CONFLICT_CHECK_DELAY = 400;
+
 // Load draft from localStorage on page load
 document.addEventListener('DOMContentLoaded', function() {
     loadDraft();
     setupTagInputs();
     setupBackoutValidation();
+    loadSecretPatterns();
+    setupConflictCheck();
 });
 
 // Navigation functions
@@ -146,6 +159,8 @@ function renderSystemsTags() {
         `;
         container.appendChild(tagEl);
     });
+    
+    scheduleConflictCheck();
 }
 
 function renderLinksTags() {
@@ -161,6 +176,8 @@ function renderLinksTags() {
         `;
         container.appendChild(tagEl);
     });
+    
+    scheduleSecretScan('links');
 }
 
 function removeSystemTag(index) {
@@ -196,6 +213,179 @@ function checkBackoutRequired() {
     }
 }
 
+// Schedule-conflict check
+function setupConflictCheck() {
+    ['planned_start', 'planned_end'].forEach(id => {
+        document.getElementById(id).addEventListener('change', scheduleConflictCheck);
+    });
+}
+
+function scheduleConflictCheck() {
+    clearTimeout(conflictCheckTimeout);
+    conflictCheckTimeout = setTimeout(checkConflicts, CONFLICT_CHECK_DELAY);
+}
+
+async function checkConflicts() {
+    const warning = document.getElementById('conflict-warning');
+    const plannedStart = document.getElementById('planned_start').value;
+    
+    if (!plannedStart || systemsTags.length === 0) {
+        warning.style.display = 'none';
+        return;
+    }
+    
+    const params = new URLSearchParams();
+    systemsTags.forEach(tag => params.append('systems', tag));
+    params.append('planned_start', plannedStart);
+    params.append('planned_end', document.getElementById('planned_end').value);
+    
+    try {
+        const response = await fetch('/changes/conflicts?' + params.toString(), {
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' }
+        });
+        if (!response.ok) return;
+        const data = await response.json();
+        
+        const list = document.getElementById('conflict-list');
+        list.innerHTML = '';
+        data.conflicts.forEach(conflict => {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = `/changes/${conflict.id}`;
+            link.target = '_blank';
+            link.textContent = `#${conflict.id} ${conflict.title}`;
+            item.appendChild(link);
+            item.appendChild(document.createTextNode(
+                ` (${conflict.status}, ${conflict.systems.join(', ')}, ` +
+                `${conflict.planned_start.replace('T', ' ').substring(0, 16)})`
+            ));
+            list.appendChild(item);
+        });
+        warning.style.display = data.conflicts.length ? 'block' : 'none';
+    } catch (error) {
+        console.warn('Conflict check unavailable:', error);
+    }
+}
+
+// Secret pre-scan
+// Mirrors SecretDetector on the server so most rejections never need a
+// round trip. The server check in create_change stays authoritative.
+function loadSecretPatterns() {
+    const url = document.getElementById('wizardForm').dataset.secretPatternsUrl;
+    if (!url) return;
+    
+    fetch(url, { credentials: 'same-origin' })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data) return;
+            
+            secretPatterns = data.patterns.map(p => {
+                try {
+                    return { name: p.name, regex: new RegExp(p.pattern, data.flags + 'g') };
+                } catch (e) {
+                    console.warn('Skipping secret pattern:', p.name, e);
+                    return null;
+                }
+            }).filter(Boolean);
+            secretFields = data.fields;
+            
+            secretFields.forEach(field => {
+                const el = document.getElementById(field);
+                if (el) {
+                    el.addEventListener('input', () => scheduleSecretScan(field));
+                }
+                scanSecretField(field);
+            });
+        })
+        .catch(error => console.warn('Secret pre-scan unavailable:', error));
+}
+
+function getSecretFieldText(field) {
+    if (field === 'links') {
+        return linksTags.join(' ');
+    }
+    const el = document.getElementById(field);
+    return el ? el.value : '';
+}
+
+function scheduleSecretScan(field) {
+    if (!secretPatterns.length) return;
+    
+    clearTimeout(secretScanTimeouts[field]);
+    secretScanTimeouts[field] = setTimeout(() => scanSecretField(field), SECRET_SCAN_DELAY);
+}
+
+function scanSecretField(field) {
+    clearTimeout(secretScanTimeouts[field]);
+    
+    const text = getSecretFieldText(field);
+    const findings = [];
+    
+    if (text) {
+        secretPatterns.forEach(({ name, regex }) => {
+            regex.lastIndex = 0;
+            let match;
+            while ((match = regex.exec(text)) !== null) {
+                if (match[0].length === 0) {
+                    regex.lastIndex++;
+                    continue;
+                }
+                const preview = match[0].substring(0, 50) + (match[0].length > 50 ? '...' : '');
+                findings.push([name, preview]);
+            }
+        });
+    }
+    
+    secretFindings[field] = findings;
+    renderSecretHint(field, findings);
+    updateSecretWarning();
+}
+
+function flushSecretScans() {
+    secretFields.forEach(field => scanSecretField(field));
+}
+
+function renderSecretHint(field, findings) {
+    const el = document.getElementById(field === 'links' ? 'links-tags' : field);
+    if (!el) return;
+    
+    const group = el.closest('.form-group');
+    let hint = group.querySelector('.secret-hint');
+    
+    if (!findings.length) {
+        if (hint) hint.remove();
+        return;
+    }
+    
+    if (!hint) {
+        hint = document.createElement('p');
+        hint.className = 'secret-hint';
+        group.appendChild(hint);
+    }
+    const names = [...new Set(findings.map(([name]) => name))];
+    hint.textContent = '⚠️ Possible secret: ' + names.join(', ');
+}
+
+function getAllSecretFindings() {
+    return Object.values(secretFindings).flat();
+}
+
+function updateSecretWarning() {
+    const warning = document.getElementById('secret-warning');
+    const findings = getAllSecretFindings();
+    
+    if (findings.length) {
+        const findingsText = findings.map(([name, preview]) => `${name}: ${preview}`).join(', ');
+        document.getElementById('secret-details').textContent = `Potential secrets detected: ${findingsText}`;
+        warning.style.display = 'block';
+        warning.dataset.source = 'client';
+    } else if (warning.dataset.source === 'client') {
+        warning.style.display = 'none';
+        delete warning.dataset.source;
+    }
+}
+
 // Draft persistence
 function saveDraft() {
     const formData = {
@@ -273,6 +463,14 @@ document.getElementById('wizardForm').addEventListener('submit', async function(
         return;
     }
     
+    // Block on client-side secret findings until the user confirms
+    flushSecretScans();
+    const confirmNoSecrets = document.getElementById('confirm_no_secrets');
+    if (getAllSecretFindings().length && !confirmNoSecrets.checked) {
+        document.getElementById('secret-warning').scrollIntoView({ behavior: 'smooth' });
+        return;
+    }
+    
     // Prepare form data
     const formData = new FormData();
     
@@ -327,7 +525,9 @@ document.getElementById('wizardForm').addEventListener('submit', async function(
             
             // Check for secret detection
             if (result.detail && result.detail.includes('secret')) {
-                document.getElementById('secret-warning').style.display = 'block';
+                const warning = document.getElementById('secret-warning');
+                warning.style.display = 'block';
+                warning.dataset.source = 'server';
                 document.getElementById('secret-details').textContent = result.detail;
             } else {
                 alert('Error: ' + (result.detail || 'Failed to create change record'));
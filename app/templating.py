@@ -0,0 +1,58 @@
+import logging
+import os
+import time
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.assets import assets
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+TEMPLATE_DIR = "app/templates"
+
+
+def create_environment() -> Environment:
+    """
+    Jinja2 environment shared by every router.
+    
+    Compiled templates are cached on disk (keyed by template source), so a
+    restarted worker loads bytecode instead of recompiling. Auto-reload is
+    off unless TEMPLATE_AUTO_RELOAD is set (development).
+    """
+    bytecode_cache = None
+    if settings.template_cache_dir:
+        os.makedirs(settings.template_cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(settings.template_cache_dir)
+    
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=True,
+        auto_reload=settings.template_auto_reload,
+        bytecode_cache=bytecode_cache
+    )
+    env.globals['asset_url'] = assets.url
+    return env
+
+
+templates = Jinja2Templates(env=create_environment())
+
+
+def precompile_templates() -> dict:
+    """
+    Load every template once so the first request doesn't pay for it.
+    
+    Returns:
+        Template count and elapsed milliseconds
+    """
+    start = time.perf_counter()
+    names = templates.env.list_templates(extensions=['html'])
+    for name in names:
+        templates.env.get_template(name)
+    
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info("Precompiled %d templates in %.1f ms", len(names), elapsed_ms)
+    return {'templates': len(names), 'ms': elapsed_ms}
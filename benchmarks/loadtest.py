@@ -0,0 +1,314 @@
+"""
+End-to-end HTTP load test against a running multi-worker server.
+
+Starts ``uvicorn app.main:app --workers N`` on a free port (or targets
+``--url``), then drives a weighted mix of dashboard, detail, PDF, CSV and
+create requests from ``--concurrency`` simulated users and reports p50/p95/p99
+latency, throughput and error rate per route.
+
+Authentication is stubbed by session injection: the harness signs session
+cookies for auditor, user and admin personas with the same SECRET_KEY the
+server uses, so requests look like signed-in Entra users and no IdP is
+contacted. When the harness starts the server it generates a throwaway
+SECRET_KEY; never point ``--url`` at a deployment whose key you would reuse.
+
+Usage:
+    DATABASE_URL=sqlite:///bench.db python benchmarks/loadtest.py --workers 4 --concurrency 32
+    python benchmarks/loadtest.py --duration 60 --mix dashboard=60,detail=20,pdf=10,csv=2,create=8
+    SECRET_KEY=... python benchmarks/loadtest.py --url http://localhost:8000 --output load.json
+
+Seed the database first with benchmarks/seed.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from base64 import b64encode
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from itsdangerous import TimestampSigner
+from sqlalchemy import create_engine, text
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MIX = 'dashboard=55,detail=20,pdf=10,csv=3,create=12'
+
+PERSONAS = {
+    'auditor': {'sub': 'load-auditor', 'email': 'auditor@district.example.org', 'name': 'Load Auditor', 'role': 'auditor'},
+    'user': {'sub': 'load-user', 'email': 'tech@district.example.org', 'name': 'Load Tech', 'role': 'user'},
+    'admin': {'sub': 'load-admin', 'email': 'admin@district.example.org', 'name': 'Load Admin', 'role': 'admin'},
+}
+
+DASHBOARD_PARAMS = [
+    {},
+    {'category': 'Network'},
+    {'status': 'Completed', 'impact_level': 'High'},
+    {'search': 'firmware'},
+    {'page': 5},
+]
+
+
+def session_cookie(secret_key: str, user: dict) -> str:
+    """Sign a session the same way Starlette's SessionMiddleware does."""
+    data = b64encode(json.dumps({'user': user}).encode('utf-8'))
+    return TimestampSigner(secret_key).sign(data).decode('utf-8')
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Parse ``route=weight,...`` into a dict."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = int(weight)
+    unknown = set(weights) - {'dashboard', 'detail', 'pdf', 'csv', 'create'}
+    if unknown:
+        raise ValueError(f"Unknown routes in mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+def change_id_range(database_url: str) -> tuple[int, int]:
+    """Smallest and largest change id, for detail and PDF requests."""
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            low, high = conn.execute(text("SELECT MIN(id), MAX(id) FROM changes")).one()
+    finally:
+        engine.dispose()
+    if low is None:
+        raise SystemExit("No changes in the database; run benchmarks/seed.py first")
+    return low, high
+
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, secret_key: str) -> subprocess.Popen:
+    """Start uvicorn with the harness's SECRET_KEY."""
+    env = os.environ.copy()
+    env['SECRET_KEY'] = secret_key
+    # A handful of personas generate all the load; per-user limits would cap it
+    env.setdefault('RATE_LIMIT_ENABLED', 'false')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=REPO_ROOT,
+        env=env
+    )
+
+
+async def wait_healthy(base_url: str, timeout: float = 60.0) -> None:
+    """Poll /health until the server answers."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f'{base_url}/health')).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise SystemExit(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+class LoadTest:
+    """Weighted request mix driven by concurrent simulated users."""
+
+    def __init__(self, base_url: str, secret_key: str, cookie_name: str, mix: dict[str, int],
+                 id_range: tuple[int, int], seed: int = 42):
+        self.base_url = base_url
+        self.mix = mix
+        self.id_range = id_range
+        self.rng = random.Random(seed)
+        self.cookies = {
+            role: f'{cookie_name}={session_cookie(secret_key, user)}' for role, user in PERSONAS.items()
+        }
+        self.latencies: dict[str, list[float]] = {route: [] for route in mix}
+        self.errors: dict[str, int] = {route: 0 for route in mix}
+        self.error_samples: dict[str, str] = {}
+
+    def next_request(self) -> tuple[str, str, str, dict]:
+        """
+        Choose the next request from the mix.
+        
+        Returns:
+            (route, persona, method, httpx request kwargs)
+        """
+        route = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        change_id = self.rng.randint(*self.id_range)
+        
+        if route == 'dashboard':
+            persona = self.rng.choice(['auditor', 'user'])
+            return route, persona, 'GET', {'url': '/', 'params': self.rng.choice(DASHBOARD_PARAMS)}
+        if route == 'detail':
+            return route, self.rng.choice(['auditor', 'user']), 'GET', {'url': f'/changes/{change_id}'}
+        if route == 'pdf':
+            return route, self.rng.choice(['auditor', 'user']), 'GET', {'url': f'/changes/{change_id}/pdf'}
+        if route == 'csv':
+            today = datetime.now().date()
+            params = {'start': str(today - timedelta(days=30)), 'end': str(today)}
+            return route, 'admin', 'GET', {'url': '/reports/changes.csv', 'params': params}
+        
+        return route, 'user', 'POST', {'url': '/changes', 'data': {
+            'title': f'Load test change {change_id}',
+            'category': 'Network',
+            'systems_affected': ['WiFi'],
+            'implementer': PERSONAS['user']['email'],
+            'impact_level': 'Low',
+            'user_impact': 'None',
+            'what_changed': 'Updated controller firmware during the load test',
+            'status': 'Completed',
+        }}
+
+    async def worker(self, client: httpx.AsyncClient, deadline: float, remaining: list[int]) -> None:
+        """One simulated user issuing requests back to back."""
+        while time.monotonic() < deadline:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+            
+            route, persona, method, kwargs = self.next_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, headers={'cookie': self.cookies[persona]}, **kwargs)
+                await response.aread()
+                failed = response.status_code >= 400
+                detail = f'HTTP {response.status_code}'
+            except httpx.HTTPError as e:
+                failed = True
+                detail = type(e).__name__
+            self.latencies[route].append((time.perf_counter() - start) * 1000)
+            
+            if failed:
+                self.errors[route] += 1
+                self.error_samples.setdefault(route, detail)
+
+    async def run(self, concurrency: int, duration: float, max_requests: int) -> float:
+        """
+        Run the load test.
+        
+        Returns:
+            Wall-clock seconds elapsed
+        """
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60.0) as client:
+            deadline = time.monotonic() + duration
+            remaining = [max_requests or sys.maxsize]
+            start = time.perf_counter()
+            await asyncio.gather(*(self.worker(client, deadline, remaining) for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> dict:
+        """Per-route and overall latency percentiles, throughput and error rates."""
+        def summarize(latencies: list[float], errors: int) -> dict:
+            if not latencies:
+                return {'requests': 0}
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+            return {
+                'requests': len(latencies),
+                'errors': errors,
+                'error_rate': round(errors / len(latencies), 4),
+                'throughput_rps': round(len(latencies) / elapsed, 2),
+                'p50_ms': round(cuts[49], 2),
+                'p95_ms': round(cuts[94], 2),
+                'p99_ms': round(cuts[98], 2),
+                'max_ms': round(max(latencies), 2),
+            }
+        
+        routes = {route: summarize(values, self.errors[route]) for route, values in self.latencies.items()}
+        everything = [value for values in self.latencies.values() for value in values]
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'overall': summarize(everything, sum(self.errors.values())),
+            'routes': routes,
+            'error_samples': self.error_samples,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Target an already running server instead of starting one')
+    parser.add_argument('--workers', type=int, default=4, help='uvicorn workers when starting the server')
+    parser.add_argument('--concurrency', type=int, default=16, help='Simulated concurrent users')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0 = no limit)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Route weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='Fail if overall error rate exceeds this')
+    args = parser.parse_args()
+
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        print("DATABASE_URL must point at the seeded benchmark database")
+        return 1
+
+    mix = parse_mix(args.mix)
+    id_range = change_id_range(database_url)
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        secret_key = os.environ.get('SECRET_KEY')
+        if not secret_key:
+            print("SECRET_KEY of the target server is required with --url")
+            return 1
+    else:
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        secret_key = secrets.token_urlsafe(32)
+        server = start_server(port, args.workers, secret_key)
+
+    try:
+        asyncio.run(wait_healthy(base_url))
+        test = LoadTest(
+            base_url, secret_key, os.environ.get('SESSION_COOKIE_NAME', 'changekeeper_session'),
+            mix, id_range, seed=args.seed
+        )
+        elapsed = asyncio.run(test.run(args.concurrency, args.duration, args.requests))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    results = {
+        'benchmark': 'loadtest',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'workers': None if args.url else args.workers,
+        'concurrency': args.concurrency,
+        'mix': mix,
+        **test.report(elapsed),
+    }
+
+    print(f"{results['overall'].get('requests', 0)} requests in {results['elapsed_s']}s "
+          f"with {args.concurrency} users")
+    print(f"  {'route':10s} {'reqs':>7s} {'rps':>8s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'errors':>7s}")
+    for route, r in list(results['routes'].items()) + [('overall', results['overall'])]:
+        if not r.get('requests'):
+            continue
+        print(f"  {route:10s} {r['requests']:7d} {r['throughput_rps']:8.1f} {r['p50_ms']:9.1f} "
+              f"{r['p95_ms']:9.1f} {r['p99_ms']:9.1f} {r['error_rate']:7.1%}")
+    for route, detail in results['error_samples'].items():
+        print(f"  first {route} error: {detail}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if results['overall'].get('error_rate', 0) > args.max_error_rate else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
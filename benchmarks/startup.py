@@ -0,0 +1,153 @@
+"""
+Worker startup benchmark: import time and RSS of ``app.main``.
+
+Each run imports the application in a fresh interpreter with ``-X importtime``
+(as every uvicorn worker does), then records the cumulative import time, the
+slowest modules, the resident set size, and whether any module that should be
+loaded lazily was pulled in at startup.
+
+Usage:
+    python benchmarks/startup.py --runs 5 --output startup.json
+    python benchmarks/startup.py --max-import-ms 1500 --max-rss-mb 150
+
+Exits non-zero if a lazy module was imported or a threshold was exceeded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must only load on first use (see app/services/__init__.py)
+LAZY_MODULES = [
+    'reportlab',
+    'smtplib',
+    'email.mime.multipart',
+    'app.services.pdf',
+]
+
+CHILD_SCRIPT = """
+import json, sys
+import app.main
+
+rss_kb = 0
+try:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+
+print(json.dumps({
+    'rss_kb': rss_kb,
+    'loaded_lazy_modules': [m for m in %r if m in sys.modules],
+    'module_count': len(sys.modules),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """
+    Parse ``-X importtime`` output.
+    
+    Returns:
+        List of (module, self_us, cumulative_us)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_part, cumulative_part, module = line.split('|', 2)
+            self_us = int(self_part.split(':', 1)[1])
+            cumulative_us = int(cumulative_part)
+        except ValueError:
+            continue
+        rows.append((module.strip(), self_us, cumulative_us))
+    return rows
+
+
+def run_once() -> dict:
+    """Import the app in a fresh interpreter and collect measurements."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT % (LAZY_MODULES,)],
+        cwd=REPO_ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    
+    rows = parse_importtime(result.stderr)
+    child = json.loads(result.stdout.strip().splitlines()[-1])
+    app_main_us = next((cum for module, _, cum in rows if module == 'app.main'), 0)
+    slowest = sorted(rows, key=lambda r: r[1], reverse=True)[:10]
+    
+    return {
+        'import_ms': app_main_us / 1000,
+        'rss_mb': child['rss_kb'] / 1024,
+        'module_count': child['module_count'],
+        'loaded_lazy_modules': child['loaded_lazy_modules'],
+        'slowest_modules': [
+            {'module': module, 'self_ms': self_us / 1000} for module, self_us, _ in slowest
+        ],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh-interpreter runs')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--max-import-ms', type=float, help='Fail if median import time exceeds this')
+    parser.add_argument('--max-rss-mb', type=float, help='Fail if median RSS exceeds this')
+    args = parser.parse_args()
+    
+    runs = [run_once() for _ in range(args.runs)]
+    
+    summary = {
+        'benchmark': 'startup',
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'import_ms_median': statistics.median(r['import_ms'] for r in runs),
+        'import_ms_min': min(r['import_ms'] for r in runs),
+        'rss_mb_median': statistics.median(r['rss_mb'] for r in runs),
+        'module_count': runs[-1]['module_count'],
+        'loaded_lazy_modules': runs[-1]['loaded_lazy_modules'],
+        'slowest_modules': runs[-1]['slowest_modules'],
+    }
+    
+    print(f"app.main import: {summary['import_ms_median']:.1f} ms median "
+          f"({summary['import_ms_min']:.1f} ms min) over {args.runs} runs")
+    print(f"Worker RSS after import: {summary['rss_mb_median']:.1f} MB, "
+          f"{summary['module_count']} modules")
+    for row in summary['slowest_modules']:
+        print(f"  {row['self_ms']:8.1f} ms  {row['module']}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    
+    failed = False
+    if summary['loaded_lazy_modules']:
+        print(f"FAIL: loaded at startup: {', '.join(summary['loaded_lazy_modules'])}")
+        failed = True
+    if args.max_import_ms and summary['import_ms_median'] > args.max_import_ms:
+        print(f"FAIL: import time above {args.max_import_ms} ms")
+        failed = True
+    if args.max_rss_mb and summary['rss_mb_median'] > args.max_rss_mb:
+        print(f"FAIL: RSS above {args.max_rss_mb} MB")
+        failed = True
+    
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
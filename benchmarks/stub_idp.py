@@ -0,0 +1,250 @@
+"""
+Local stub OIDC provider for offline testing and load testing.
+
+Implements just enough of the Entra ID v2.0 endpoints for the ChangeKeeper
+login flow: discovery, JWKS, authorize (auto-approves), token and userinfo.
+ID tokens are signed with an RSA key generated at startup.
+
+Run it as a single process (authorization codes are kept in memory):
+
+    uvicorn benchmarks.stub_idp:app --port 9000
+
+and point ChangeKeeper at it:
+
+    OIDC_METADATA_URL=http://localhost:9000/.well-known/openid-configuration
+
+Users are assigned round-robin from the YAML file named by STUB_IDP_USERS
+(a list of {email, name, groups}), or picked with ?login_hint=<email>.
+A user with ``overage: true`` gets Entra's group-overage claims instead of
+``groups``; their groups are served from a Graph-style endpoint:
+
+    GRAPH_API_URL=http://localhost:9000/v1.0
+NEVER expose this provider outside a test environment.
+"""
+from fastapi import FastAPI, Request, HTTPException, Form
+from fastapi.responses import RedirectResponse, JSONResponse
+from authlib.jose import JsonWebKey, jwt
+from urllib.parse import urlencode
+from typing import Optional
+import itertools
+import os
+import secrets
+import threading
+import time
+import yaml
+
+# Lifetime of issued ID and access tokens
+TOKEN_LIFETIME = 3600
+
+# Lifetime of authorization codes
+CODE_LIFETIME = 300
+
+DEFAULT_USERS = [
+    {
+        'email': 'stub.user@example.com',
+        'name': 'Stub User',
+        'groups': [],
+    }
+]
+
+
+def load_users(path: Optional[str]) -> list[dict]:
+    """Load stub users from a YAML file, falling back to a single default user."""
+    if not path or not os.path.exists(path):
+        return DEFAULT_USERS
+    
+    with open(path, 'r') as f:
+        users = yaml.safe_load(f) or []
+    
+    return users or DEFAULT_USERS
+
+
+users = load_users(os.environ.get('STUB_IDP_USERS'))
+users_by_email = {u['email']: u for u in users}
+_user_cycle = itertools.cycle(users)
+_user_lock = threading.Lock()
+
+signing_key = JsonWebKey.generate_key('RSA', 2048, is_private=True, options={'kid': 'stub-key'})
+
+# Outstanding authorization codes: code -> grant data
+codes: dict[str, dict] = {}
+
+# Issued access tokens: token -> claims
+access_tokens: dict[str, dict] = {}
+
+app = FastAPI(title="ChangeKeeper Stub IdP")
+
+
+def _issuer(request: Request) -> str:
+    """Issuer URL derived from the request, so any host/port works."""
+    return str(request.base_url).rstrip('/')
+
+
+def _next_user(login_hint: Optional[str]) -> dict:
+    """Pick the user for an authorization request."""
+    if login_hint and login_hint in users_by_email:
+        return users_by_email[login_hint]
+    
+    with _user_lock:
+        return next(_user_cycle)
+
+
+def _user_claims(user: dict, issuer: str) -> dict:
+    """Build profile and group claims for a user."""
+    sub = user.get('sub') or user['email']
+    claims = {
+        'sub': sub,
+        'email': user['email'],
+        'preferred_username': user['email'],
+        'name': user.get('name', ''),
+    }
+    
+    if user.get('overage'):
+        # Entra sends a pointer to Graph instead of the groups claim
+        claims['_claim_names'] = {'groups': 'src1'}
+        claims['_claim_sources'] = {
+            'src1': {'endpoint': f'{issuer}/v1.0/users/{sub}/getMemberObjects'}
+        }
+    else:
+        claims['groups'] = user.get('groups', [])
+    
+    return claims
+
+
+def _token_user(request: Request) -> dict:
+    """Return the user for a bearer access token."""
+    auth_header = request.headers.get('authorization', '')
+    grant = access_tokens.get(auth_header.removeprefix('Bearer ').strip())
+    if not grant:
+        raise HTTPException(status_code=401, detail="Invalid access token")
+    return grant
+
+
+@app.get("/.well-known/openid-configuration")
+async def openid_configuration(request: Request):
+    """OIDC discovery document."""
+    issuer = _issuer(request)
+    return {
+        'issuer': issuer,
+        'authorization_endpoint': f'{issuer}/authorize',
+        'token_endpoint': f'{issuer}/token',
+        'userinfo_endpoint': f'{issuer}/userinfo',
+        'jwks_uri': f'{issuer}/keys',
+        'response_types_supported': ['code'],
+        'subject_types_supported': ['pairwise'],
+        'id_token_signing_alg_values_supported': ['RS256'],
+        'token_endpoint_auth_methods_supported': ['client_secret_post', 'client_secret_basic'],
+        'scopes_supported': ['openid', 'email', 'profile'],
+    }
+
+
+@app.get("/keys")
+async def jwks():
+    """Public signing keys."""
+    return {'keys': [signing_key.as_dict(is_private=False, use='sig', alg='RS256')]}
+
+
+@app.get("/authorize")
+async def authorize(
+    redirect_uri: str,
+    client_id: str,
+    state: Optional[str] = None,
+    nonce: Optional[str] = None,
+    login_hint: Optional[str] = None
+):
+    """Auto-approve the authorization request and redirect back with a code."""
+    now = time.time()
+    
+    # Drop expired codes so abandoned flows don't accumulate
+    for code, grant in list(codes.items()):
+        if grant['expires_at'] < now:
+            codes.pop(code, None)
+    
+    code = secrets.token_urlsafe(24)
+    codes[code] = {
+        'client_id': client_id,
+        'redirect_uri': redirect_uri,
+        'nonce': nonce,
+        'user': _next_user(login_hint),
+        'expires_at': now + CODE_LIFETIME,
+    }
+    
+    params = {'code': code}
+    if state:
+        params['state'] = state
+    
+    separator = '&' if '?' in redirect_uri else '?'
+    return RedirectResponse(f'{redirect_uri}{separator}{urlencode(params)}', status_code=302)
+
+
+@app.post("/token")
+async def token(
+    request: Request,
+    grant_type: str = Form(...),
+    code: str = Form(...),
+    redirect_uri: Optional[str] = Form(None),
+    client_id: Optional[str] = Form(None)
+):
+    """Exchange an authorization code for ID and access tokens."""
+    if grant_type != 'authorization_code':
+        return JSONResponse(status_code=400, content={'error': 'unsupported_grant_type'})
+    
+    grant = codes.pop(code, None)
+    if not grant or grant['expires_at'] < time.time():
+        return JSONResponse(status_code=400, content={'error': 'invalid_grant'})
+    
+    if redirect_uri and redirect_uri != grant['redirect_uri']:
+        return JSONResponse(status_code=400, content={'error': 'invalid_grant'})
+    
+    if client_id and client_id != grant['client_id']:
+        return JSONResponse(status_code=400, content={'error': 'invalid_client'})
+    
+    now = int(time.time())
+    issuer = _issuer(request)
+    claims = {
+        'iss': issuer,
+        'aud': grant['client_id'],
+        'iat': now,
+        'nbf': now,
+        'exp': now + TOKEN_LIFETIME,
+        **_user_claims(grant['user'], issuer),
+    }
+    if grant['nonce']:
+        claims['nonce'] = grant['nonce']
+    
+    header = {'alg': 'RS256', 'kid': signing_key.kid}
+    id_token = jwt.encode(header, claims, signing_key).decode('utf-8')
+    
+    access_token = secrets.token_urlsafe(32)
+    access_tokens[access_token] = {'claims': claims, 'user': grant['user']}
+    
+    return {
+        'token_type': 'Bearer',
+        'scope': 'openid email profile',
+        'expires_in': TOKEN_LIFETIME,
+        'access_token': access_token,
+        'id_token': id_token,
+    }
+
+
+@app.get("/userinfo")
+async def userinfo(request: Request):
+    """Return claims for a bearer access token."""
+    claims = _token_user(request)['claims']
+    return {k: claims[k] for k in ('sub', 'email', 'name', 'preferred_username')}
+
+
+@app.post("/v1.0/me/getMemberObjects")
+async def get_member_objects(request: Request):
+    """Graph-style group membership lookup for group-overage users."""
+    user = _token_user(request)['user']
+    return {'value': user.get('groups', [])}
+
+
+@app.post("/v1.0/users/{user_id}/getMemberObjects")
+async def get_user_member_objects(user_id: str, request: Request):
+    """The same lookup at the per-user URL overage tokens point to."""
+    grant = _token_user(request)
+    if grant['claims']['sub'] != user_id:
+        raise HTTPException(status_code=403, detail="Token does not belong to this user")
+    return {'value': grant['user'].get('groups', [])}
@@ -0,0 +1,278 @@
+"""
+Benchmark suite for the hot paths of ChangeKeeper.
+
+Runs each case in-process against the database named by DATABASE_URL (seed
+it first with benchmarks/seed.py) and reports min/median/p95 latency:
+
+- dashboard filter combinations, deep pagination and free-text search
+- CSV export for 30-day and 365-day ranges
+- PDF generation for the change with the longest description
+- SecretDetector.has_secrets over stored change text
+- create_change (form POST, secret scan, insert, audit entry)
+
+HTTP cases go through the full ASGI stack with the signed-in user injected
+via a dependency override, so no IdP is needed.
+
+Usage:
+    DATABASE_URL=sqlite:///bench.db python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --only dashboard --iterations 50
+    python benchmarks/suite.py --compare baseline.json --max-regression 0.25
+
+Exits non-zero if a case errors or (with --compare) regresses beyond the limit.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Add parent directory to path
+sys.path.insert(0, str(REPO_ROOT))
+
+# Cases repeat expensive requests as one user; measure them, don't throttle them
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app.main import app
+from app.auth.dependencies import get_current_user
+from app.database import SessionLocal, engine
+from app.models import Change, AuditLog
+from app.services import SecretDetector
+
+BENCH_USER = {
+    'sub': 'benchmark',
+    'email': 'benchmark@district.example.org',
+    'name': 'Benchmark',
+    'role': 'admin',
+}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def dataset_info() -> dict:
+    """Row counts and sample values used to parameterise the cases."""
+    db = SessionLocal()
+    try:
+        longest = db.query(Change.id).order_by(func.length(Change.what_changed).desc()).first()
+        top_implementer = (
+            db.query(Change.implementer, func.count(Change.id))
+            .group_by(Change.implementer)
+            .order_by(func.count(Change.id).desc())
+            .first()
+        )
+        sample = db.query(Change).order_by(Change.id.desc()).limit(200).all()
+        return {
+            'dialect': engine.dialect.name,
+            'changes': db.query(func.count(Change.id)).scalar(),
+            'audit_logs': db.query(func.count(AuditLog.id)).scalar(),
+            'longest_change_id': longest[0] if longest else None,
+            'top_implementer': top_implementer[0] if top_implementer else 'tech000',
+            'top_system': json.loads(sample[0].systems_affected)[0] if sample else 'ActiveDirectory',
+            'sample_texts': [
+                {
+                    'title': change.title,
+                    'what_changed': change.what_changed,
+                    'backout_plan': change.backout_plan,
+                    'outcome_notes': change.outcome_notes,
+                }
+                for change in sample
+            ],
+        }
+    finally:
+        db.close()
+
+
+def build_cases(client: TestClient, info: dict) -> list[tuple[str, callable]]:
+    """
+    Build (name, callable) pairs; each callable performs one operation.
+
+    HTTP callables return the response status code, others return None.
+    """
+    today = datetime.now().date()
+    last_30 = {'start': str(today - timedelta(days=30)), 'end': str(today)}
+    last_365 = {'start': str(today - timedelta(days=365)), 'end': str(today)}
+
+    def get(path, params=None):
+        return lambda: client.get(path, params=params).status_code
+
+    dashboard_filters = {
+        'dashboard.unfiltered': {},
+        'dashboard.category': {'category': 'Network'},
+        'dashboard.status_impact': {'status': 'Completed', 'impact_level': 'High'},
+        'dashboard.system': {'system': info['top_system']},
+        'dashboard.implementer': {'implementer': info['top_implementer']},
+        'dashboard.date_range': {'start_date': last_30['start'], 'end_date': last_30['end']},
+        'dashboard.combined': {
+            'category': 'Network', 'status': 'Completed', 'system': info['top_system'],
+            'start_date': last_365['start'],
+        },
+        'dashboard.deep_page': {'page': 200},
+    }
+
+    cases = [(name, get('/', params)) for name, params in dashboard_filters.items()]
+    cases += [
+        ('search.common_word', get('/', {'search': 'firmware'})),
+        ('search.ticket', get('/', {'search': 'INC12'})),
+        ('search.no_match', get('/', {'search': 'zzz-no-such-text'})),
+        ('csv.30_days', get('/reports/changes.csv', last_30)),
+        ('csv.365_days', get('/reports/changes.csv', last_365)),
+    ]
+
+    if info['longest_change_id']:
+        cases.append(('pdf.longest_change', get(f"/changes/{info['longest_change_id']}/pdf")))
+
+    texts = info['sample_texts'] or [{'what_changed': 'Updated firmware on the core switch'}]
+    position = {'i': 0}
+
+    def scan_secrets():
+        data = texts[position['i'] % len(texts)]
+        position['i'] += 1
+        SecretDetector.has_secrets(data)
+
+    cases.append(('secrets.has_secrets', scan_secrets))
+
+    long_text = ' '.join(t['what_changed'] for t in texts[:5])
+    cases.append(('secrets.has_secrets_long', lambda: SecretDetector.has_secrets({'what_changed': long_text})))
+
+    def create_change():
+        return client.post('/changes', data={
+            'title': 'Benchmark change',
+            'category': 'Network',
+            'systems_affected': [info['top_system']],
+            'implementer': BENCH_USER['email'],
+            'impact_level': 'Medium',
+            'user_impact': 'Some',
+            'backout_plan': 'Revert to the previous configuration',
+            'what_changed': texts[0]['what_changed'],
+            'status': 'Completed',
+        }).status_code
+
+    cases.append(('create_change', create_change))
+    return cases
+
+
+def run_case(fn, iterations: int, warmup: int) -> dict:
+    """Time one case; non-2xx responses count as errors."""
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    errors = 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        if isinstance(result, int) and result >= 400:
+            errors += 1
+
+    return {
+        'iterations': iterations,
+        'errors': errors,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def git_commit() -> str:
+    """Current commit, for labelling results."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: dict, baseline_path: str, max_regression: float) -> list[str]:
+    """
+    Compare medians against a previous results file.
+
+    Returns:
+        Names of cases whose median grew by more than ``max_regression``
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)['cases']
+
+    regressed = []
+    print(f"\nCompared with {baseline_path}:")
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]['median_ms']
+        change = (current['median_ms'] - before) / before if before else 0.0
+        flag = ' REGRESSION' if change > max_regression else ''
+        print(f"  {name:28s} {before:10.2f} -> {current['median_ms']:10.2f} ms ({change:+.0%}){flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20, help='Timed runs per case')
+    parser.add_argument('--warmup', type=int, default=2, help='Untimed runs per case')
+    parser.add_argument('--only', action='append', default=[], help='Run cases starting with this prefix')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed median slowdown with --compare (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    info = dataset_info()
+    if not info['changes']:
+        print("No changes in the database; run benchmarks/seed.py first")
+        return 1
+
+    print(f"Dataset: {info['changes']} changes, {info['audit_logs']} audit rows ({info['dialect']})")
+
+    app.dependency_overrides[get_current_user] = lambda: BENCH_USER
+    client = TestClient(app)
+
+    results = {}
+    for name, fn in build_cases(client, info):
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        results[name] = run_case(fn, args.iterations, args.warmup)
+        r = results[name]
+        print(f"  {name:28s} median {r['median_ms']:10.2f} ms  p95 {r['p95_ms']:10.2f} ms"
+              f"{'  ERRORS: ' + str(r['errors']) if r['errors'] else ''}")
+
+    summary = {
+        'benchmark': 'suite',
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'dataset': {key: info[key] for key in ('dialect', 'changes', 'audit_logs')},
+        'cases': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    failed = any(r['errors'] for r in results.values())
+    if args.compare and compare(results, args.compare, args.max_regression):
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
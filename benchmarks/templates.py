@@ -0,0 +1,118 @@
+"""
+Cold-start template benchmark: precompile time and first-render latency.
+
+Each run starts a fresh interpreter (as a new uvicorn worker does), imports
+``app.main`` (which precompiles every template) and times the first render
+of the login page, the dashboard and an error page. Three modes:
+
+- ``nocache``: bytecode cache disabled, every template compiled from source
+- ``cold``: empty bytecode cache directory (first deploy)
+- ``warm``: cache populated by a previous run (restart / other workers)
+
+Usage:
+    python benchmarks/templates.py --runs 5 --output templates.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CHILD_SCRIPT = """
+import json, time
+from fastapi.testclient import TestClient
+
+start = time.perf_counter()
+import app.main
+from app.config import get_settings
+import_ms = (time.perf_counter() - start) * 1000
+
+from benchmarks.loadtest import PERSONAS, session_cookie
+
+settings = get_settings()
+client = TestClient(app.main.app)
+cookie = {'cookie': f"{settings.session_cookie_name}={session_cookie(settings.secret_key, PERSONAS['auditor'])}"}
+
+def first(path, headers=None):
+    start = time.perf_counter()
+    client.get(path, headers=headers or {}, follow_redirects=False)
+    return (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    'import_ms': import_ms,
+    'precompile_ms': app.main.template_stats['ms'],
+    'login_ms': first('/login'),
+    'dashboard_ms': first('/', cookie),
+    'error_ms': first('/changes/0', cookie),
+    'login_second_ms': first('/login'),
+}))
+"""
+
+
+def run_once(cache_dir: str) -> dict:
+    """Import the app and render first pages in a fresh interpreter."""
+    env = os.environ.copy()
+    env['TEMPLATE_CACHE_DIR'] = cache_dir
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_mode(mode: str, runs: int) -> dict:
+    """Run one cache mode ``runs`` times and summarize medians."""
+    results = []
+    for _ in range(runs):
+        if mode == 'nocache':
+            results.append(run_once(''))
+            continue
+        
+        cache_dir = tempfile.mkdtemp(prefix='ck-jinja-')
+        try:
+            if mode == 'warm':
+                run_once(cache_dir)
+            results.append(run_once(cache_dir))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    return {key: round(statistics.median(r[key] for r in results), 2) for key in results[0]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Fresh-interpreter runs per mode')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    summary = {
+        'benchmark': 'templates',
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'modes': {mode: run_mode(mode, args.runs) for mode in ('nocache', 'cold', 'warm')},
+    }
+
+    print(f"{'mode':8s} {'import':>9s} {'compile':>9s} {'login':>9s} {'dashboard':>10s} {'error':>9s} {'login 2nd':>10s}  (median ms)")
+    for mode, r in summary['modes'].items():
+        print(f"{mode:8s} {r['import_ms']:9.1f} {r['precompile_ms']:9.1f} {r['login_ms']:9.1f} {r['dashboard_ms']:10.1f} "
+              f"{r['error_ms']:9.1f} {r['login_second_ms']:10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
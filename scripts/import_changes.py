@@ -0,0 +1,81 @@
+"""
+Bulk import historical change records from CSV or NDJSON.
+
+Uses the same normalization, validation, secret scanning and loading path as
+POST /changes/import (COPY on PostgreSQL), and writes one summarizing audit
+entry attributed to --user.
+
+Usage:
+    python scripts/import_changes.py changes.csv --user admin@district.org
+    python scripts/import_changes.py history.ndjson --user admin@district.org --dry-run
+    python scripts/import_changes.py changes.csv --user admin@district.org --errors errors.csv
+
+CSV files need a header row with the change field names (title, category,
+systems_affected, implementer, impact_level, user_impact, what_changed,
+status, ...). systems_affected and links accept a JSON array or a ';'-separated
+list. Optional created_at / created_by columns preserve historical metadata.
+"""
+import argparse
+import csv
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services import ChangeImporter
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='CSV or NDJSON file')
+    parser.add_argument('--user', required=True, help='Email recorded as importer (and default created_by)')
+    parser.add_argument('--name', default='', help='Display name for the audit entry')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='Default: from the file extension')
+    parser.add_argument('--batch-size', type=int, default=ChangeImporter.BATCH_SIZE)
+    parser.add_argument('--confirm-no-secrets', action='store_true',
+                        help='Import rows even if potential secrets are detected')
+    parser.add_argument('--dry-run', action='store_true', help='Validate only')
+    parser.add_argument('--errors', help='Write the per-row error report to this CSV file')
+    args = parser.parse_args()
+
+    file_format = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    user = {'email': args.user, 'name': args.name}
+
+    db = SessionLocal()
+    try:
+        with open(args.path, 'r', encoding='utf-8-sig', newline='') as f:
+            summary = ChangeImporter.import_rows(
+                db,
+                ChangeImporter.read_rows(f, file_format),
+                user,
+                os.path.basename(args.path),
+                confirm_no_secrets=args.confirm_no_secrets,
+                dry_run=args.dry_run,
+                batch_size=args.batch_size
+            )
+    finally:
+        db.close()
+
+    verb = 'Validated' if args.dry_run else 'Imported'
+    print(f"{verb} {summary['imported']} of {summary['total']} rows; {summary['failed']} failed")
+
+    if args.errors:
+        with open(args.errors, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['row', 'errors'])
+            for entry in summary['errors']:
+                writer.writerow([entry['row'], '; '.join(entry['errors'])])
+        print(f"Error report written to {args.errors}")
+    else:
+        for entry in summary['errors'][:20]:
+            print(f"  row {entry['row']}: {'; '.join(entry['errors'])}")
+        if summary['failed'] > 20:
+            print(f"  ... {summary['failed'] - 20} more (use --errors to write them all)")
+
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
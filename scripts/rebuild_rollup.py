@@ -0,0 +1,45 @@
+"""
+Rebuild the change_daily_rollup table from the changes table.
+
+Use after the migration on non-PostgreSQL databases, or to repair drift
+(e.g. after editing changes directly in SQL).
+
+Usage:
+    python scripts/rebuild_rollup.py            # rebuild
+    python scripts/rebuild_rollup.py --check    # report drift only
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services import RollupService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help='Report drift without rebuilding (exit 1 if any)')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            drift = RollupService.drift(db)
+            for key, (stored, actual) in sorted(drift.items()):
+                day, category, status, impact_level, system = key
+                print(f"{day} {category} {status} {impact_level} {system or '(all)'}: rollup {stored}, actual {actual}")
+            print(f"{len(drift)} rollup rows out of date")
+            return 1 if drift else 0
+
+        rows = RollupService.rebuild(db)
+        print(f"Rebuilt change_daily_rollup: {rows} rows")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
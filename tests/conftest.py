@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# app.database builds its engine from DATABASE_URL at import time, so point
+# it at a throwaway SQLite file before any test module imports the app.
+# Tests never touch the database DATABASE_URL names in the environment.
+TEST_DIR = tempfile.mkdtemp(prefix='changekeeper-tests-')
+
+os.environ['DATABASE_URL'] = f"sqlite:///{TEST_DIR}/test.db"
+os.environ['DATABASE_READ_URL'] = ''
+os.environ['ATTACHMENT_DIR'] = os.path.join(TEST_DIR, 'attachments')
+os.environ['CACHE_BACKEND'] = 'memory'
+os.environ['RATE_LIMIT_BACKEND'] = 'memory'
+for name, value in {
+    'SECRET_KEY': 'test-secret-key',
+    'ENTRA_CLIENT_ID': 'test-client-id',
+    'ENTRA_CLIENT_SECRET': 'test-client-secret',
+    'ENTRA_TENANT_ID': 'test-tenant-id',
+    'REDIRECT_URI': 'http://testserver/auth/callback',
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope='session')
+def database():
+    """Schema in the temporary SQLite database."""
+    from app.database import Base, engine
+    import app.models  # noqa: F401 - registers the tables
+    
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(database):
+    """Session on the temporary database."""
+    from app.database import SessionLocal
+    
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def auth_headers(database):
+    """Build request headers signed in as a load-test persona.
+    
+    Returns:
+        Function taking a PERSONAS role and extra headers
+    """
+    from app.config import get_settings
+    from benchmarks.loadtest import PERSONAS, session_cookie
+    
+    settings = get_settings()
+    
+    def headers(role, **extra):
+        cookie = session_cookie(settings.secret_key, PERSONAS[role])
+        return {"cookie": f"{settings.session_cookie_name}={cookie}", "accept": "application/json", **extra}
+    
+    return headers
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
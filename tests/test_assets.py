@@ -0,0 +1,103 @@
+import re
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_fingerprinted_asset_urls():
+    """Test templates link fingerprinted assets served as immutable."""
+    response = client.get("/login")
+    url = re.search(r'href="(/static/css/style\.[0-9a-f]{12}\.css)"', response.text).group(1)
+    
+    response = client.get(url, headers={"accept-encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["content-type"].startswith("text/css")
+    
+    response = client.get(url, headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_unhashed_assets_revalidate():
+    """Test plain static paths are still served but must be revalidated."""
+    response = client.get("/static/css/style.css")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_accepted_encodings():
+    """Test Accept-Encoding parsing honours q=0."""
+    from app.assets import accepted_encodings
+    
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.8") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+def test_html_responses_compressed(auth_headers):
+    """Test large HTML is compressed and small JSON is not."""
+    response = client.get("/", headers=auth_headers('auditor', accept='text/html', **{"accept-encoding": "gzip"}))
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert "content-length" not in response.headers or int(response.headers["content-length"]) < len(response.content)
+    
+    response = client.get("/health", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_streaming_compression_is_incremental():
+    """Test streamed bodies are compressed chunk by chunk and PDFs are skipped."""
+    import asyncio
+    import zlib
+    from starlette.responses import StreamingResponse
+    from app.compression import CompressionMiddleware
+    
+    def make_app(media_type):
+        async def rows():
+            for i in range(50):
+                yield f"{i},{'x' * 100}\n"
+        return CompressionMiddleware(StreamingResponse(rows(), media_type=media_type), minimum_size=500)
+    
+    async def run(asgi_app):
+        messages = []
+        scope = {
+            "type": "http", "method": "GET", "path": "/", "query_string": b"",
+            "headers": [(b"accept-encoding", b"gzip")],
+        }
+        
+        async def receive():
+            return {"type": "http.disconnect"}
+        
+        async def send(message):
+            messages.append(message)
+        
+        await asgi_app(scope, receive, send)
+        return messages
+    
+    messages = asyncio.run(run(make_app("text/csv")))
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    
+    bodies = [m["body"] for m in messages[1:]]
+    assert len([b for b in bodies if b]) > 10
+    text = zlib.decompress(b"".join(bodies), zlib.MAX_WBITS | 16).decode()
+    assert text.count("\n") == 50
+    
+    messages = asyncio.run(run(make_app("application/pdf")))
+    assert b"content-encoding" not in dict(messages[0]["headers"])
+
+
+def test_shared_template_environment():
+    """Test routers share one precompiled, bytecode-cached environment."""
+    import app.main
+    from app.routers import changes
+    
+    assert changes.templates is app.main.templates
+    env = app.main.templates.env
+    assert env.bytecode_cache is not None
+    assert env.auto_reload is False
+    assert app.main.template_stats['templates'] == len(env.list_templates(extensions=['html']))
@@ -43,6 +43,27 @@ def test_secret_detection():
     assert len(findings) == 0
 
 
+def test_secret_pattern_export():
+    """Test secret pattern export for the wizard pre-scan."""
+    from app.services.secret_detection import SecretDetector
+    
+    export = SecretDetector.export_patterns()
+    assert export['version'] == SecretDetector.export_patterns()['version']
+    assert export['fields'] == SecretDetector.SCAN_FIELDS
+    assert len(export['patterns']) == len(SecretDetector.PATTERNS)
+    
+    # Python-only syntax is left out of the export
+    assert SecretDetector.is_js_compatible(r'(?:RSA )?KEY') is True
+    assert SecretDetector.is_js_compatible(r'(?P<key>\w+)') is False
+    assert SecretDetector.is_js_compatible(r'(?i)token') is False
+
+
+def test_secret_patterns_requires_auth():
+    """Test secret pattern export redirects to login when not authenticated."""
+    response = client.get("/changes/secret-patterns.json", follow_redirects=False)
+    assert response.status_code == 302
+
+
 def test_role_determination():
     """Test role configuration."""
     from app.config import RoleConfig
@@ -58,5 +79,145 @@ def test_role_determination():
     assert role == "user"
 
 
+
+def test_role_config_reload(tmp_path):
+    """Test role indexes are rebuilt when roles.yaml changes."""
+    import os
+    from app.config import RoleConfig
+    
+    roles_file = tmp_path / "roles.yaml"
+    roles_file.write_text(
+        "roles:\n"
+        "  admin:\n    groups: ['admin-gid']\n"
+        "  auditor:\n    groups: ['auditor-gid']\n"
+        "default_role: user\n"
+    )
+    config = RoleConfig(str(roles_file))
+    config.RELOAD_CHECK_INTERVAL = 0
+    
+    # Admin takes priority over auditor
+    assert config.get_user_role(["auditor-gid", "admin-gid"]) == "admin"
+    assert config.get_user_role(["other", "auditor-gid"]) == "auditor"
+    
+    roles_file.write_text(
+        "roles:\n"
+        "  admin:\n    groups: ['new-admin-gid']\n"
+        "default_role: user\n"
+    )
+    stat = roles_file.stat()
+    os.utime(roles_file, (stat.st_atime, stat.st_mtime + 10))
+    
+    assert config.get_user_role(["admin-gid"]) == "user"
+    assert config.get_user_role(["new-admin-gid"]) == "admin"
+    
+    # A file that parses but has the wrong shape keeps the previous roles
+    for offset, bad in enumerate(("roles: [admin]\n", "roles\n", "roles:\n  admin:\n    groups: admin-gid\n"), 20):
+        roles_file.write_text(bad)
+        os.utime(roles_file, (stat.st_atime, stat.st_mtime + offset))
+        assert config.get_user_role(["new-admin-gid"]) == "admin"
+        assert config._mtime == stat.st_mtime + offset  # not re-parsed on the next check
+
+
+
+def test_oidc_metadata_cache_persisted_copy(tmp_path):
+    """Test OIDC metadata is served from the last-known-good copy on disk."""
+    import json
+    import time
+    from app.auth.metadata import OIDCMetadataCache
+    
+    class FakeClient:
+        server_metadata = {}
+    
+    cache_file = tmp_path / "oidc.json"
+    cache_file.write_text(json.dumps({
+        'metadata_url': 'https://idp.example/.well-known/openid-configuration',
+        'metadata': {'issuer': 'https://idp.example', 'jwks_uri': 'https://idp.example/keys'},
+        'jwks': {'keys': []},
+        'fetched_at': time.time(),
+    }))
+    
+    client = FakeClient()
+    cache = OIDCMetadataCache(
+        client,
+        metadata_url='https://idp.example/.well-known/openid-configuration',
+        cache_path=str(cache_file)
+    )
+    assert cache.load_persisted() is True
+    assert cache.is_stale() is False
+    assert client.server_metadata['issuer'] == 'https://idp.example'
+    assert client.server_metadata['jwks'] == {'keys': []}
+    assert '_loaded_at' in client.server_metadata
+    
+    # A copy for a different provider is ignored
+    other = OIDCMetadataCache(FakeClient(), 'https://other.example/', str(cache_file))
+    assert other.load_persisted() is False
+
+
+
+def test_group_overage_resolution():
+    """Test overage tokens are detected and resolved through the TTL cache."""
+    import asyncio
+    from app.auth.oidc import extract_user_info
+    from app.auth.groups import GroupMembershipClient, GroupMembershipResolver
+    
+    user_info = extract_user_info({
+        'sub': 'user-sub',
+        'email': 'user@example.com',
+        '_claim_names': {'groups': 'src1'},
+        '_claim_sources': {'src1': {'endpoint': 'https://graph.example/getMemberObjects'}},
+    })
+    assert user_info['group_overage'] is True
+    assert user_info['groups'] == []
+    assert extract_user_info({'sub': 'x', 'groups': ['g']})['group_overage'] is False
+    
+    class CountingClient(GroupMembershipClient):
+        calls = 0
+        
+        async def get_member_groups(self, user, access_token):
+            CountingClient.calls += 1
+            return ['admin-gid']
+    
+    resolver = GroupMembershipResolver(CountingClient(), ttl=60)
+    
+    async def login_twice():
+        first = await resolver.resolve(user_info, 'access-token')
+        second = await resolver.resolve(user_info, 'access-token')
+        return first, second
+    
+    assert asyncio.run(login_twice()) == (['admin-gid'], ['admin-gid'])
+    assert CountingClient.calls == 1
+
+
+def test_membership_client_configuration(tmp_path):
+    """Test membership clients are validated and an empty static file means none."""
+    import asyncio
+    from app.auth.groups import (
+        GraphMembershipClient, GroupMembershipClient, StaticMembershipClient, create_membership_client
+    )
+    
+    with pytest.raises(TypeError):
+        GroupMembershipClient()
+    with pytest.raises(ValueError):
+        create_membership_client('ldap')
+    assert isinstance(create_membership_client('graph'), GraphMembershipClient)
+    
+    # Unset (or a directory) used to open the working directory and crash at import
+    for path in ('', str(tmp_path)):
+        client = create_membership_client('static', membership_file=path)
+        assert asyncio.run(client.get_member_groups({'sub': 's', 'email': 'e'}, None)) == []
+    
+    members = tmp_path / 'members.yaml'
+    members.write_text("- email: e@example.org\n  groups: [g1]\n")
+    client = StaticMembershipClient(str(members))
+    assert asyncio.run(client.get_member_groups({'sub': 's', 'email': 'e@example.org'}, None)) == ['g1']
+
+
+def test_loadtest_session_injection(auth_headers):
+    """Test the load-test harness signs sessions the app accepts."""
+    response = client.get("/", headers=auth_headers('auditor', accept='text/html'), follow_redirects=False)
+    assert response.status_code == 200
+    assert b"Load Auditor" in response.content or b"auditor@district.example.org" in response.content
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,69 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_calendar_feed_token_and_etag(db, auth_headers):
+    """Test calendar feeds are token-authenticated, incremental and support 304."""
+    from datetime import datetime, timedelta
+    from app.config import get_settings
+    from app.models import CalendarFeedOwner, Change
+    from benchmarks.loadtest import PERSONAS
+    
+    settings = get_settings()
+    persona = PERSONAS['user']
+    headers = auth_headers('user')
+    response = client.get("/calendar/subscribe?mine=true", headers=headers)
+    assert response.status_code == 200
+    feed_path = response.json()["url"].split("://", 1)[1].split("/", 1)[1]
+    assert response.json()["webcal_url"].startswith("webcal://")
+    
+    change = Change(title='Firewall rules, phase 2', category='Network', systems_affected='["Firewall"]',
+                    planned_start=datetime.utcnow() + timedelta(days=1), implementer='Network team',
+                    impact_level='Low', user_impact='None', what_changed='Rules', status='Planned',
+                    maintenance_window=True, created_by=persona['email'])
+    db.add(change)
+    db.commit()
+    
+    first = client.get(f"/{feed_path}")
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("text/calendar")
+    assert f"UID:change-{change.id}@" in first.text
+    assert "SUMMARY:[Planned] Firewall rules\\, phase 2" in first.text
+    
+    etag = first.headers["etag"]
+    assert client.get(f"/{feed_path}", headers={"if-none-match": etag}).status_code == 304
+    
+    # Explicit timestamp: SQLite's now() has one-second resolution
+    change.status = 'In Progress'
+    change.updated_at = change.created_at + timedelta(minutes=5)
+    db.commit()
+    updated = client.get(f"/{feed_path}", headers={"if-none-match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] != etag
+    assert "SUMMARY:[In Progress] Firewall rules\\, phase 2" in updated.text
+    
+    assert client.get(f"/{feed_path[:-8]}x{feed_path[-7:]}").status_code == 404
+    
+    # Each poll checks the owner's current role and last sign-in
+    owner = db.get(CalendarFeedOwner, persona['email'])
+    owner.role = 'none'
+    db.commit()
+    assert client.get(f"/{feed_path}").status_code == 404
+    owner.role = 'user'
+    owner.signed_in_at = datetime.utcnow() - timedelta(days=settings.calendar_feed_max_idle_days + 1)
+    db.commit()
+    assert client.get(f"/{feed_path}").status_code == 404
+    owner.signed_in_at = datetime.utcnow()
+    db.commit()
+    assert client.get(f"/{feed_path}").status_code == 200
+    
+    # Resetting revokes every URL the user issued before
+    reset = client.post("/calendar/feeds/reset", headers=headers)
+    assert reset.status_code == 200
+    assert client.get(f"/{feed_path}").status_code == 404
+    new_url = client.get("/calendar/subscribe?mine=true", headers=headers).json()["url"]
+    new_path = new_url.split("://", 1)[1].split("/", 1)[1]
+    assert new_path != feed_path
+    assert client.get(f"/{new_path}").status_code == 200
@@ -0,0 +1,98 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_bulk_import_requires_admin(auth_headers):
+    """Test the bulk import endpoint is admin-only and reports row errors."""
+    files = {"file": ("changes.ndjson", b'{"title": "x"}\nnot json\n', "application/x-ndjson")}
+    
+    for role, expected in (("user", 403), ("admin", 200)):
+        response = client.post(
+            "/changes/import",
+            files=files,
+            data={"dry_run": "true"},
+            headers=auth_headers(role)
+        )
+        assert response.status_code == expected
+    
+    summary = response.json()
+    assert summary["total"] == 2
+    assert summary["imported"] == 0
+    assert "Invalid JSON" in summary["errors"][1]["errors"][0]
+
+
+def test_bulk_status_requires_write_access(auth_headers):
+    """Test auditors cannot bulk update statuses."""
+    response = client.post(
+        "/changes/bulk-status",
+        json={"change_ids": [1], "status": "Completed"},
+        headers=auth_headers("auditor")
+    )
+    assert response.status_code == 403
+
+
+def test_attachment_upload_dedupe_and_range_download(monkeypatch, tmp_path, db, auth_headers):
+    """Test streamed attachment uploads dedupe by SHA-256 and download by range."""
+    import hashlib
+    from app.config import get_settings
+    from app.models import AuditLog, Change
+    from app.ratelimit import rate_limiter
+    
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'attachment_dir', str(tmp_path))
+    monkeypatch.setattr(rate_limiter, 'enabled', False)
+    
+    change = Change(title='Core switch config', category='Network', systems_affected='["Core"]',
+                    implementer='tech@example.org', impact_level='Low', user_impact='None',
+                    what_changed='ACL update', status='Completed', created_by='tech@example.org')
+    db.add(change)
+    db.commit()
+    url = f"/changes/{change.id}/attachments"
+    
+    diff = b"".join(b"+ permit ip 10.0.%d.0 0.0.0.255 any\n" % i for i in range(5000))
+    first = client.post(url + "?filename=../acl.diff", content=diff,
+                        headers=auth_headers("user", **{"content-type": "text/plain"}))
+    assert first.status_code == 200
+    attachment = first.json()["attachment"]
+    assert attachment["filename"] == "acl.diff"
+    assert attachment["sha256"] == hashlib.sha256(diff).hexdigest()
+    
+    # Same content under another name shares the stored blob
+    second = client.post(url + "?filename=acl-copy.diff", content=diff, headers=auth_headers("admin"))
+    assert second.json()["attachment"]["sha256"] == attachment["sha256"]
+    blobs = [p for p in tmp_path.rglob('*') if p.is_file() and p.parent.name != 'tmp']
+    assert len(blobs) == 1
+    assert [a["filename"] for a in client.get(url, headers=auth_headers("auditor")).json()] == ["acl.diff", "acl-copy.diff"]
+    
+    # Text is scanned while streaming; secrets need confirmation
+    leaked = b"interface vlan10\nsnmp password = hunter2hunter2\n"
+    rejected = client.post(url + "?filename=run.conf", content=leaked, headers=auth_headers("user"))
+    assert rejected.status_code == 400
+    assert "Potential secrets detected" in rejected.json()["detail"]
+    confirmed = client.post(url + "?filename=run.conf&confirm_no_secrets=true", content=leaked,
+                            headers=auth_headers("user"))
+    assert confirmed.status_code == 200
+    assert client.post(url + "?filename=x.txt", content=b"x", headers=auth_headers("auditor")).status_code == 403
+    
+    download = f"{url}/{attachment['id']}"
+    audits_before = db.query(AuditLog).filter(AuditLog.action == 'export_attachment').count()
+    full = client.get(download, headers=auth_headers("auditor"))
+    assert full.status_code == 200
+    assert full.content == diff
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.headers["etag"] == f'"{attachment["sha256"]}"'
+    assert "content-encoding" not in full.headers
+    
+    partial = client.get(download, headers=auth_headers("auditor", range="bytes=100-199"))
+    assert partial.status_code == 206
+    assert partial.content == diff[100:200]
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(diff)}"
+    
+    past_end = client.get(download, headers=auth_headers("auditor", range=f"bytes={len(diff)}-"))
+    assert past_end.status_code == 416
+    assert past_end.headers["content-range"] == f"bytes */{len(diff)}"
+    
+    # Resumed ranges aren't audited again
+    assert db.query(AuditLog).filter(AuditLog.action == 'export_attachment').count() == audits_before + 1
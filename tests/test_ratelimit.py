@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_rate_limit_returns_429_with_retry_after(monkeypatch, auth_headers):
+    """Test metered routes throttle per user with Retry-After."""
+    from app.ratelimit import MemoryRateLimitStore, rate_limiter
+    
+    store = MemoryRateLimitStore(capacity=3, rate=0.1, max_in_flight=2, lease_seconds=60)
+    monkeypatch.setattr(rate_limiter, 'store', store)
+    monkeypatch.setattr(rate_limiter, 'enabled', True)
+    
+    def get(role):
+        return client.get("/analytics/data?weeks=4", headers=auth_headers(role))
+    
+    assert get("user").status_code == 200  # costs 2 of 3 tokens
+    throttled = get("user")
+    assert throttled.status_code == 429
+    assert throttled.headers["retry-after"] == "10"  # 1 token short at 0.1/s
+    assert get("auditor").status_code == 200  # buckets are per user
+    
+    # The in-flight cap is independent of tokens; finished requests return their lease
+    assert store.admit("a@example.org", 1)[0] and store.admit("a@example.org", 1)[0]
+    assert store.admit("a@example.org", 1)[2] == 'in_flight'
@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_concurrent_csv_exports_coalesce(monkeypatch, db, auth_headers):
+    """Test identical concurrent exports share one build but are each audited."""
+    import asyncio
+    import time
+    import httpx
+    from app.models import AuditLog
+    from app.ratelimit import rate_limiter
+    from app.routers import reports
+    
+    monkeypatch.setattr(rate_limiter, 'enabled', False)
+    
+    builds = []
+    
+    def slow_build(db, start_date, end_date):
+        builds.append(start_date)
+        time.sleep(0.3)
+        return "ID\n", 0
+    
+    monkeypatch.setattr(reports, 'build_changes_csv', slow_build)
+    
+    headers = auth_headers('admin')
+    
+    async def export_three_times():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            return await asyncio.gather(*[
+                http.get("/reports/changes.csv?start=1999-01-01&end=1999-01-31", headers=headers)
+                for _ in range(3)
+            ])
+    
+    audits_before = db.query(AuditLog).filter(AuditLog.action == 'export_csv').count()
+    responses = asyncio.run(export_three_times())
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert all(r.text == "ID\n" for r in responses)
+    assert len(builds) == 1
+    assert db.query(AuditLog).filter(AuditLog.action == 'export_csv').count() == audits_before + 3